@@ -0,0 +1,55 @@
+"""initial schema
+
+Схема, которую раньше создавал Base.metadata.create_all при старте сервиса.
+В уже развернутой базе (posts создана create_all) миграция ничего не делает и только
+отмечается как примененная - первый alembic upgrade head проходит без ручного stamp.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from src.post_service.repo.sql.migrations import has_table
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if has_table('posts'):
+        return
+
+    op.create_table(
+        'posts',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('title', sa.String(length=255), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('page', sa.JSON(), nullable=False),
+        sa.Column('author_id', sa.String(), nullable=False),
+        sa.Column('game', sa.String(length=255), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('tags', sa.JSON(), nullable=True),
+        sa.Column('view_count', sa.Integer(), nullable=True),
+        sa.Column('like_count', sa.Integer(), nullable=True),
+        sa.Column('comment_count', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('published_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('is_deleted', sa.Boolean(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_posts_author_id', 'posts', ['author_id'])
+    op.create_index('ix_posts_game', 'posts', ['game'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_posts_game', table_name='posts')
+    op.drop_index('ix_posts_author_id', table_name='posts')
+    op.drop_table('posts')
@@ -0,0 +1,48 @@
+"""read path indexes and post counters
+
+Индексы для /stats, ленты изменений и фильтра по тегам, таблица post_counters.
+Индексы строятся CONCURRENTLY, чтобы не блокировать запись в posts.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from src.post_service.repo.sql.migrations import create_index_concurrently, has_table
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if not has_table('post_counters'):
+        op.create_table(
+            'post_counters',
+            sa.Column('key', sa.String(), nullable=False),
+            sa.Column('value', sa.BigInteger(), nullable=False),
+            sa.PrimaryKeyConstraint('key'),
+        )
+
+    with op.get_context().autocommit_block():
+        create_index_concurrently(
+            "ix_posts_stats",
+            "ON posts (id) INCLUDE (view_count, like_count, comment_count, is_deleted)"
+        )
+        create_index_concurrently("ix_posts_changed_at_id", "ON posts (coalesce(updated_at, created_at), id)")
+        create_index_concurrently("ix_posts_tags", "ON posts USING gin (CAST(tags AS JSONB))")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_posts_tags")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_posts_changed_at_id")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_posts_stats")
+
+    op.drop_table('post_counters')
@@ -0,0 +1,31 @@
+"""stats source versions
+
+Версия источника для like_count / comment_count: обновление счетчика
+применяется, только если оно новее уже записанного.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Nullable без default - в Postgres это изменение только каталога, без перезаписи таблицы
+    # IF NOT EXISTS: в базе, созданной create_all, колонки уже есть
+    op.execute("ALTER TABLE posts ADD COLUMN IF NOT EXISTS like_count_version BIGINT")
+    op.execute("ALTER TABLE posts ADD COLUMN IF NOT EXISTS comment_count_version BIGINT")
+
+
+def downgrade() -> None:
+    op.drop_column('posts', 'comment_count_version')
+    op.drop_column('posts', 'like_count_version')
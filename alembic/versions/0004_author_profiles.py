@@ -0,0 +1,49 @@
+"""author profiles
+
+Таблица author_profiles со сводкой автора и индекс (author_id, created_at DESC)
+для списка постов автора. Профили не заполняются миграцией: строка профиля
+создается при первом чтении, как и post_counters.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from src.post_service.repo.sql.migrations import create_index_concurrently, has_table
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if not has_table('author_profiles'):
+        op.create_table(
+            'author_profiles',
+            sa.Column('author_id', sa.String(), nullable=False),
+            sa.Column('draft_posts', sa.Integer(), nullable=False),
+            sa.Column('published_posts', sa.Integer(), nullable=False),
+            sa.Column('total_views', sa.BigInteger(), nullable=False),
+            sa.Column('total_likes', sa.BigInteger(), nullable=False),
+            sa.Column('total_comments', sa.BigInteger(), nullable=False),
+            sa.Column('latest_post_ids', postgresql.ARRAY(sa.String()), nullable=False),
+            sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+            sa.PrimaryKeyConstraint('author_id'),
+        )
+
+    with op.get_context().autocommit_block():
+        create_index_concurrently("ix_posts_author_id_created_at", "ON posts (author_id, created_at DESC)")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_posts_author_id_created_at")
+
+    op.drop_table('author_profiles')
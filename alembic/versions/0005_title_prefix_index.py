@@ -0,0 +1,35 @@
+"""title prefix index
+
+Индекс для подсказок заголовков (/posts/suggest): lower(title) с побайтовым
+сравнением по опубликованным постам - поиск по префиксу и порядок из индекса.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from src.post_service.repo.sql.migrations import create_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        create_index_concurrently(
+            'ix_posts_title_prefix',
+            'ON posts ((lower(title) COLLATE "C")) '
+            'WHERE status = \'published\' AND is_deleted = false'
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_posts_title_prefix")
@@ -0,0 +1,35 @@
+"""scheduled publishing
+
+Колонка posts.scheduled_at и частичный индекс по ожидающим публикации постам.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from src.post_service.repo.sql.migrations import create_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # IF NOT EXISTS: колонка уже есть в базе от create_all или после прерванного прошлого запуска
+    op.execute("ALTER TABLE posts ADD COLUMN IF NOT EXISTS scheduled_at TIMESTAMP WITH TIME ZONE")
+
+    with op.get_context().autocommit_block():
+        create_index_concurrently("ix_posts_scheduled_at", "ON posts (scheduled_at) WHERE scheduled_at IS NOT NULL")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_posts_scheduled_at")
+
+    op.drop_column('posts', 'scheduled_at')
@@ -0,0 +1,63 @@
+"""posts archive
+
+Таблица posts_archive для удаленных постов, которые архиватор переносит из posts,
+и частичный индекс по удаленным постам, по которому архиватор выбирает пачки.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from src.post_service.repo.sql.migrations import create_index_concurrently, has_table
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if not has_table('posts_archive'):
+        op.create_table(
+            'posts_archive',
+            sa.Column('id', sa.String(), nullable=False),
+            sa.Column('title', sa.String(length=255), nullable=False),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.Column('page', sa.JSON(), nullable=False),
+            sa.Column('author_id', sa.String(), nullable=False),
+            sa.Column('game', sa.String(length=255), nullable=True),
+            sa.Column('status', sa.String(length=20), nullable=True),
+            sa.Column('tags', sa.JSON(), nullable=True),
+            sa.Column('view_count', sa.Integer(), nullable=True),
+            sa.Column('like_count', sa.Integer(), nullable=True),
+            sa.Column('comment_count', sa.Integer(), nullable=True),
+            sa.Column('like_count_version', sa.BigInteger(), nullable=True),
+            sa.Column('comment_count_version', sa.BigInteger(), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+            sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+            sa.Column('published_at', sa.DateTime(timezone=True), nullable=True),
+            sa.Column('scheduled_at', sa.DateTime(timezone=True), nullable=True),
+            sa.Column('is_deleted', sa.Boolean(), nullable=True),
+            sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_posts_archive_author_id', 'posts_archive', ['author_id'])
+
+    with op.get_context().autocommit_block():
+        create_index_concurrently(
+            "ix_posts_deleted_changed_at",
+            "ON posts (coalesce(updated_at, created_at)) WHERE is_deleted = true"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_posts_deleted_changed_at")
+
+    op.drop_index('ix_posts_archive_author_id', table_name='posts_archive')
+    op.drop_table('posts_archive')
@@ -0,0 +1,37 @@
+"""service state
+
+Таблица service_state для состояния сервиса между перезапусками
+(горячий набор запросов, по которому прогреваются кэши при старте).
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from src.post_service.repo.sql.migrations import has_table
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if not has_table('service_state'):
+        op.create_table(
+            'service_state',
+            sa.Column('key', sa.String(), nullable=False),
+            sa.Column('value', postgresql.JSONB(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+            sa.PrimaryKeyConstraint('key'),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table('service_state')
@@ -0,0 +1,132 @@
+"""Списки до и после переноса удаленных постов в posts_archive.
+
+База заполняется постами, из которых deleted-ratio удалены (накопившиеся за годы мягкие
+удаления), затем сценарии лент прогоняются дважды: на исходной таблице и после прохода
+PostArchiver (все удаленные, без порога по возрасту) и VACUUM. В отчет попадают задержки
+сценариев, размеры heap и индексов posts и время самого переноса.
+
+Пример (набор из задачи на 10M строк):
+    python -m benchmarks.archive --reset --seed 10000000 --deleted-ratio 0.3 --output reports/archive.json
+
+DATABASE_URL берется из настроек сервиса.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from typing import Awaitable, Callable, Dict
+
+from sqlalchemy import text
+
+from src.post_service.core.db import AsyncSessionLocal, close_db, engine
+from src.post_service.domain.post_archiver import PostArchiver
+from src.post_service.repo.sql.read_repository import SQLAlchemyPostReadRepository
+
+from .harness import build_report, run_scenario, write_report
+from .seed import BENCH_AUTHOR_ID, GAMES, TAGS, reset, seed_posts
+
+logger = logging.getLogger("benchmarks")
+
+
+def scenarios(offset: int) -> Dict[str, Callable[[SQLAlchemyPostReadRepository], Awaitable[list]]]:
+    return {
+        "feed": lambda repo: repo.list_published(0, 20),
+        "feed_deep": lambda repo: repo.list_published(offset, 20),
+        "feed_tag": lambda repo: repo.list_published(0, 20, tags=[TAGS[0]]),
+        "feed_game": lambda repo: repo.list_published(0, 20, game=GAMES[0]),
+        "author_posts": lambda repo: repo.list_by_author(BENCH_AUTHOR_ID, 0, 20),
+    }
+
+
+def operation(query: Callable[[SQLAlchemyPostReadRepository], Awaitable[list]]) -> Callable[[int], Awaitable[bool]]:
+    async def run(i):
+        async with AsyncSessionLocal() as session:
+            await query(SQLAlchemyPostReadRepository(session))
+        return True
+    return run
+
+
+async def table_sizes() -> Dict[str, float]:
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(text(
+            "SELECT (SELECT count(*) FROM posts), pg_relation_size('posts'), pg_indexes_size('posts')"
+        ))
+        rows, heap, indexes = result.one()
+    return {"rows": rows, "heap_mb": round(heap / 2 ** 20, 1), "indexes_mb": round(indexes / 2 ** 20, 1)}
+
+
+async def vacuum(full: bool):
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("VACUUM (FULL, ANALYZE) posts" if full else "VACUUM (ANALYZE) posts"))
+
+
+async def run_phase(phase: str, args: argparse.Namespace) -> list:
+    results = []
+    for name, query in scenarios(args.offset).items():
+        result = await run_scenario(f"{phase}_{name}", operation(query), args.concurrency,
+                                    args.duration, args.warmup)
+        results.append(result)
+        logger.info(f"{result.name}: {result.summary()}")
+    return results
+
+
+async def main(args: argparse.Namespace) -> int:
+    if args.reset:
+        await reset()
+    if args.seed:
+        inserted = await seed_posts(args.seed, deleted_ratio=args.deleted_ratio)
+        logger.info(f"Seeded {inserted} posts")
+
+    sizes = {"before": await table_sizes()}
+    results = await run_phase("before", args)
+
+    started = time.perf_counter()
+    archived = await PostArchiver(after_days=0, batch_size=args.batch_size, batch_pause=0).run_once()
+    archive_seconds = time.perf_counter() - started
+    logger.info(f"Archived {archived} posts in {archive_seconds:.1f}s")
+    await vacuum(args.vacuum_full)
+
+    sizes["after"] = await table_sizes()
+    results += await run_phase("after", args)
+
+    await close_db()
+
+    report = build_report(results, {
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+        "seeded_posts": args.seed,
+        "deleted_ratio": args.deleted_ratio,
+        "archived_posts": archived,
+        "archive_seconds": round(archive_seconds, 1),
+        "vacuum_full": args.vacuum_full,
+        "sizes": sizes,
+    })
+    if args.output:
+        write_report(report, args.output)
+    else:
+        print(json.dumps(report, indent=2))
+    return 0
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Feed latency before/after archiving deleted posts")
+    parser.add_argument("--seed", type=int, default=0, help="insert N generated posts before running")
+    parser.add_argument("--reset", action="store_true", help="truncate posts before seeding")
+    parser.add_argument("--deleted-ratio", type=float, default=0.3, help="share of seeded posts marked deleted")
+    parser.add_argument("--batch-size", type=int, default=5000, help="posts moved per archiver transaction")
+    parser.add_argument("--offset", type=int, default=1000, help="skip for the feed_deep scenario")
+    parser.add_argument("--vacuum-full", action="store_true",
+                        help="rewrite posts after archival instead of a plain VACUUM (shows the compacted size)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=2.0, help="unrecorded seconds before each scenario")
+    parser.add_argument("--output", default=None, help="JSON report path (stdout if omitted)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    sys.exit(asyncio.run(main(parse_args())))
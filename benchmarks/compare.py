@@ -0,0 +1,58 @@
+"""Сравнение двух JSON-отчетов бенчмарка.
+
+    python -m benchmarks.compare reports/base.json reports/head.json --threshold 10
+
+Код выхода 1, если p95 какого-либо сценария вырос больше чем на threshold процентов
+или throughput упал больше чем на threshold процентов.
+"""
+import argparse
+import json
+import sys
+
+METRICS = [("throughput_rps", 1), ("p50_ms", -1), ("p95_ms", -1), ("p99_ms", -1)]  # 1 - больше лучше
+
+
+def load(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def change_percent(base: float, head: float) -> float:
+    if not base:
+        return 0.0
+    return (head - base) / base * 100
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare benchmark reports")
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=10.0, help="regression threshold, percent")
+    args = parser.parse_args()
+
+    base, head = load(args.base), load(args.head)
+    print(f"base {base['meta']['commit']} -> head {head['meta']['commit']}")
+
+    regressions = []
+    for name, head_result in head["scenarios"].items():
+        base_result = base["scenarios"].get(name)
+        if base_result is None:
+            print(f"{name}: new scenario")
+            continue
+
+        cells = []
+        for metric, direction in METRICS:
+            change = change_percent(base_result[metric], head_result[metric])
+            cells.append(f"{metric} {base_result[metric]} -> {head_result[metric]} ({change:+.1f}%)")
+            if metric in ("throughput_rps", "p95_ms") and -direction * change > args.threshold:
+                regressions.append(f"{name}.{metric}")
+        print(f"{name}: " + ", ".join(cells))
+
+    if regressions:
+        print(f"Regressions over {args.threshold}%: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""Запуск сценариев нагрузки и сбор отчетов (throughput, p50/p95/p99)"""
+import asyncio
+import json
+import platform
+import subprocess
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Перцентиль методом nearest-rank по отсортированному списку"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(q / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class ScenarioExhausted(Exception):
+    """operation больше не может выполнять полезную работу (например, кончились черновики) - сценарий останавливается"""
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    requests: int = 0
+    errors: int = 0
+    elapsed: float = 0.0
+    latencies: List[float] = field(default_factory=list)
+    extra: Dict[str, float] = field(default_factory=dict)
+
+    def summary(self) -> dict:
+        latencies = sorted(self.latencies)
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "elapsed_s": round(self.elapsed, 3),
+            "throughput_rps": round(self.requests / self.elapsed, 2) if self.elapsed else 0.0,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+            **self.extra,
+        }
+
+
+async def run_scenario(name: str, operation: Callable[[int], Awaitable[bool]],
+                       concurrency: int, duration: float, warmup: float = 0.0) -> ScenarioResult:
+    """Гоняет operation из concurrency воркеров duration секунд.
+
+    operation(i) возвращает True при успехе; исключение считается ошибкой.
+    ScenarioExhausted останавливает сценарий раньше срока (extra["exhausted"] = 1).
+    Запросы в период warmup выполняются, но в результат не попадают.
+    """
+    result = ScenarioResult(name)
+    counter = 0
+    exhausted = False
+
+    async def worker(deadline: float, record: bool):
+        nonlocal counter, exhausted
+        while not exhausted and time.perf_counter() < deadline:
+            counter += 1
+            start = time.perf_counter()
+            try:
+                ok = await operation(counter)
+            except ScenarioExhausted:
+                exhausted = True
+                break
+            except Exception:
+                ok = False
+            if not record:
+                continue
+            result.latencies.append(time.perf_counter() - start)
+            result.requests += 1
+            if not ok:
+                result.errors += 1
+
+    if warmup:
+        deadline = time.perf_counter() + warmup
+        await asyncio.gather(*(worker(deadline, False) for _ in range(concurrency)))
+
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(worker(deadline, True) for _ in range(concurrency)))
+    result.elapsed = time.perf_counter() - started
+    if exhausted:
+        result.extra["exhausted"] = 1
+    return result
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def build_report(results: List[ScenarioResult], config: dict) -> dict:
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            **config,
+        },
+        "scenarios": {result.name: result.summary() for result in results},
+    }
+
+
+def write_report(report: dict, path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
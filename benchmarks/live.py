@@ -0,0 +1,185 @@
+"""Емкость /posts/{id}/live: сколько одновременных подписчиков держит один воркер.
+
+На каждом уровне сервер (python -m src.post_service.api, один воркер) запускается заново,
+клиентские процессы открывают N потоков на один пост, затем раз в trigger-interval
+просмотр поста (GET /posts/{id}) меняет view_count. Задержка доставки - от просмотра до
+получения кадра клиентом; в отчете также доля доставленных кадров, отказы (503 сверх
+LIVE_MAX_SUBSCRIBERS) и RSS воркера на подписчика.
+
+Нужен локальный PostgreSQL с данными (python -m benchmarks.run --seed ...). Для 10000+
+соединений поднимите лимит открытых файлов (ulimit -n).
+
+Пример:
+    python -m benchmarks.live --subscribers 1000,5000,10000 --clients 4 --output reports/live.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+import httpx
+
+from .harness import ScenarioResult, build_report, write_report
+from .scaling import start_server, stop_server, wait_until_live
+from .seed import sample_ids
+
+logger = logging.getLogger("benchmarks")
+
+
+def subscriber_client(url: str, count: int, lifetime: float) -> Dict:
+    """Выполняется в отдельном процессе: count потоков, времена получения кадров после начального"""
+    async def main():
+        received: List[float] = []
+        stats = {"connected": 0, "rejected": 0, "failed": 0}
+
+        async def subscribe(client: httpx.AsyncClient):
+            try:
+                async with client.stream("GET", url, headers={"Accept": "text/event-stream"}) as response:
+                    if response.status_code != 200:
+                        stats["rejected"] += 1
+                        return
+                    stats["connected"] += 1
+                    initial = True
+                    async for line in response.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        if not initial:
+                            received.append(time.time())
+                        initial = False
+            except httpx.HTTPError:
+                stats["failed"] += 1
+
+        limits = httpx.Limits(max_connections=count, max_keepalive_connections=0)
+        timeout = httpx.Timeout(30.0, read=None)
+        async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+            tasks = [asyncio.create_task(subscribe(client)) for _ in range(count)]
+            await asyncio.sleep(lifetime)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        return {**stats, "received": received}
+
+    return asyncio.run(main())
+
+
+def rss_kb(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def measure(subscribers: int, post_id: str, args: argparse.Namespace) -> ScenarioResult:
+    base_url = f"http://127.0.0.1:{args.port}"
+    server = start_server(1, args.port)
+    try:
+        wait_until_live(base_url)
+        rss_idle = rss_kb(server.pid)
+        lifetime = args.connect_seconds + args.duration + args.interval * 2
+
+        with ProcessPoolExecutor(max_workers=args.clients) as pool:
+            per_client = [subscribers // args.clients + (i < subscribers % args.clients) for i in range(args.clients)]
+            futures = [
+                pool.submit(subscriber_client, f"{base_url}/api/v1/posts/{post_id}/live", count, lifetime)
+                for count in per_client if count
+            ]
+
+            time.sleep(args.connect_seconds)
+            rss_connected = rss_kb(server.pid)
+            triggers = []
+            deadline = time.monotonic() + args.duration
+            with httpx.Client(base_url=base_url, timeout=10.0) as client:
+                while time.monotonic() < deadline:
+                    triggers.append(time.time())
+                    client.get(f"/api/v1/posts/{post_id}")
+                    time.sleep(args.trigger_interval)
+            parts = [future.result() for future in futures]
+    finally:
+        stop_server(server)
+
+    connected = sum(part["connected"] for part in parts)
+    result = ScenarioResult(f"live_{subscribers}", elapsed=args.duration)
+    for part in parts:
+        for received_at in part["received"]:
+            # Кадр относится к последнему просмотру до его получения
+            sent_at = max((t for t in triggers if t <= received_at), default=None)
+            if sent_at is not None:
+                result.latencies.append(received_at - sent_at)
+    result.requests = len(result.latencies)
+    result.errors = max(0, connected * len(triggers) - result.requests)
+    result.extra.update({
+        "connected": connected,
+        "rejected": sum(part["rejected"] for part in parts),
+        "failed": sum(part["failed"] for part in parts),
+        "triggers": len(triggers),
+        "delivery_ratio": round(result.requests / (connected * len(triggers)), 4) if connected and triggers else 0.0,
+        "rss_mb": round(rss_connected / 1024, 1),
+        "rss_kb_per_subscriber": round((rss_connected - rss_idle) / connected, 2) if connected else 0.0,
+    })
+    return result
+
+
+async def pick_post() -> str:
+    published = (await sample_ids(1))["published"]
+    if not published:
+        raise SystemExit("No published posts, seed the database first (python -m benchmarks.run --seed ...)")
+    return published[0]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subscribers", default="1000,5000,10000", help="Уровни числа подписчиков через запятую")
+    parser.add_argument("--clients", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help="Клиентских процессов")
+    parser.add_argument("--post-id", default=None, help="Пост для подписки (по умолчанию - случайный опубликованный)")
+    parser.add_argument("--interval", type=float, default=1.0, help="LIVE_PUSH_INTERVAL_SECONDS сервера")
+    parser.add_argument("--trigger-interval", type=float, default=2.0,
+                        help="Пауза между просмотрами; больше --interval, чтобы кадры не склеивались")
+    parser.add_argument("--connect-seconds", type=float, default=10.0, help="Время на открытие всех потоков")
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--output", default="reports/live.json")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    levels = sorted({int(value) for value in args.subscribers.split(",")})
+    post_id = args.post_id or asyncio.run(pick_post())
+    # Настройки сервера передаются через окружение start_server
+    os.environ.update({
+        "LIVE_PUSH_INTERVAL_SECONDS": str(args.interval),
+        "LIVE_MAX_SUBSCRIBERS": str(max(levels)),
+        "LIVE_FANOUT": "local",
+    })
+
+    results = []
+    for subscribers in levels:
+        result = measure(subscribers, post_id, args)
+        logger.info(f"{result.name}: {json.dumps(result.summary())}")
+        results.append(result)
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    write_report(build_report(results, {
+        "cpu_count": os.cpu_count(),
+        "clients": args.clients,
+        "push_interval_s": args.interval,
+        "trigger_interval_s": args.trigger_interval,
+        "duration_s": args.duration,
+    }), args.output)
+    logger.info(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
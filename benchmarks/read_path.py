@@ -0,0 +1,114 @@
+"""Сравнение путей чтения списков: ORM (Post + PostResponse + Author) и Core (PostRecord).
+
+Каждый путь выполняет запрос list_published и сериализует ответ в JSON так же, как
+эндпоинт GET /posts/. Задержка меряется run_scenario, память - пик tracemalloc
+за один запрос (строки, объекты, сериализация) на каждом limit.
+
+Пример:
+    python -m benchmarks.read_path --seed 20000 --limits 100,1000 --output reports/read_path.json
+
+DATABASE_URL берется из настроек сервиса.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import tracemalloc
+from typing import Awaitable, Callable
+
+from src.post_service.api.v1.post_router import list_response, post_to_response
+from src.post_service.core.db import AsyncSessionLocal, close_db
+from src.post_service.dtos.http import PostListResponse
+from src.post_service.repo.sql.read_repository import SQLAlchemyPostReadRepository
+from src.post_service.repo.sql.repositories import SQLAlchemyPostRepository
+
+from .harness import build_report, run_scenario, write_report
+from .seed import reset, seed_posts
+
+logger = logging.getLogger("benchmarks")
+
+
+def orm_path(limit: int) -> Callable[[int], Awaitable[bool]]:
+    async def operation(i):
+        async with AsyncSessionLocal() as session:
+            posts = await SQLAlchemyPostRepository(session).find_published(0, limit)
+            body = PostListResponse(
+                posts=[post_to_response(post) for post in posts],
+                total=len(posts),
+                page=1,
+                size=limit
+            ).model_dump_json()
+        return bool(body)
+    return operation
+
+
+def core_path(limit: int) -> Callable[[int], Awaitable[bool]]:
+    async def operation(i):
+        async with AsyncSessionLocal() as session:
+            records = await SQLAlchemyPostReadRepository(session).list_published(0, limit)
+            body = list_response(records, len(records), False, 0, limit).body
+        return bool(body)
+    return operation
+
+
+async def peak_memory(operation: Callable[[int], Awaitable[bool]]) -> int:
+    """Пик выделенной памяти за один вызов, байт"""
+    await operation(0)  # Прогрев: кэш компиляции запросов, соединение пула
+    tracemalloc.start()
+    try:
+        await operation(0)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+async def main(args: argparse.Namespace) -> int:
+    if args.reset:
+        await reset()
+    if args.seed:
+        inserted = await seed_posts(args.seed)
+        logger.info(f"Seeded {inserted} posts")
+
+    results = []
+    for limit in args.limits:
+        for name, factory in (("orm", orm_path), ("core", core_path)):
+            operation = factory(limit)
+            peak = await peak_memory(operation)
+            result = await run_scenario(f"{name}_limit_{limit}", operation, args.concurrency,
+                                        args.duration, args.warmup)
+            result.extra["peak_memory_kb"] = round(peak / 1024, 1)
+            results.append(result)
+            logger.info(f"{result.name}: {result.summary()}")
+
+    await close_db()
+
+    report = build_report(results, {
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+        "seeded_posts": args.seed,
+        "limits": args.limits,
+    })
+    if args.output:
+        write_report(report, args.output)
+    else:
+        print(json.dumps(report, indent=2))
+    return 0
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="ORM vs Core read path benchmark")
+    parser.add_argument("--seed", type=int, default=0, help="insert N generated posts before running")
+    parser.add_argument("--reset", action="store_true", help="truncate posts before seeding")
+    parser.add_argument("--limits", type=lambda s: [int(v) for v in s.split(",")], default=[100, 1000])
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=2.0, help="unrecorded seconds before each scenario")
+    parser.add_argument("--output", default=None, help="JSON report path (stdout if omitted)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    sys.exit(asyncio.run(main(parse_args())))
@@ -0,0 +1,200 @@
+"""Бенчмарк сервиса против локального PostgreSQL с in-process заменой RabbitMQ.
+
+Примеры:
+    # Заполнить базу 100k постов и прогнать все сценарии
+    python -m benchmarks.run --seed 100000 --output reports/$(git rev-parse --short HEAD).json
+
+    # Повторный прогон на уже заполненной базе, только чтение
+    python -m benchmarks.run --scenarios get_post,list_posts,search_posts --concurrency 64
+
+DATABASE_URL берется из настроек сервиса, как и у самого приложения.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import sys
+from typing import Optional
+
+import httpx
+
+from src.post_service.api.app import create_app
+from src.post_service.api.lifespan import handle_likes_updated
+from src.post_service.core.db import close_db
+from src.post_service.core.config import settings
+from src.post_service.core.dependencies import (
+    get_event_publisher, get_title_suggester, get_user_profile, get_view_aggregator,
+)
+from src.post_service.domain.stats_batcher import StatsBatcher
+from src.post_service.domain.title_suggester import TitleSuggester
+from src.post_service.domain.view_aggregator import ViewAggregator
+from src.post_service.mq.codec import JSON_CONTENT_TYPE, decode_event
+
+from .harness import ScenarioExhausted, build_report, run_scenario, write_report
+from .seed import BENCH_AUTHOR_ID, WORDS, make_page, reset, sample_ids, seed_drafts, seed_posts
+from .stubs import RecordingEventPublisher
+
+logger = logging.getLogger("benchmarks")
+
+SCENARIOS = ["create_post", "get_post", "list_posts", "search_posts", "suggest_posts", "publish_post", "consume_stats"]
+
+
+def build_app(publisher: RecordingEventPublisher, view_aggregator: Optional[ViewAggregator],
+              title_suggester: Optional[TitleSuggester] = None):
+    app = create_app()
+
+    async def stub_publisher():
+        yield publisher
+
+    async def bench_user():
+        return {"user_id": BENCH_AUTHOR_ID, "username": "bench"}
+
+    app.dependency_overrides[get_event_publisher] = stub_publisher
+    app.dependency_overrides[get_user_profile] = bench_user
+    app.dependency_overrides[get_view_aggregator] = lambda: view_aggregator
+    app.dependency_overrides[get_title_suggester] = lambda: title_suggester
+    return app
+
+
+def make_operations(client: httpx.AsyncClient, ids: dict, rng: random.Random):
+    published = ids["published"] or ["missing"]
+    # Каждый черновик публикуется один раз: повторная публикация - другой, почти пустой путь
+    drafts = iter(ids["drafts"])
+
+    async def create_post(i):
+        response = await client.post("/api/v1/posts/", json={
+            "title": f"bench post {i}",
+            "description": "benchmark",
+            "page": make_page(rng),
+            "tags": [rng.choice(WORDS)],
+        })
+        return response.status_code == 201
+
+    async def get_post(i):
+        response = await client.get(f"/api/v1/posts/{rng.choice(published)}")
+        return response.status_code == 200
+
+    async def list_posts(i):
+        response = await client.get("/api/v1/posts/", params={"limit": 20, "skip": rng.randint(0, 5) * 20})
+        return response.status_code == 200
+
+    async def search_posts(i):
+        response = await client.get("/api/v1/posts/search/", params={"q": rng.choice(WORDS), "limit": 20})
+        return response.status_code == 200
+
+    async def suggest_posts(i):
+        # Ввод по буквам: префиксы длиной 1-4 случайного слова
+        word = rng.choice(WORDS)
+        response = await client.get("/api/v1/posts/suggest", params={"q": word[:rng.randint(1, 4)]})
+        return response.status_code == 200
+
+    async def publish_post(i):
+        post_id = next(drafts, None)
+        if post_id is None:
+            raise ScenarioExhausted("no drafts left, raise --publish-drafts")
+        response = await client.post(f"/api/v1/posts/{post_id}/publish")
+        return response.status_code == 200
+
+    stats_batcher = StatsBatcher()
+
+    async def consume_stats(i):
+        # Декодирование и обработчик consumer вызываются напрямую - как при доставке сообщения из очереди
+        body = json.dumps({"postId": rng.choice(published), "likeCount": i}).encode()
+        await handle_likes_updated(decode_event("post_likes_updated", body, JSON_CONTENT_TYPE), stats_batcher)
+        return True
+
+    return {
+        "create_post": create_post,
+        "get_post": get_post,
+        "list_posts": list_posts,
+        "search_posts": search_posts,
+        "suggest_posts": suggest_posts,
+        "publish_post": publish_post,
+        "consume_stats": consume_stats,
+    }
+
+
+async def main(args: argparse.Namespace) -> int:
+    if args.reset:
+        await reset()
+    if args.seed:
+        inserted = await seed_posts(args.seed, args.chunk_size)
+        logger.info(f"Seeded {inserted} posts")
+
+    ids = await sample_ids()
+    if "publish_post" in args.scenarios:
+        ids["drafts"] = await seed_drafts(args.publish_drafts, args.chunk_size)
+        logger.info(f"Prepared {len(ids['drafts'])} drafts for publish_post")
+    publisher = RecordingEventPublisher()
+    # per-view: как до агрегации - UPDATE и событие post_viewed на каждый просмотр
+    view_aggregator = None
+    if args.views == "per-view":
+        settings.PUBLISH_PER_VIEW_EVENTS = True
+    else:
+        view_aggregator = ViewAggregator(publisher)
+        view_aggregator.start()
+    # Lifespan под ASGITransport не запускается - подсказки загружаются здесь
+    title_suggester = TitleSuggester()
+    await title_suggester.load()
+    app = build_app(publisher, view_aggregator, title_suggester)
+    rng = random.Random(args.random_seed)
+
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        operations = make_operations(client, ids, rng)
+        for name in args.scenarios:
+            published_before = publisher.total
+            result = await run_scenario(name, operations[name], args.concurrency, args.duration, args.warmup)
+            if result.extra.get("exhausted"):
+                logger.warning(f"{name} stopped early after {result.elapsed:.1f}s: ran out of input data")
+            if view_aggregator:
+                await view_aggregator.flush()
+            result.extra["events_published"] = publisher.total - published_before
+            results.append(result)
+            logger.info(f"{name}: {result.summary()}")
+
+    if view_aggregator:
+        await view_aggregator.stop()
+    await close_db()
+
+    report = build_report(results, {
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+        "seeded_posts": args.seed,
+        "views": args.views,
+        "sampled_published_ids": len(ids["published"]),
+    })
+    if args.output:
+        write_report(report, args.output)
+    else:
+        print(json.dumps(report, indent=2))
+    return 0
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Posts service benchmark")
+    parser.add_argument("--seed", type=int, default=0, help="insert N generated posts before running")
+    parser.add_argument("--reset", action="store_true", help="truncate posts before seeding")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--scenarios", type=lambda s: s.split(","), default=SCENARIOS)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=5.0, help="unrecorded seconds before each scenario")
+    parser.add_argument("--views", choices=["aggregated", "per-view"], default="aggregated",
+                        help="учет просмотров: агрегатор или UPDATE + событие на каждый просмотр")
+    parser.add_argument("--publish-drafts", type=int, default=20000,
+                        help="fresh drafts created for publish_post; the scenario stops when they run out")
+    parser.add_argument("--random-seed", type=int, default=1)
+    parser.add_argument("--output", default=None, help="JSON report path (stdout if omitted)")
+    args = parser.parse_args()
+
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    return args
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
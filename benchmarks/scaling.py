@@ -0,0 +1,149 @@
+"""Масштабирование по ядрам: тот же сервер (python -m src.post_service.api) с 1, 2, 4... воркерами.
+
+Нагрузку дают несколько клиентских процессов, чтобы генератор не упирался в одно ядро.
+Нужен локальный PostgreSQL с данными (python -m benchmarks.run --seed ...); RabbitMQ не нужен,
+consumer в воркерах отключен.
+
+Пример:
+    python -m benchmarks.scaling --workers 1,2,4 --clients 4 --output reports/scaling.json
+"""
+import argparse
+import asyncio
+import logging
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import httpx
+
+from .harness import ScenarioResult, build_report, run_scenario, write_report
+
+logger = logging.getLogger("benchmarks")
+
+SCENARIOS = {
+    # Только фреймворк и middleware - чистая стоимость CPU на запрос
+    "root": "/",
+    "list_posts": "/api/v1/posts/?limit=20",
+}
+
+
+def start_server(workers: int, port: int) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "WEB_CONCURRENCY": str(workers),
+        "PORT": str(port),
+        "DEBUG": "false",
+        "CONSUMER_MODE": "off",
+    }
+    return subprocess.Popen(
+        [sys.executable, "-m", "src.post_service.api"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+def wait_until_live(base_url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health/live", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not start in {timeout}s")
+
+
+def stop_server(process: subprocess.Popen):
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def client_load(url: str, concurrency: int, duration: float, warmup: float) -> ScenarioResult:
+    """Выполняется в отдельном процессе-клиенте"""
+    async def main():
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(limits=limits, timeout=30.0) as client:
+            async def operation(i):
+                response = await client.get(url)
+                return response.status_code == 200
+
+            return await run_scenario("client", operation, concurrency, duration, warmup)
+
+    return asyncio.run(main())
+
+
+def measure(name: str, url: str, clients: int, concurrency: int, duration: float, warmup: float) -> ScenarioResult:
+    with ProcessPoolExecutor(max_workers=clients) as pool:
+        futures = [pool.submit(client_load, url, concurrency, duration, warmup) for _ in range(clients)]
+        parts = [future.result() for future in futures]
+
+    result = ScenarioResult(name, elapsed=max(part.elapsed for part in parts))
+    for part in parts:
+        result.requests += part.requests
+        result.errors += part.errors
+        result.latencies.extend(part.latencies)
+    return result
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default=f"1,2,{os.cpu_count() or 1}",
+                        help="Список количеств воркеров через запятую")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--clients", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help="Клиентских процессов")
+    parser.add_argument("--concurrency", type=int, default=32, help="Одновременных запросов на клиента")
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--output", default="reports/scaling.json")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    worker_counts = sorted({int(value) for value in args.workers.split(",")})
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    results = []
+    baseline = {}
+    for workers in worker_counts:
+        server = start_server(workers, args.port)
+        try:
+            wait_until_live(base_url)
+            for name in scenarios:
+                result = measure(f"{name}@{workers}w", base_url + SCENARIOS[name],
+                                 args.clients, args.concurrency, args.duration, args.warmup)
+                rps = result.summary()["throughput_rps"]
+                baseline.setdefault(name, rps)
+                result.extra["workers"] = workers
+                result.extra["speedup"] = round(rps / baseline[name], 2) if baseline[name] else 0.0
+                logger.info(f"{result.name}: {rps} rps, x{result.extra['speedup']} vs {worker_counts[0]} worker(s)")
+                results.append(result)
+        finally:
+            stop_server(server)
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    write_report(build_report(results, {
+        "cpu_count": os.cpu_count(),
+        "clients": args.clients,
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+    }), args.output)
+    logger.info(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Генерация реалистичного набора постов для бенчмарков.
+
+Размер page JSON распределен с длинным хвостом (медиана ~4 КБ, редкие посты до ~64 КБ),
+авторы и теги - с перекосом популярности, как в живых данных. Генерация
+детерминирована (random.Random(seed)), поэтому наборы данных между прогонами одинаковые.
+"""
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+from sqlalchemy import text
+
+from src.post_service.core.db import AsyncSessionLocal, run_migrations
+from src.post_service.domain.models import generate_uuid
+from src.post_service.repo.sql.repositories import SQLAlchemyPostRepository
+
+BENCH_AUTHOR_ID = "bench-user"
+
+WORDS = [
+    "guide", "build", "patch", "meta", "review", "speedrun", "boss", "raid", "update", "tips",
+    "secret", "strategy", "story", "lore", "mod", "ranked", "season", "event", "loadout", "map",
+    "hero", "weapon", "armor", "quest", "dungeon", "arena", "craft", "farm", "combo", "tier",
+]
+GAMES = [f"game-{i}" for i in range(50)]
+TAGS = [f"tag-{i}" for i in range(100)]
+
+
+def _skewed_choice(rng: random.Random, items: List[str]) -> str:
+    # Квадрат равномерного распределения - первые элементы встречаются заметно чаще
+    return items[int(rng.random() ** 2 * len(items))]
+
+
+def make_page(rng: random.Random) -> Dict:
+    target_size = min(int(rng.lognormvariate(8.3, 0.9)), 64 * 1024)
+    blocks = []
+    size = 0
+    while size < target_size:
+        text_length = rng.randint(80, 1200)
+        blocks.append({
+            "type": rng.choice(["paragraph", "heading", "quote", "image"]),
+            "text": " ".join(rng.choice(WORDS) for _ in range(text_length // 7)),
+            "style": {"align": rng.choice(["left", "center"]), "bold": rng.random() < 0.1},
+        })
+        size += text_length + 60
+    return {"version": 1, "blocks": blocks}
+
+
+def make_row(rng: random.Random, now: datetime, deleted_ratio: float = 0.02) -> Dict:
+    created_at = now - timedelta(seconds=rng.randint(0, 365 * 24 * 3600))
+    roll = rng.random()
+    status = "published" if roll < 0.8 else "draft" if roll < 0.95 else "archived"
+    author_id = BENCH_AUTHOR_ID if rng.random() < 0.01 else f"author-{int(rng.random() ** 3 * 5000)}"
+
+    return {
+        "id": generate_uuid(),
+        "title": " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 9))).capitalize(),
+        "description": " ".join(rng.choice(WORDS) for _ in range(rng.randint(10, 40))),
+        "page": make_page(rng),
+        "author_id": author_id,
+        "game": _skewed_choice(rng, GAMES) if rng.random() < 0.7 else None,
+        "status": status,
+        "tags": sorted({_skewed_choice(rng, TAGS) for _ in range(rng.randint(0, 5))}),
+        "view_count": int(rng.paretovariate(1.2)) * 10,
+        "like_count": int(rng.paretovariate(1.5)),
+        "comment_count": int(rng.paretovariate(2.0)),
+        "created_at": created_at,
+        "published_at": created_at + timedelta(minutes=rng.randint(1, 600)) if status == "published" else None,
+        "is_deleted": rng.random() < deleted_ratio,
+    }
+
+
+async def reset():
+    async with AsyncSessionLocal() as session:
+        await session.execute(text("TRUNCATE posts, posts_archive, post_counters, author_profiles"))
+        await session.commit()
+
+
+async def clear_counters():
+    """Сид пишет в posts напрямую, мимо счетчиков и профилей авторов - они сбрасываются
+    и засеваются заново при первом чтении"""
+    async with AsyncSessionLocal() as session:
+        await session.execute(text("TRUNCATE post_counters, author_profiles"))
+        await session.commit()
+
+
+async def seed_posts(count: int, chunk_size: int = 1000, parallelism: int = 4, seed: int = 42,
+                     deleted_ratio: float = 0.02) -> int:
+    """Вставляет count постов пачками по chunk_size в parallelism параллельных сессиях"""
+    await run_migrations()
+
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    semaphore = asyncio.Semaphore(parallelism)
+    inserted = 0
+
+    async def insert_chunk(rows: List[Dict]):
+        nonlocal inserted
+        async with semaphore, AsyncSessionLocal() as session:
+            inserted += len(await SQLAlchemyPostRepository(session).insert_many(rows))
+            await session.commit()
+
+    tasks = []
+    for offset in range(0, count, chunk_size):
+        rows = [make_row(rng, now, deleted_ratio) for _ in range(min(chunk_size, count - offset))]
+        tasks.append(asyncio.create_task(insert_chunk(rows)))
+        # Не держим в памяти больше parallelism * 2 пачек
+        if len(tasks) >= parallelism * 2:
+            await asyncio.gather(*tasks)
+            tasks = []
+    await asyncio.gather(*tasks)
+
+    async with AsyncSessionLocal() as session:
+        await session.execute(text("ANALYZE posts"))
+        await session.commit()
+    await clear_counters()
+
+    return inserted
+
+
+async def seed_drafts(count: int, chunk_size: int = 1000, seed: int = 7) -> List[str]:
+    """Свежие черновики бенчмарк-пользователя для сценария публикации: каждый публикуется один раз"""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    post_ids = []
+    for offset in range(0, count, chunk_size):
+        rows = [
+            {**make_row(rng, now, deleted_ratio=0), "author_id": BENCH_AUTHOR_ID, "status": "draft",
+             "published_at": None}
+            for _ in range(min(chunk_size, count - offset))
+        ]
+        async with AsyncSessionLocal() as session:
+            post_ids.extend(await SQLAlchemyPostRepository(session).insert_many(rows))
+            await session.commit()
+    await clear_counters()
+    return post_ids
+
+
+async def sample_ids(limit: int = 10000) -> Dict[str, List[str]]:
+    """Случайные id опубликованных постов и черновиков бенчмарк-пользователя для сценариев"""
+    async with AsyncSessionLocal() as session:
+        published = await session.execute(
+            text("SELECT id FROM posts TABLESAMPLE SYSTEM (10) "
+                 "WHERE status = 'published' AND NOT is_deleted LIMIT :limit"),
+            {"limit": limit},
+        )
+        drafts = await session.execute(
+            text("SELECT id FROM posts WHERE author_id = :author_id AND status = 'draft' LIMIT :limit"),
+            {"author_id": BENCH_AUTHOR_ID, "limit": limit},
+        )
+        return {
+            "published": [row[0] for row in published],
+            "drafts": [row[0] for row in drafts],
+        }
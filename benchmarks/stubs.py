@@ -0,0 +1,29 @@
+"""Локальные заменители внешних зависимостей для бенчмарков"""
+from collections import Counter
+
+from src.post_service.mq.codec import encode_event
+
+
+class RecordingEventPublisher:
+    """In-process замена EventPublisher: ничего не отправляет, только считает сообщения по routing key"""
+
+    def __init__(self):
+        self.published = Counter()
+
+    async def connect(self):
+        pass
+
+    async def publish(self, event):
+        encode_event(event)  # Сериализация - часть реальной стоимости публикации
+        self.published[f"posts.{event.event_type}"] += 1
+
+    async def publish_many(self, events):
+        for event in events:
+            await self.publish(event)
+
+    async def close(self):
+        pass
+
+    @property
+    def total(self) -> int:
+        return sum(self.published.values())
@@ -1,19 +1,50 @@
-import uvicorn
+"""Production-запуск: python -m src.post_service.api
+
+Uvicorn-супервизор держит общий сокет и WEB_CONCURRENCY воркеров (по умолчанию по числу CPU).
+SIGHUP супервизору - поочередный перезапуск воркеров: каждый дожидается текущих запросов
+(GRACEFUL_SHUTDOWN_SECONDS), остальные продолжают обслуживать трафик.
+SIGTTIN / SIGTTOU - добавить / убрать воркер.
+"""
+import importlib.util
 import logging
-from app import app
+
+import uvicorn
+
 from ..core.config import settings
+from ..core.logging import init_logging
 
 logger = logging.getLogger(__name__)
 
+
+def event_loop_impl() -> str:
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+
+def http_impl() -> str:
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+
 def main():
+    init_logging()
+    workers = settings.worker_count()
+    loop, http = event_loop_impl(), http_impl()
+    logger.info(f"Starting {workers} worker(s) on {settings.HOST}:{settings.PORT} (loop={loop}, http={http})")
+
     uvicorn.run(
-        "posts_service.api.app:app",
+        "src.post_service.api.app:app",
         host=settings.HOST,
         port=settings.PORT,
+        workers=workers,
+        loop=loop,
+        http=http,
         reload=settings.DEBUG,
+        timeout_graceful_shutdown=settings.GRACEFUL_SHUTDOWN_SECONDS,
         log_level="debug" if settings.DEBUG else "info",
         access_log=True,
+        # Логгеры uvicorn пишут через корневой обработчик (очередь + JSON), а не через свои синхронные
+        log_config=None,
     )
 
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,10 +1,16 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 import logging
+from .health import router as health_router
 from .lifespan import lifespan
+from .middleware import MetricsMiddleware, QueryStatsMiddleware, SlowRequestMiddleware
+from .v1.admin_router import router as admin_router
+from .v1.author_router import router as author_router
 from .v1.post_router import router
 from ..core.config import settings
 from ..core.logging import init_logging
+from ..core.metrics import registry
 
 init_logging()
 logger = logging.getLogger(__name__)
@@ -27,14 +33,33 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["Server-Timing"],
     )
+    app.add_middleware(SlowRequestMiddleware)
+    app.add_middleware(QueryStatsMiddleware)
+    app.add_middleware(MetricsMiddleware)
 
+    app.include_router(health_router)
     app.include_router(router, prefix=settings.API_V1_PREFIX)
+    app.include_router(admin_router, prefix=settings.API_V1_PREFIX)
+    app.include_router(author_router, prefix=settings.API_V1_PREFIX)
 
     @app.get("/")
     async def root():
         return {"message": "Posts Service API", "version": "1.0.0"}
 
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        consumer = getattr(app.state, "consumer", None)
+        if consumer:
+            try:
+                await consumer.refresh_queue_depth()
+            except Exception as e:
+                logger.warning(f"Failed to refresh consumer queue depth: {e}")
+        exporter = getattr(app.state, "metrics_exporter", None)
+        other_workers = await exporter.other_workers() if exporter else []
+        return PlainTextResponse(registry.render(other_workers), media_type="text/plain; version=0.0.4")
+
     logger.info("Posts Service application created successfully")
     return app
 
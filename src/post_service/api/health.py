@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Request, status
+from fastapi.responses import JSONResponse
+from ..core.config import settings
+from ..core.db import check_db
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+
+@router.get("/live")
+async def live():
+    """Liveness: процесс жив и event loop отвечает. Зависимости не проверяются,
+    чтобы недоступная БД не приводила к перезапуску контейнера."""
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+async def ready(request: Request):
+    """Readiness: можно ли направлять трафик на этот экземпляр"""
+    publisher = getattr(request.app.state, "event_publisher", None)
+    consumer = getattr(request.app.state, "consumer", None)
+    cache_warmer = getattr(request.app.state, "cache_warmer", None)
+
+    checks = {
+        "database": await check_db(),
+        "amqp_publisher": bool(publisher and publisher.is_connected),
+        "amqp_consumer": bool(consumer and consumer.is_connected),
+        "cache_warmup": bool(cache_warmer and cache_warmer.done),
+    }
+
+    required = ["database"]
+    if settings.READINESS_REQUIRES_AMQP:
+        required.append("amqp_publisher")
+    if settings.WARMUP_ENABLED and cache_warmer:
+        required.append("cache_warmup")
+
+    is_ready = all(checks[name] for name in required)
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if is_ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"status": "ready" if is_ready else "not_ready", "checks": checks},
+    )
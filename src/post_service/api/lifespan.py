@@ -1,129 +1,231 @@
 import asyncio
+import os
+import time
 from contextlib import asynccontextmanager
+from functools import partial
 from fastapi import FastAPI
 import logging
+from typing import Optional
+from ..core.config import settings
 from ..core.db import init_db, close_db, AsyncSessionLocal
+from ..core.logging import SAMPLED
+from ..core.metrics import PROCESS_STARTED_AT, STARTUP_DURATION, WorkerMetricsExporter
+from ..core.process_lock import ProcessLock
+from ..core.profiling import LoopLagMonitor
 from ..mq.consumer import EventConsumer
 from ..mq.publisher import EventPublisher
 from ..domain.services import PostService
+from ..domain.cache_warmer import CacheWarmer
+from ..domain.counter_reconciler import CounterReconciler
+from ..domain.live_hub import LiveHub
+from ..domain.post_archiver import PostArchiver
+from ..domain.publish_scheduler import PublishScheduler
+from ..domain.stats_batcher import StatsBatcher, StatsUpdate, source_version
+from ..domain.title_suggester import TitleSuggester
+from ..domain.view_aggregator import ViewAggregator
 from ..repo.sql.repositories import SQLAlchemyPostRepository
 from ..domain.events import PostLikesUpdatedEvent, PostCommentsUpdatedEvent
 
 logger = logging.getLogger(__name__)
 
 
-async def handle_likes_updated(event_data: dict):
+async def apply_stats_update(update: StatsUpdate, stats_batcher: Optional[StatsBatcher] = None) -> bool:
+    if stats_batcher:
+        return await stats_batcher.submit(update)
+
+    async with AsyncSessionLocal() as session:
+        try:
+            post_repo = SQLAlchemyPostRepository(session)
+            # Создаем PostService без publisher, т.к. это обновление статистики от внешнего сервиса
+            post_service = PostService(post_repo, None)
+            result = await post_service.update_post_stats(
+                update.post_id, update.version, **{update.counter: update.value}
+            )
+            await session.commit()
+            return result
+        except Exception:
+            await session.rollback()
+            raise
+
+
+async def handle_likes_updated(event: PostLikesUpdatedEvent, stats_batcher: Optional[StatsBatcher] = None,
+                               live_hub: Optional[LiveHub] = None):
     """Обработчик события обновления лайков"""
     try:
-        # Может приходить как post_id, так и другие варианты
-        post_id = event_data.get("post_id") or event_data.get("postId")
-        like_count = event_data.get("like_count") or event_data.get("likeCount") or event_data.get("count")
-        
-        if not post_id or like_count is None:
-            logger.warning(f"Invalid event data for likes_updated: {event_data}")
-            return
-        
-        async with AsyncSessionLocal() as session:
-            try:
-                post_repo = SQLAlchemyPostRepository(session)
-                # Создаем PostService без publisher, т.к. это обновление статистики от внешнего сервиса
-                post_service = PostService(post_repo, None)
-                
-                result = await post_service.update_post_stats(post_id, like_count=int(like_count))
-                if result:
-                    await session.commit()
-                    logger.info(f"Updated likes for post {post_id}: {like_count}")
-                else:
-                    logger.warning(f"Post {post_id} not found for likes update")
-                    await session.rollback()
-            except Exception as e:
-                await session.rollback()
-                raise
-            
+        update = StatsUpdate(event.post_id, "like_count", event.like_count, source_version(event))
+        if await apply_stats_update(update, stats_batcher):
+            logger.info("Updated likes for post %s: %s", event.post_id, event.like_count, extra=SAMPLED)
+            if live_hub:
+                live_hub.notify(event.post_id)
+        else:
+            logger.info("Skipped likes update for post %s: post not found or newer value already stored",
+                        event.post_id, extra=SAMPLED)
     except Exception as e:
+        # Ошибка уходит в consumer: сообщение будет повторено, а затем попадет в DLQ
         logger.error(f"Error handling likes_updated event: {e}")
+        raise
 
 
-async def handle_comments_updated(event_data: dict):
+async def handle_comments_updated(event: PostCommentsUpdatedEvent, stats_batcher: Optional[StatsBatcher] = None,
+                                  live_hub: Optional[LiveHub] = None):
     """Обработчик события обновления комментариев"""
     try:
-        # Может приходить как post_id, так и другие варианты
-        post_id = event_data.get("post_id") or event_data.get("postId")
-        comment_count = event_data.get("comment_count") or event_data.get("commentCount") or event_data.get("count")
-        
-        if not post_id or comment_count is None:
-            logger.warning(f"Invalid event data for comments_updated: {event_data}")
-            return
-        
-        async with AsyncSessionLocal() as session:
-            try:
-                post_repo = SQLAlchemyPostRepository(session)
-                post_service = PostService(post_repo, None)
-                
-                result = await post_service.update_post_stats(post_id, comment_count=int(comment_count))
-                if result:
-                    await session.commit()
-                    logger.info(f"Updated comments for post {post_id}: {comment_count}")
-                else:
-                    logger.warning(f"Post {post_id} not found for comments update")
-                    await session.rollback()
-            except Exception as e:
-                await session.rollback()
-                raise
-            
+        update = StatsUpdate(event.post_id, "comment_count", event.comment_count, source_version(event))
+        if await apply_stats_update(update, stats_batcher):
+            logger.info("Updated comments for post %s: %s", event.post_id, event.comment_count, extra=SAMPLED)
+            if live_hub:
+                live_hub.notify(event.post_id)
+        else:
+            logger.info("Skipped comments update for post %s: post not found or newer value already stored",
+                        event.post_id, extra=SAMPLED)
     except Exception as e:
+        # Ошибка уходит в consumer: сообщение будет повторено, а затем попадет в DLQ
         logger.error(f"Error handling comments_updated event: {e}")
+        raise
 
 
 async def start_consumer(consumer: EventConsumer):
-    """Запуск consumer в фоновом режиме"""
+    """Запуск consumer в фоновом режиме; пока RabbitMQ недоступен - повторяем подключение с паузой"""
+    delay = 1
+    while True:
+        try:
+            await consumer.start_consuming()
+            return
+        except asyncio.CancelledError:
+            logger.info("Consumer cancelled")
+            raise
+        except Exception as e:
+            logger.error(f"Consumer error: {e}, reconnecting in {delay}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, settings.RABBITMQ_CONNECT_MAX_DELAY_SECONDS)
+
+
+async def start_consumer_when_elected(consumer: EventConsumer, lock: ProcessLock):
+    """CONSUMER_MODE=single: consumer работает только в воркере, который держит лок.
+    Остальные воркеры периодически пробуют его взять - на случай падения или перезапуска владельца."""
+    while not lock.try_acquire():
+        await asyncio.sleep(settings.CONSUMER_ELECTION_INTERVAL_SECONDS)
+
+    logger.info(f"Worker {os.getpid()} runs the event consumer")
     try:
-        await consumer.start_consuming()
-    except asyncio.CancelledError:
-        logger.info("Consumer cancelled")
+        await start_consumer(consumer)
+    finally:
+        lock.release()
+
+
+def consumer_task(consumer: EventConsumer) -> Optional[asyncio.Task]:
+    if settings.CONSUMER_MODE == "off":
+        return None
+    if settings.CONSUMER_MODE == "all":
+        return asyncio.create_task(start_consumer(consumer))
+    return asyncio.create_task(start_consumer_when_elected(consumer, ProcessLock(settings.CONSUMER_LOCK_PATH)))
+
+
+async def warm_up_db():
+    """Проверка БД в фоне: старт не ждет базу, готовность отдает /health/ready"""
+    try:
+        await init_db()
     except Exception as e:
-        logger.error(f"Consumer error: {e}")
+        logger.error(f"Database is not available at startup: {e}")
+
+
+async def _cancel(task: asyncio.Task):
+    task.cancel()
+    try:
+        await task
+    except (asyncio.CancelledError, Exception):
+        pass
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
     Lifespan manager for startup and shutdown events
+
+    Старт не ходит в сеть: схема применяется отдельным шагом (alembic upgrade head),
+    а подключения к БД и RabbitMQ устанавливаются в фоновых задачах.
     """
     # Startup
     logger.info("Starting Posts Service...")
-    consumer_task = None
 
-    try:
-        # Initialize database
-        await init_db()
-        logger.info("Database initialized successfully")
-
-        # Initialize event publisher
-        publisher = EventPublisher()
-        await publisher.connect()
-        app.state.event_publisher = publisher
-        logger.info("Event publisher initialized successfully")
-
-        # Initialize event consumer
-        consumer = EventConsumer()
-        await consumer.connect()
-        
-        # Регистрируем обработчики событий
-        consumer.register_handler("post_likes_updated", handle_likes_updated)
-        consumer.register_handler("post_comments_updated", handle_comments_updated)
-        
-        # Запускаем consumer в фоновой задаче
-        consumer_task = asyncio.create_task(start_consumer(consumer))
-        app.state.consumer = consumer
-        app.state.consumer_task = consumer_task
-        logger.info("Event consumer started successfully")
-
-        logger.info("Posts Service started successfully")
+    # Монитор задержек event loop
+    loop_monitor = LoopLagMonitor()
+    loop_monitor.start()
+    app.state.loop_monitor = loop_monitor
 
-    except Exception as e:
-        logger.error(f"Failed to start Posts Service: {e}")
-        raise
+    # Несколько воркеров: /metrics любого из них отдает метрики всех (снимки в METRICS_DIR)
+    metrics_exporter = WorkerMetricsExporter(settings.METRICS_DIR, settings.METRICS_SNAPSHOT_INTERVAL_SECONDS)
+    if settings.worker_count() > 1:
+        metrics_exporter.start()
+    app.state.metrics_exporter = metrics_exporter
+
+    publisher = EventPublisher()
+    app.state.event_publisher = publisher
+
+    view_aggregator = ViewAggregator(publisher)
+    view_aggregator.start()
+    app.state.view_aggregator = view_aggregator
+
+    # Живые счетчики (/posts/{id}/live): хаб учитывает и просмотры, еще не записанные агрегатором
+    live_hub = LiveHub(view_aggregator)
+    view_aggregator.live_hub = live_hub
+    live_hub.start()
+    app.state.live_hub = live_hub
+
+    # Подсказки заголовков загружаются в фоне; до загрузки /posts/suggest отвечает из БД
+    title_suggester = TitleSuggester()
+    title_suggester.start()
+    app.state.title_suggester = title_suggester
+
+    # Отложенные публикации: цикл в каждом воркере, пачки разбираются через SKIP LOCKED
+    publish_scheduler = PublishScheduler(publisher, title_suggester)
+    if settings.SCHEDULER_ENABLED:
+        publish_scheduler.start()
+    app.state.publish_scheduler = publish_scheduler
+
+    # Прогрев кэшей списков; /health/ready ждет его окончания или бюджета WARMUP_BUDGET_SECONDS
+    cache_warmer = CacheWarmer()
+    if settings.WARMUP_ENABLED:
+        cache_warmer.start()
+    app.state.cache_warmer = cache_warmer
+
+    # Перенос давно удаленных постов в posts_archive
+    post_archiver = PostArchiver()
+    if settings.ARCHIVER_ENABLED:
+        post_archiver.start()
+
+    # Сверка поддерживаемых счетчиков с posts
+    counter_reconciler = CounterReconciler()
+    if settings.COUNTER_RECONCILE_ENABLED:
+        counter_reconciler.start()
+
+    stats_batcher = StatsBatcher()
+
+    consumer = EventConsumer()
+    # Регистрируем обработчики событий; обновления счетчиков пишутся пачками
+    consumer.register_handler(
+        "post_likes_updated", partial(handle_likes_updated, stats_batcher=stats_batcher, live_hub=live_hub)
+    )
+    consumer.register_handler(
+        "post_comments_updated", partial(handle_comments_updated, stats_batcher=stats_batcher, live_hub=live_hub)
+    )
+    app.state.consumer = consumer
+
+    app.state.background_tasks = [
+        asyncio.create_task(warm_up_db()),
+        asyncio.create_task(publisher.connect_with_retry()),
+    ]
+    task = consumer_task(consumer)
+    if task:
+        app.state.background_tasks.append(task)
+
+    startup_duration = time.perf_counter() - PROCESS_STARTED_AT
+    STARTUP_DURATION.set(startup_duration)
+    if startup_duration > settings.STARTUP_TARGET_SECONDS:
+        logger.warning(
+            f"Posts Service startup took {startup_duration:.2f}s, target is {settings.STARTUP_TARGET_SECONDS}s"
+        )
+    logger.info(f"Posts Service started in {startup_duration:.2f}s")
 
     yield
 
@@ -131,22 +233,30 @@ async def lifespan(app: FastAPI):
     logger.info("Shutting down Posts Service...")
 
     try:
-        # Останавливаем consumer
-        if hasattr(app.state, 'consumer_task') and app.state.consumer_task:
-            app.state.consumer_task.cancel()
-            try:
-                await app.state.consumer_task
-            except asyncio.CancelledError:
-                pass
-        
-        if hasattr(app.state, 'consumer'):
-            await app.state.consumer.close()
-            logger.info("Event consumer closed")
-
-        # Close event publisher
-        if hasattr(app.state, 'event_publisher'):
-            await app.state.event_publisher.close()
-            logger.info("Event publisher closed")
+        # Останавливаем фоновые подключения и consumer
+        for task in app.state.background_tasks:
+            await _cancel(task)
+
+        # Сбрасываем накопленные просмотры, пока publisher и БД доступны
+        await view_aggregator.stop()
+        await title_suggester.stop()
+        await publish_scheduler.stop()
+        await post_archiver.stop()
+        await counter_reconciler.stop()
+        await live_hub.stop()
+        if settings.WARMUP_ENABLED:
+            # Горячий набор сохраняется и при остановке: следующий старт (деплой) прогреется по нему
+            await cache_warmer.stop()
+
+        await consumer.close()
+        await stats_batcher.close()
+        logger.info("Event consumer closed")
+
+        await publisher.close()
+        logger.info("Event publisher closed")
+
+        await loop_monitor.stop()
+        await metrics_exporter.stop()
 
         # Close database connections
         await close_db()
@@ -155,4 +265,4 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Error during shutdown: {e}")
 
-    logger.info("Posts Service shutdown completed")
\ No newline at end of file
+    logger.info("Posts Service shutdown completed")
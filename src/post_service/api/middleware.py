@@ -0,0 +1,133 @@
+import asyncio
+import time
+
+from ..core.config import settings
+from ..core.metrics import HTTP_REQUEST_DURATION, PROCESS_STARTED_AT, TIME_TO_FIRST_REQUEST
+from ..core.profiling import capture_slow_request
+from ..core.sql_instrumentation import log_query_budget, track_queries
+
+
+class MetricsMiddleware:
+    """ASGI middleware: латентность каждого запроса в гистограмму по шаблону маршрута.
+
+    Чистый ASGI (без BaseHTTPMiddleware), чтобы не добавлять задач и копирования тела ответа.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._first_request_seen = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+        if not self._first_request_seen:
+            self._first_request_seen = True
+            TIME_TO_FIRST_REQUEST.set(start - PROCESS_STARTED_AT)
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - start,
+                scope["method"],
+                route_template(scope),
+                str(status_code),
+            )
+
+
+def route_template(scope) -> str:
+    """Шаблон пути (/api/v1/posts/{post_id}), а не сам путь - чтобы не плодить серии по id"""
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    template = getattr(route, "path_format", None)
+    if not template:
+        return scope["path"]
+    # В новых версиях FastAPI маршрут включенного роутера хранит путь без префикса include_router:
+    # префикс - лишние начальные сегменты фактического пути
+    extra = scope["path"].count("/") - template.count("/")
+    if extra <= 0:
+        return template
+    return "/".join(scope["path"].split("/")[:extra + 1]) + template
+
+
+class QueryStatsMiddleware:
+    """ASGI middleware: собирает статистику SQL за запрос, отдает ее в Server-Timing
+    и пишет в лог запросы, превысившие бюджет (REQUEST_QUERY_BUDGET / REQUEST_DB_TIME_BUDGET_MS)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", stats.server_timing().encode()))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                log_query_budget(stats, f"{scope['method']} {route_template(scope)}")
+
+
+# Потоковые ответы (SSE /live, NDJSON /export) долгие по определению: после заголовков
+# время уходит на отдачу тела, а не на ожидание
+_STREAMING_MEDIA_TYPES = (b"text/event-stream", b"application/x-ndjson")
+
+
+def _is_streaming_response(message) -> bool:
+    return any(
+        name.lower() == b"content-type" and value.startswith(_STREAMING_MEDIA_TYPES)
+        for name, value in message.get("headers", [])
+    )
+
+
+class SlowRequestMiddleware:
+    """ASGI middleware: если запрос не завершился за SLOW_REQUEST_CAPTURE_MS,
+    в лог пишется цепочка await его задачи - видно, чего именно он ждет.
+    Для потоковых ответов (text/event-stream, application/x-ndjson) проверка снимается
+    после отправки заголовков: медленным считается только ожидание начала ответа."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        threshold = settings.SLOW_REQUEST_CAPTURE_MS / 1000
+        handle = asyncio.get_running_loop().call_later(
+            threshold,
+            capture_slow_request,
+            asyncio.current_task(),
+            f"{scope['method']} {scope['path']}",
+            threshold,
+        )
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and _is_streaming_response(message):
+                handle.cancel()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            handle.cancel()
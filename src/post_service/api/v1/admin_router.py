@@ -0,0 +1,25 @@
+from fastapi import APIRouter, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from ...core.config import settings
+from ...core.dependencies import AdminDep
+from ...core.profiling import ProfilerBusyError, profile_event_loop
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.post("/profile", response_class=PlainTextResponse)
+async def profile(
+    admin: AdminDep,
+    seconds: float = Query(10, gt=0, le=settings.PROFILER_MAX_SECONDS),
+    interval_ms: float = Query(settings.PROFILER_INTERVAL_MS, ge=1, le=1000),
+):
+    """Семплирует стек event loop в течение seconds секунд.
+
+    Ответ - collapsed stacks: `flamegraph.pl profile.txt > profile.svg` или speedscope.
+    """
+    try:
+        collapsed = await profile_event_loop(seconds, interval_ms / 1000)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    return PlainTextResponse(collapsed)
@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Depends
+
+from ...core.dependencies import get_post_service
+from ...domain.services import PostService
+from ...dtos.http import AuthorProfileResponse
+
+router = APIRouter(prefix="/authors", tags=["authors"])
+
+
+@router.get("/{author_id}/profile", response_model=AuthorProfileResponse)
+async def get_author_profile(
+    author_id: str,
+    post_service: PostService = Depends(get_post_service)
+):
+    """Количество постов по статусам, суммарные просмотры/лайки/комментарии и последние посты автора"""
+    profile = await post_service.get_author_profile(author_id)
+    return AuthorProfileResponse.model_validate(profile)
@@ -1,17 +1,51 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from typing import List, Optional, Annotated
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from datetime import datetime
+from functools import partial
+from typing import List, Optional, Annotated, Tuple
 
-from ...core.dependencies import get_post_service, get_user_profile
+from pydantic_core import to_json
+
+from ...core.admission import admit
+from ...core.dependencies import (
+    get_post_service,
+    get_post_read_repository,
+    get_publish_scheduler,
+    get_title_suggester,
+    get_user_profile,
+    get_current_token,
+    get_optional_user_id,
+    get_event_publisher,
+    get_live_hub,
+    SettingsDep,
+    AdminDep
+)
 
 from ...dtos.http import (
     PostCreateRequest,
     PostResponse,
     PostUpdateRequest,
     PostListResponse,
+    PostStatsResponse,
+    PostStatsBulkRequest,
+    PostImportResponse,
+    PostImportError,
+    PostChange,
+    PostChangesResponse,
+    PostScheduleRequest,
+    PostSuggestion,
     Author
 )
+from ...domain.bulk_export import export_posts_ndjson
+from ...domain.bulk_import import PostImporter, ImportLineTooLongError, iter_ndjson_lines
+from ...domain.live_hub import LiveCapacityError, LiveHub
+from ...domain.post_query_cache import post_query_cache
+from ...domain.publish_scheduler import PublishScheduler
 from ...domain.services import PostService
+from ...domain.title_suggester import TitleSuggester
 from ...domain.models import Post as PostModel
+from ...mq.publisher import EventPublisher
+from ...repo.sql.read_repository import SQLAlchemyPostReadRepository
 
 router = APIRouter(prefix="/posts", tags=["posts"])
 
@@ -43,7 +77,34 @@ def post_to_response(post: PostModel, current_user_info: dict = None) -> PostRes
         comment_count=post.comment_count,
         created_at=post.created_at,
         updated_at=post.updated_at,
-        published_at=post.published_at
+        published_at=post.published_at,
+        scheduled_at=post.scheduled_at
+    )
+
+
+def list_response(records: list, total: int, total_is_estimate: bool, skip: int, limit: int) -> Response:
+    """Ответ списка (схема PostListResponse) из PostRecord без промежуточных pydantic-моделей.
+
+    Данные приходят из БД и уже соответствуют схеме, поэтому валидация пропускается,
+    а dict сериализуется сразу в JSON через pydantic_core.
+    """
+    payload = {
+        "posts": [record.to_response() for record in records],
+        "total": total,
+        "total_is_estimate": total_is_estimate,
+        "page": skip // limit + 1,
+        "size": limit,
+    }
+    return Response(to_json(payload), media_type="application/json")
+
+
+def stats_to_response(stats: Tuple[str, int, int, int]) -> PostStatsResponse:
+    post_id, view_count, like_count, comment_count = stats
+    return PostStatsResponse(
+        post_id=post_id,
+        view_count=view_count or 0,
+        like_count=like_count or 0,
+        comment_count=comment_count or 0
     )
 
 
@@ -66,14 +127,121 @@ async def create_post(
     return post_to_response(post, current_user)
 
 
+@router.post("/import", response_model=PostImportResponse)
+async def import_posts(
+    request: Request,
+    admin: AdminDep,
+    event_publisher: Annotated[EventPublisher, Depends(get_event_publisher)],
+    chunk_size: Optional[int] = Query(None, ge=1, le=2000),
+):
+    """Массовый импорт постов: тело запроса - NDJSON (application/x-ndjson), по посту на строку"""
+    importer = PostImporter(event_publisher, chunk_size)
+    try:
+        result = await importer.run(iter_ndjson_lines(request.stream()))
+    except ImportLineTooLongError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+
+    return PostImportResponse(
+        imported=result.imported,
+        skipped=result.skipped,
+        failed=result.failed,
+        errors=[PostImportError(line=line, error=error) for line, error in result.errors]
+    )
+
+
+@router.get("/export")
+async def export_posts(
+    admin: AdminDep,
+    post_status: Optional[str] = Query(None, alias="status"),
+    author_id: Optional[str] = None,
+    game: Optional[str] = None,
+    updated_since: Optional[datetime] = None,
+    include_deleted: bool = False,
+):
+    """Потоковая выгрузка всех постов по фильтрам в NDJSON (серверный курсор, без offset-пагинации)"""
+    return StreamingResponse(
+        export_posts_ndjson(post_status, author_id, game, updated_since, include_deleted),
+        media_type="application/x-ndjson"
+    )
+
+
+@router.get("/changes", response_model=PostChangesResponse)
+async def get_changes(
+    admin: AdminDep,
+    since: Optional[str] = Query(None, description="next_cursor из предыдущего ответа"),
+    limit: int = Query(100, ge=1, le=1000),
+    post_service: PostService = Depends(get_post_service)
+):
+    """Созданные, измененные и удаленные посты в порядке изменения - для инкрементальной синхронизации"""
+    posts, next_cursor, has_more = await post_service.get_changes(since, limit)
+
+    return PostChangesResponse(
+        changes=[
+            PostChange(
+                id=post.id,
+                changed_at=post.updated_at or post.created_at,
+                deleted=bool(post.is_deleted),
+                post=None if post.is_deleted else post_to_response(post)
+            )
+            for post in posts
+        ],
+        next_cursor=next_cursor,
+        has_more=has_more
+    )
+
+
+@router.get("/suggest", response_model=List[PostSuggestion])
+async def suggest_posts(
+    q: str = Query(..., min_length=1, max_length=255),
+    limit: int = Query(10, ge=1, le=50),
+    title_suggester: Optional[TitleSuggester] = Depends(get_title_suggester),
+    read_repo: SQLAlchemyPostReadRepository = Depends(get_post_read_repository)
+):
+    """Подсказки по мере ввода: (id, title) опубликованных постов с заголовком, начинающимся с q"""
+    prefix = q.lstrip()
+    if title_suggester:
+        suggestions = await title_suggester.suggest(prefix, limit)
+    else:
+        suggestions = await read_repo.suggest_titles(prefix, limit)
+    return Response(
+        to_json([{"id": post_id, "title": title} for post_id, title in suggestions]),
+        media_type="application/json"
+    )
+
+
+@router.get("/popular", response_model=List[PostResponse], dependencies=[Depends(admit("feed"))])
+async def popular_posts(limit: int = Query(10, ge=1, le=100)):
+    """Самые просматриваемые опубликованные посты"""
+    posts = await post_query_cache.popular(limit)
+    return Response(to_json([post.to_response() for post in posts]), media_type="application/json")
+
+
+async def viewer_key(
+    request: Request,
+    settings: SettingsDep,
+    token: Annotated[str, Depends(get_current_token)],
+) -> Optional[str]:
+    """Идентификатор зрителя для оценки уникальных просмотров: пользователь из токена, иначе IP и User-Agent.
+    Сам токен не подходит - он меняется при каждом обновлении, и один зритель считался бы несколько раз"""
+    # Оценка уникальных зрителей выключена - не проверяем подпись JWT на каждом просмотре
+    if not settings.VIEW_UNIQUE_SKETCH_PRECISION:
+        return None
+    user_id = await get_optional_user_id(token, settings)
+    if user_id:
+        return f"user:{user_id}"
+    client_host = request.client.host if request.client else ""
+    return f"{client_host}|{request.headers.get('User-Agent', '')}"
+
+
 @router.get("/{post_id}", response_model=PostResponse)
 async def get_post(
     post_id: str,
     increment_views: bool = Query(True),
+    viewer: Optional[str] = Depends(viewer_key),
     post_service: PostService = Depends(get_post_service)
 ):
     if increment_views:
-        post = await post_service.view_post(post_id)
+        post = await post_service.view_post(post_id, viewer)
     else:
         post = await post_service.post_repo.find_by_id(post_id)
 
@@ -84,6 +252,64 @@ async def get_post(
     return post_to_response(post)
 
 
+@router.get("/{post_id}/stats", response_model=PostStatsResponse)
+async def get_post_stats(
+    post_id: str,
+    response: Response,
+    settings: SettingsDep,
+    post_service: PostService = Depends(get_post_service)
+):
+    stats = await post_service.get_post_stats([post_id])
+    if not stats:
+        raise HTTPException(status_code=404, detail="Post not found")
+
+    # Счетчики опрашиваются часто - разрешаем короткое кэширование клиентам и прокси
+    response.headers["Cache-Control"] = f"public, max-age={settings.STATS_CACHE_TTL_SECONDS}"
+    return stats_to_response(stats[0])
+
+
+@router.get("/{post_id}/live")
+async def live_post_stats(
+    post_id: str,
+    settings: SettingsDep,
+    live_hub: Optional[LiveHub] = Depends(get_live_hub)
+):
+    """Server-Sent Events вместо опроса /stats: событие stats с текущими счетчиками, затем при каждом
+    изменении (не чаще LIVE_PUSH_INTERVAL_SECONDS); gone - пост удален. Соединение с БД на время потока не держится"""
+    if live_hub is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Live updates are not available")
+    try:
+        subscription = await live_hub.subscribe(post_id)
+    except LookupError:
+        raise HTTPException(status_code=404, detail="Post not found")
+    except LiveCapacityError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many live subscribers, retry later",
+            headers={"Retry-After": str(max(1, settings.LIVE_RETRY_MS // 1000))},
+        )
+
+    return StreamingResponse(
+        live_hub.stream(subscription, settings.LIVE_KEEPALIVE_SECONDS, settings.LIVE_RETRY_MS),
+        media_type="text/event-stream",
+        # X-Accel-Buffering: nginx не должен копить кадры в буфере
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/stats", response_model=List[PostStatsResponse])
+async def get_posts_stats(
+    stats_request: PostStatsBulkRequest,
+    response: Response,
+    settings: SettingsDep,
+    post_service: PostService = Depends(get_post_service)
+):
+    stats = await post_service.get_post_stats(stats_request.post_ids)
+
+    response.headers["Cache-Control"] = f"public, max-age={settings.STATS_CACHE_TTL_SECONDS}"
+    return [stats_to_response(row) for row in stats]
+
+
 @router.post("/{post_id}/publish", response_model=PostResponse)
 async def publish_post(
     post_id: str,
@@ -100,50 +326,77 @@ async def publish_post(
     return post_to_response(post, current_user)
 
 
-@router.get("/", response_model=PostListResponse)
+@router.post("/{post_id}/schedule", response_model=PostResponse)
+async def schedule_post(
+    post_id: str,
+    schedule: PostScheduleRequest,
+    current_user: Annotated[dict, Depends(get_user_profile)],
+    post_service: Annotated[PostService, Depends(get_post_service)],
+    publish_scheduler: Annotated[Optional[PublishScheduler], Depends(get_publish_scheduler)]
+):
+    """Отложенная публикация: пост будет опубликован в scheduled_at"""
+    post = await post_service.schedule_post(post_id, current_user["user_id"], schedule.scheduled_at)
+    if not post:
+        raise HTTPException(status_code=404, detail="Post not found or access denied")
+    if publish_scheduler:
+        # После коммита: проснувшийся планировщик должен увидеть новое scheduled_at
+        post_service.post_repo.after_commit(partial(publish_scheduler.wake, post.scheduled_at))
+    return post_to_response(post, current_user)
+
+
+@router.delete("/{post_id}/schedule", response_model=PostResponse)
+async def cancel_scheduled_post(
+    post_id: str,
+    current_user: Annotated[dict, Depends(get_user_profile)],
+    post_service: Annotated[PostService, Depends(get_post_service)]
+):
+    post = await post_service.schedule_post(post_id, current_user["user_id"], None)
+    if not post:
+        raise HTTPException(status_code=404, detail="Post not found or access denied")
+    return post_to_response(post, current_user)
+
+
+@router.delete("/{post_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_post(
+    post_id: str,
+    current_user: Annotated[dict, Depends(get_user_profile)],
+    post_service: Annotated[PostService, Depends(get_post_service)]
+):
+    deleted = await post_service.delete_post(post_id, current_user["user_id"])
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Post not found or access denied")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.get("/", response_model=PostListResponse, dependencies=[Depends(admit("feed"))])
 async def list_posts(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     author_id: Optional[str] = None,
     tags: Optional[List[str]] = Query(None),
     game: Optional[str] = Query(None),  # Фильтр по игре
+    read_repo: SQLAlchemyPostReadRepository = Depends(get_post_read_repository),
     post_service: PostService = Depends(get_post_service)
 ):
     if author_id:
-        posts = await post_service.post_repo.find_by_author(author_id, skip, limit)
+        posts = await read_repo.list_by_author(author_id, skip, limit, game)
     else:
-        posts = await post_service.post_repo.find_published(skip, limit, tags)
-    
-    # Фильтр по игре (если указан)
-    if game:
-        posts = [p for p in posts if p.game == game]
-
-    # Преобразуем посты в ответы
-    post_responses = [post_to_response(post) for post in posts]
-
-    return PostListResponse(
-        posts=post_responses,
-        total=len(post_responses),
-        page=skip // limit + 1,
-        size=limit
-    )
+        posts = await post_query_cache.list_published(skip, limit, tags, game)
+
+    total, total_is_estimate = await post_service.count_posts(author_id, tags, game)
 
+    return list_response(posts, total, total_is_estimate, skip, limit)
 
-@router.get("/search/", response_model=PostListResponse)
+
+@router.get("/search/", response_model=PostListResponse, dependencies=[Depends(admit("search"))])
 async def search_posts(
     q: str = Query(..., min_length=1),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     post_service: PostService = Depends(get_post_service)
 ):
-    posts = await post_service.post_repo.search(q, skip, limit)
-
-    # Преобразуем посты в ответы
-    post_responses = [post_to_response(post) for post in posts]
+    posts = await post_query_cache.search(q, skip, limit)
+    total, total_is_estimate = await post_service.count_search(q)
 
-    return PostListResponse(
-        posts=post_responses,
-        total=len(post_responses),
-        page=skip // limit + 1,
-        size=limit
-    )
\ No newline at end of file
+    # Оценка не может быть меньше того, что уже отдано
+    return list_response(posts, max(total, skip + len(posts)), total_is_estimate, skip, limit)
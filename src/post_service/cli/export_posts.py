@@ -0,0 +1,54 @@
+"""Потоковая выгрузка постов в NDJSON.
+
+Пример:
+    python -m src.post_service.cli.export_posts posts.ndjson --status published
+    python -m src.post_service.cli.export_posts - --updated-since 2024-01-01T00:00:00+00:00 | gzip > posts.ndjson.gz
+"""
+import argparse
+import asyncio
+import logging
+import sys
+from datetime import datetime
+
+from ..core.db import close_db
+from ..core.logging import init_logging
+from ..domain.bulk_export import export_posts_ndjson
+
+logger = logging.getLogger(__name__)
+
+
+async def main(args: argparse.Namespace) -> int:
+    output = sys.stdout.buffer if args.path == "-" else open(args.path, "wb")
+    try:
+        async for chunk in export_posts_ndjson(
+            status=args.status,
+            author_id=args.author_id,
+            game=args.game,
+            updated_since=args.updated_since,
+            include_deleted=args.include_deleted,
+            batch_size=args.batch_size,
+        ):
+            output.write(chunk)
+    finally:
+        output.flush()
+        if output is not sys.stdout.buffer:
+            output.close()
+        await close_db()
+    return 0
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Export posts as NDJSON")
+    parser.add_argument("path", help="output file, '-' for stdout")
+    parser.add_argument("--status", default=None)
+    parser.add_argument("--author-id", default=None)
+    parser.add_argument("--game", default=None)
+    parser.add_argument("--updated-since", type=datetime.fromisoformat, default=None)
+    parser.add_argument("--include-deleted", action="store_true")
+    parser.add_argument("--batch-size", type=int, default=None, help="server-side cursor fetch size")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    init_logging()
+    sys.exit(asyncio.run(main(parse_args())))
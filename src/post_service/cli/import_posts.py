@@ -0,0 +1,60 @@
+"""Массовый импорт постов из NDJSON-файла.
+
+Пример:
+    python -m src.post_service.cli.import_posts legacy_posts.ndjson --chunk-size 1000
+    cat legacy_posts.ndjson | python -m src.post_service.cli.import_posts -
+"""
+import argparse
+import asyncio
+import logging
+import sys
+from typing import AsyncIterator
+
+from ..core.db import close_db
+from ..core.logging import init_logging
+from ..domain.bulk_import import MAX_CHUNK_SIZE, PostImporter
+from ..mq.publisher import EventPublisher
+
+logger = logging.getLogger(__name__)
+
+
+async def read_lines(path: str) -> AsyncIterator[str]:
+    stream = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        for line in stream:
+            yield line
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+async def main(args: argparse.Namespace) -> int:
+    publisher = None
+    if not args.no_events:
+        publisher = EventPublisher()
+        await publisher.connect()
+
+    try:
+        result = await PostImporter(publisher, args.chunk_size).run(read_lines(args.path))
+    finally:
+        if publisher:
+            await publisher.close()
+        await close_db()
+
+    for line, error in result.errors:
+        logger.warning(f"line {line}: {error}")
+    logger.info(f"imported={result.imported} skipped={result.skipped} failed={result.failed}")
+    return 1 if result.failed else 0
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Bulk import posts from NDJSON")
+    parser.add_argument("path", help="NDJSON file, '-' for stdin")
+    parser.add_argument("--chunk-size", type=int, default=None, help=f"rows per INSERT (clamped to {MAX_CHUNK_SIZE})")
+    parser.add_argument("--no-events", action="store_true", help="do not publish PostCreatedEvent")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    init_logging()
+    sys.exit(asyncio.run(main(parse_args())))
@@ -0,0 +1,129 @@
+"""Повторная обработка сообщений из DLQ (posts_events_dlq).
+
+Сообщения забираются пачками и возвращаются в posts_events (через default exchange,
+другие подписчики blog_events их повторно не получат) с исходным routing key и
+сброшенным счетчиком повторов. Дальше их обрабатывает обычный consumer - параллельно
+и с пакетной записью счетчиков. Сообщение удаляется из DLQ только после подтверждения
+брокером публикации в posts_events.
+
+Пример:
+    # Посмотреть, что лежит в DLQ, ничего не меняя
+    python -m src.post_service.cli.replay_dead_letters --dry-run
+
+    # Вернуть до 10000 сообщений, не быстрее 200 в секунду
+    python -m src.post_service.cli.replay_dead_letters --limit 10000 --rate 200
+"""
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from collections import Counter
+from typing import List
+
+import aio_pika
+from aio_pika.abc import AbstractChannel, AbstractIncomingMessage, AbstractQueue
+
+from ..core.config import settings
+from ..core.logging import init_logging
+from ..mq.topology import (
+    EVENTS_QUEUE, ORIGINAL_ROUTING_KEY_HEADER, RETRY_COUNT_HEADER, declare_dead_letters, original_routing_key,
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def fetch_batch(queue: AbstractQueue, size: int) -> List[AbstractIncomingMessage]:
+    messages = []
+    while len(messages) < size:
+        message = await queue.get(no_ack=False, fail=False)
+        if message is None:
+            break
+        messages.append(message)
+    return messages
+
+
+def replay_message(message: AbstractIncomingMessage) -> aio_pika.Message:
+    headers = dict(message.headers or {})
+    headers[ORIGINAL_ROUTING_KEY_HEADER] = original_routing_key(message)
+    headers.pop(RETRY_COUNT_HEADER, None)
+    headers.pop("x-death", None)
+    return aio_pika.Message(
+        body=message.body,
+        content_type=message.content_type,
+        type=message.type,
+        message_id=message.message_id,
+        timestamp=message.timestamp,
+        headers=headers,
+        delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+    )
+
+
+async def replay(channel: AbstractChannel, queue: AbstractQueue, limit: int, batch_size: int,
+                 rate: float, dry_run: bool) -> Counter:
+    replayed = Counter()
+    held = []  # В dry-run сообщения держатся неподтвержденными до конца, чтобы не читать их повторно
+
+    try:
+        while limit <= 0 or sum(replayed.values()) < limit:
+            started = time.monotonic()
+            size = batch_size if limit <= 0 else min(batch_size, limit - sum(replayed.values()))
+            batch = await fetch_batch(queue, size)
+            if not batch:
+                break
+
+            for message in batch:
+                replayed[original_routing_key(message) or "unknown"] += 1
+
+            if dry_run:
+                held.extend(batch)
+                continue
+
+            await asyncio.gather(*(
+                channel.default_exchange.publish(replay_message(message), routing_key=EVENTS_QUEUE)
+                for message in batch
+            ))
+            for message in batch:
+                await message.ack()
+            logger.info("Replayed %d messages (%d total)", len(batch), sum(replayed.values()))
+
+            # Ограничение скорости: пачка из batch_size сообщений не чаще, чем раз в batch_size / rate секунд
+            if rate > 0:
+                await asyncio.sleep(max(0.0, len(batch) / rate - (time.monotonic() - started)))
+    finally:
+        for message in held:
+            await message.nack(requeue=True)
+
+    return replayed
+
+
+async def main(args: argparse.Namespace) -> int:
+    connection = await aio_pika.connect_robust(settings.RABBITMQ_URL)
+    try:
+        channel = await connection.channel(publisher_confirms=True)
+        await channel.set_qos(prefetch_count=args.batch_size)
+        queue = await declare_dead_letters(channel)
+
+        replayed = await replay(channel, queue, args.limit, args.batch_size, args.rate, args.dry_run)
+    finally:
+        await connection.close()
+
+    action = "would replay" if args.dry_run else "replayed"
+    for routing_key, count in replayed.most_common():
+        logger.info(f"{routing_key}: {count}")
+    logger.info(f"{action} {sum(replayed.values())} messages")
+    return 0
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Replay dead-lettered events back to posts_events")
+    parser.add_argument("--limit", type=int, default=0, help="max messages to replay, 0 - whole queue")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--rate", type=float, default=100.0, help="messages per second, 0 - unlimited")
+    parser.add_argument("--dry-run", action="store_true", help="only count messages by routing key")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    init_logging()
+    sys.exit(asyncio.run(main(parse_args())))
@@ -0,0 +1,123 @@
+"""Admission control для дорогих эндпоинтов.
+
+Дорогие запросы (списки, поиск) разбиты на классы, у каждого свой лимит одновременных
+запросов на воркер и очередь с дедлайном. Дешевые чтения (GET /posts/{id}, /stats, /suggest)
+не ограничиваются: под них остается DB_POOL_SIZE + DB_MAX_OVERFLOW минус сумма лимитов классов,
+и скан на limit=1000 не может занять весь пул. Если очередь класса полна или слот не освободился
+за ADMISSION_QUEUE_TIMEOUT_MS, запрос сразу получает 503 с Retry-After, не дожидаясь пула.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict
+
+from fastapi import HTTPException, status
+
+from .config import settings
+from .metrics import ADMISSION_IN_FLIGHT, ADMISSION_LIMIT, ADMISSION_QUEUED, ADMISSION_REJECTED, ADMISSION_WAIT
+
+logger = logging.getLogger(__name__)
+
+
+class OverloadedError(Exception):
+    pass
+
+
+class ConcurrencyLimiter:
+    """Не больше limit одновременных владельцев слота, до max_queue ждущих в порядке прихода"""
+
+    def __init__(self, name: str, limit: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self):
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise OverloadedError("queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._discard(waiter)
+            raise OverloadedError("timeout")
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Слот уже передан, но запрос отменен - возвращаем слот следующему
+                self.release()
+            else:
+                self._discard(waiter)
+            raise
+
+    def release(self):
+        # Слот передается первому ждущему напрямую, active не меняется
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def _discard(self, waiter: asyncio.Future):
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+
+def _build_limiters() -> Dict[str, ConcurrencyLimiter]:
+    limiters = {
+        name: ConcurrencyLimiter(name, limit, settings.ADMISSION_MAX_QUEUE, settings.ADMISSION_QUEUE_TIMEOUT_MS / 1000)
+        for name, limit in settings.ADMISSION_LIMITS.items()
+    }
+    reserved = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW - sum(settings.ADMISSION_LIMITS.values())
+    if reserved <= 0:
+        logger.warning(f"Admission limits {settings.ADMISSION_LIMITS} leave no DB connections for cheap reads")
+    return limiters
+
+
+limiters = _build_limiters()
+
+ADMISSION_LIMIT.set_callback(lambda: {(name,): limiter.limit for name, limiter in limiters.items()})
+ADMISSION_IN_FLIGHT.set_callback(lambda: {(name,): limiter.active for name, limiter in limiters.items()})
+ADMISSION_QUEUED.set_callback(lambda: {(name,): limiter.queued for name, limiter in limiters.items()})
+
+
+def admit(class_name: str):
+    """Зависимость маршрута: слот класса class_name на время обработки запроса"""
+    limiter = limiters[class_name]
+
+    async def dependency():
+        if not settings.ADMISSION_CONTROL_ENABLED:
+            yield
+            return
+
+        start = time.perf_counter()
+        try:
+            await limiter.acquire()
+        except OverloadedError as e:
+            ADMISSION_REJECTED.inc(class_name, str(e))
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Service is overloaded, retry later",
+                headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER_SECONDS)},
+            )
+        ADMISSION_WAIT.observe(time.perf_counter() - start, class_name)
+        try:
+            yield
+        finally:
+            limiter.release()
+
+    return dependency
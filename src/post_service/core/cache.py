@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """Простой in-process кэш с TTL и ограничением размера (вытесняются самые старые записи)"""
+
+    def __init__(self, ttl_seconds: float, maxsize: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.maxsize = maxsize
+        self._data: Dict[Hashable, Tuple[float, Any]] = {}
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return default
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            self._data.pop(key, None)
+            return default
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        self._data.pop(key, None)
+        if len(self._data) >= self.maxsize:
+            self._data.pop(next(iter(self._data)))
+        self._data[key] = (time.monotonic() + (ttl_seconds or self.ttl_seconds), value)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.pop(key, None)
+        return default if item is None else item[1]
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class LRUSet:
+    """Множество ограниченного размера: при переполнении вытесняются давно не встречавшиеся ключи"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, None]" = OrderedDict()
+
+    def add(self, key: Hashable):
+        self._data[key] = None
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def __contains__(self, key: Hashable) -> bool:
+        if key in self._data:
+            self._data.move_to_end(key)
+            return True
+        return False
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class RefreshingCache:
+    """Кэш результатов асинхронных загрузок с инвалидацией поколением и защитой от stampede.
+
+    - Ключи включают поколение: invalidate() увеличивает его, и все прежние записи
+      становятся недостижимыми сразу, без обхода (они вытесняются по TTL и размеру).
+    - Одновременные промахи по одному ключу ждут одну загрузку.
+    - После доли refresh_ahead от TTL запись еще отдается, а первый запрос запускает
+      обновление в фоне - к истечению TTL значение уже свежее и запросы не ждут БД.
+    """
+
+    def __init__(self, ttl_seconds: float, refresh_ahead: float = 0.8, maxsize: int = 10000,
+                 on_lookup: Optional[Callable[[Hashable, str], None]] = None):
+        self.ttl_seconds = ttl_seconds
+        self.refresh_ahead = refresh_ahead
+        self.generation = 0
+        self._entries = TTLCache(ttl_seconds, maxsize)  # ключ -> (refresh_at, value)
+        self._loading: Dict[Hashable, asyncio.Task] = {}
+        self._on_lookup = on_lookup or (lambda key, result: None)  # Для метрик: hit, stale, miss, coalesced
+
+    def invalidate(self):
+        self.generation += 1
+
+    async def get(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        lookup_key = key
+        key = (self.generation, key)
+        entry = self._entries.get(key)
+        if entry is not None:
+            refresh_at, value = entry
+            if refresh_at <= time.monotonic() and key not in self._loading:
+                self._on_lookup(lookup_key, "stale")
+                self._load(key, loader)
+            else:
+                self._on_lookup(lookup_key, "hit")
+            return value
+
+        task = self._loading.get(key)
+        self._on_lookup(lookup_key, "coalesced" if task else "miss")
+        if task is None:
+            task = self._load(key, loader)
+        # shield: отмена одного запроса не должна отменять загрузку, которую ждут другие
+        return await asyncio.shield(task)
+
+    def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        task = asyncio.create_task(self._run_loader(key, loader))
+        task.add_done_callback(self._log_failure)
+        self._loading[key] = task
+        return task
+
+    @staticmethod
+    def _log_failure(task: asyncio.Task):
+        # Ошибку фонового обновления никто не ждет - без этого asyncio пишет "exception was never retrieved"
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Cache load failed: %s", task.exception())
+
+    async def _run_loader(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await loader()
+            self._entries.set(key, (time.monotonic() + self.ttl_seconds * self.refresh_ahead, value))
+            return value
+        finally:
+            self._loading.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,7 +1,11 @@
-from sqlalchemy import text
+import asyncio
+from typing import Callable
+from sqlalchemy import event, text
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
-from sqlalchemy.orm import declarative_base
+from sqlalchemy.orm import Session, declarative_base
 from .config import settings
+from .metrics import DB_POOL_CONNECTIONS
+from .sql_instrumentation import install_sql_instrumentation
 import logging
 
 logger = logging.getLogger(__name__)
@@ -11,10 +15,21 @@ engine = create_async_engine(
     settings.DATABASE_URL,
     echo=settings.DEBUG,
     pool_pre_ping=True,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
     pool_recycle=300,
     future=True
 )
 
+install_sql_instrumentation(engine)
+
+DB_POOL_CONNECTIONS.set_callback(lambda: {
+    ("size",): engine.pool.size(),
+    ("checked_out",): engine.pool.checkedout(),
+    ("checked_in",): engine.pool.checkedin(),
+    ("overflow",): engine.pool.overflow(),
+})
+
 # Async session factory
 AsyncSessionLocal = async_sessionmaker(
     engine,
@@ -24,6 +39,32 @@ AsyncSessionLocal = async_sessionmaker(
     autocommit=False
 )
 
+_AFTER_COMMIT = "after_commit_callbacks"
+
+
+def after_commit(session: AsyncSession, callback: Callable[[], None]) -> None:
+    """Выполнить callback после коммита транзакции session (при откате он отбрасывается).
+
+    Для побочных эффектов в памяти процесса - сброс кэшей, уведомления: до коммита другие
+    запросы перечитали бы из БД старые данные и снова закэшировали бы их.
+    """
+    session.info.setdefault(_AFTER_COMMIT, []).append(callback)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_after_commit(session: Session):
+    for callback in session.info.pop(_AFTER_COMMIT, []):
+        try:
+            callback()
+        except Exception as e:
+            logger.error(f"After-commit callback failed: {e}")
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_after_commit(session: Session):
+    session.info.pop(_AFTER_COMMIT, None)
+
+
 async def get_db() -> AsyncSession:
     async with AsyncSessionLocal() as session:
         try:
@@ -36,7 +77,11 @@ async def get_db() -> AsyncSession:
             await session.close()
 
 async def run_migrations():
-    """Create database tables from models"""
+    """Create database tables from models.
+
+    Только для разработки и бенчмарков (AUTO_CREATE_SCHEMA): в production схемой
+    управляет отдельный шаг `alembic upgrade head`.
+    """
     try:
         from ..domain.models import Base
         
@@ -54,13 +99,26 @@ async def init_db():
         async with engine.begin() as conn:
             await conn.run_sync(lambda sync_conn: sync_conn.execute(text("SELECT 1")))
         logger.info("Database connection established successfully")
-        
-        # Run migrations after connection is established
-        await run_migrations()
+
+        if settings.AUTO_CREATE_SCHEMA:
+            await run_migrations()
     except Exception as e:
         logger.error(f"Database connection failed: {e}")
         raise
 
+
+async def check_db(timeout: float = 2.0) -> bool:
+    """Проверка доступности БД для readiness"""
+    try:
+        async with asyncio.timeout(timeout):
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+        return True
+    except Exception as e:
+        logger.warning(f"Database health check failed: {e}")
+        return False
+
+
 async def close_db():
     await engine.dispose()
     logger.info("Database connection closed")
\ No newline at end of file
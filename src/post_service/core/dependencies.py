@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import AsyncGenerator, Annotated
+from typing import AsyncGenerator, Annotated, Optional
 
 from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
@@ -8,7 +8,12 @@ from .db import get_db
 from .config import Settings, settings
 from ..domain.repositories import PostRepository
 from ..repo.sql.repositories import SQLAlchemyPostRepository
+from ..repo.sql.read_repository import SQLAlchemyPostReadRepository
+from ..domain.live_hub import LiveHub
 from ..domain.services import PostService
+from ..domain.publish_scheduler import PublishScheduler
+from ..domain.title_suggester import TitleSuggester
+from ..domain.view_aggregator import ViewAggregator
 from ..domain.jwt_service import JWTService
 from ..mq.publisher import EventPublisher
 import logging
@@ -85,6 +90,17 @@ async def get_current_user_id(
     return user_id
 
 
+async def get_optional_user_id(
+    token: Annotated[str, Depends(get_current_token)],
+    settings: Annotated[Settings, Depends(get_settings)],
+) -> Optional[str]:
+    """ID пользователя из JWT токена; None без токена или с недействительным токеном (эндпоинты без авторизации)"""
+    if not token:
+        return None
+    payload = JWTService(settings).verify_access_token(token)
+    return payload.get("sub") if payload else None
+
+
 async def get_user_profile(
     user_id: Annotated[str, Depends(get_current_user_id)],
     token: Annotated[str, Depends(get_current_token)],
@@ -108,25 +124,62 @@ async def get_user_profile(
     }
 
 
+async def get_admin_user(
+    current_user: Annotated[dict, Depends(get_user_profile)],
+    settings: Annotated[Settings, Depends(get_settings)],
+) -> dict:
+    """Текущий пользователь, если он администратор (ADMIN_USER_IDS или роль admin в токене)"""
+    roles = current_user.get("roles") or []
+    is_admin = (
+        current_user["user_id"] in settings.ADMIN_USER_IDS
+        or current_user.get("role") == "admin"
+        or "admin" in roles
+    )
+    if not is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required",
+        )
+    return current_user
+
+
 async def get_post_repository(
     db: AsyncSession = Depends(get_db)
 ) -> AsyncGenerator[PostRepository, None]:
     yield SQLAlchemyPostRepository(db)
 
-async def get_event_publisher() -> AsyncGenerator[EventPublisher, None]:
-    publisher = EventPublisher()
-    try:
-        await publisher.connect()
-        yield publisher
-    finally:
-        await publisher.close()
+async def get_post_read_repository(
+    db: AsyncSession = Depends(get_db)
+) -> AsyncGenerator[SQLAlchemyPostReadRepository, None]:
+    yield SQLAlchemyPostReadRepository(db)
+
+def get_event_publisher(request: Request) -> Optional[EventPublisher]:
+    """Общий publisher приложения (подключается в lifespan), а не новое соединение на каждый запрос"""
+    return getattr(request.app.state, "event_publisher", None)
+
+def get_view_aggregator(request: Request) -> Optional[ViewAggregator]:
+    return getattr(request.app.state, "view_aggregator", None)
+
+def get_title_suggester(request: Request) -> Optional[TitleSuggester]:
+    return getattr(request.app.state, "title_suggester", None)
+
+def get_publish_scheduler(request: Request) -> Optional[PublishScheduler]:
+    return getattr(request.app.state, "publish_scheduler", None)
+
+def get_live_hub(request: Request) -> Optional[LiveHub]:
+    return getattr(request.app.state, "live_hub", None)
+
 
 async def get_post_service(
     post_repo: PostRepository = Depends(get_post_repository),
-    event_publisher: EventPublisher = Depends(get_event_publisher)
+    event_publisher: EventPublisher = Depends(get_event_publisher),
+    view_aggregator: Optional[ViewAggregator] = Depends(get_view_aggregator),
+    title_suggester: Optional[TitleSuggester] = Depends(get_title_suggester),
+    live_hub: Optional[LiveHub] = Depends(get_live_hub)
 ) -> AsyncGenerator[PostService, None]:
-    yield PostService(post_repo, event_publisher)
+    yield PostService(post_repo, event_publisher, view_aggregator, title_suggester, live_hub)
 
 
 SettingsDep = Annotated[Settings, Depends(get_settings)]
+AdminDep = Annotated[dict, Depends(get_admin_user)]
 SessionDep = Annotated[AsyncSession, Depends(get_db)]
\ No newline at end of file
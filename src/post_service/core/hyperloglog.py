@@ -0,0 +1,52 @@
+"""HyperLogLog - оценка количества уникальных элементов в фиксированной памяти.
+
+Точность 2^precision регистров по байту: при precision=12 - 4 КБ и ошибка ~1.6%.
+Скетчи с одинаковой точностью объединяются (merge), поэтому подсчет можно
+вести по окнам и инстансам и складывать у потребителя.
+"""
+import base64
+import hashlib
+import math
+
+
+class HyperLogLog:
+    __slots__ = ("precision", "registers")
+
+    def __init__(self, precision: int = 12, registers: bytearray = None):
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+        self.precision = precision
+        self.registers = registers if registers is not None else bytearray(1 << precision)
+
+    def add(self, value: str):
+        hashed = int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+        index = hashed >> (64 - self.precision)
+        rest = (hashed << self.precision) & 0xFFFFFFFFFFFFFFFF
+        # Позиция первой единицы в оставшихся битах (1-based)
+        rank = 64 - self.precision + 1 if rest == 0 else 65 - rest.bit_length()
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog"):
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge sketches with different precision")
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+
+    def count(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -register for register in self.registers)
+
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Поправка для малых значений - linear counting
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def to_base64(self) -> str:
+        return base64.b64encode(bytes([self.precision]) + bytes(self.registers)).decode()
+
+    @classmethod
+    def from_base64(cls, data: str) -> "HyperLogLog":
+        raw = base64.b64decode(data)
+        return cls(raw[0], bytearray(raw[1:]))
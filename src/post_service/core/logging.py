@@ -1,6 +1,24 @@
+"""Настройка логирования.
+
+Разработка (DEBUG или LOG_FORMAT=rich) - RichHandler прямо в потоке вызова.
+Production - записи складываются в ограниченную очередь, форматирование в JSON и
+запись в stderr выполняет фоновый поток (QueueListener), event loop на I/O не ждет.
+При переполнении очереди записи отбрасываются и считаются в log_records_dropped_total.
+
+В горячих путях используйте ленивое форматирование: logger.debug("Event %s", event_type) -
+строка собирается только если запись прошла уровень и сэмплирование. Частые записи
+(на каждое событие или сообщение) помечаются extra=SAMPLED и сэмплируются с долей LOG_SAMPLE_RATE.
+"""
+import atexit
+import copy
+import json
 import logging
+import queue
+import random
 import sys
-from typing import Any
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Iterable, Optional
 
 # TODO: Использовать common-logging
 # from common_logging import init_logging, get_logger
@@ -8,18 +26,120 @@ from typing import Any
 from rich.console import Console
 from rich.logging import RichHandler
 
+from .config import settings
+from .metrics import LOG_RECORDS_DROPPED
+
+# Стандартные атрибуты LogRecord - все остальное пришло через extra= и попадает в JSON
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+# extra= для частых записей горячих путей: INFO/DEBUG с этой пометкой сэмплируются
+SAMPLED = {"sampled": True}
+
+_listener: Optional[QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна запись - одна строка JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "service": settings.SERVICE_NAME,
+            "pid": record.process,
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Пропускает долю rate записей уровня INFO и ниже, помеченных extra=SAMPLED или от шумных логгеров
+    (access log, куда пометку не добавить); WARNING и выше - всегда"""
+
+    def __init__(self, rate: float, logger_prefixes: Iterable[str]):
+        super().__init__()
+        self.rate = rate
+        self.logger_prefixes = tuple(logger_prefixes)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate >= 1 or record.levelno > logging.INFO:
+            return True
+        if not getattr(record, "sampled", False) and not record.name.startswith(self.logger_prefixes):
+            return True
+        return random.random() < self.rate
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler, который не форматирует запись в потоке вызова и не блокируется на полной очереди"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Как базовый prepare(), сообщение собирается здесь: args могут измениться после вызова.
+        # Но format() (JSON, traceback) остается потоку listener
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+
+def _rich_handler() -> logging.Handler:
+    return RichHandler(console=Console(stderr=True), rich_tracebacks=True)
+
+
+def _stop_listener():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def init_logging(level: Optional[str] = None) -> None:
+    """Initialize logging: Rich в разработке, очередь + JSON в production"""
+    level = level or settings.LOG_LEVEL
+    log_format = settings.LOG_FORMAT
+    if log_format == "auto":
+        log_format = "rich" if settings.DEBUG else "json"
+
+    _stop_listener()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.setLevel(level)
+
+    if log_format == "rich":
+        # TODO: Заменить на common-logging
+        handler = _rich_handler()
+        handler.setFormatter(logging.Formatter("%(message)s", datefmt="[%X]"))
+        root.addHandler(handler)
+        return
+
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(JsonFormatter())
+
+    queue_handler = NonBlockingQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+    queue_handler.addFilter(SamplingFilter(settings.LOG_SAMPLE_RATE, settings.LOG_SAMPLED_LOGGERS))
+    root.addHandler(queue_handler)
 
-def init_logging(level: str = "INFO") -> None:
-    """Initialize logging with Rich handler"""
-    # TODO: Заменить на common-logging
-    logging.basicConfig(
-        level=level,
-        format="%(message)s",
-        datefmt="[%X]",
-        handlers=[RichHandler(console=Console(stderr=True), rich_tracebacks=True)],
-    )
+    global _listener
+    _listener = QueueListener(queue_handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_stop_listener)
 
 
 def get_logger(name: str) -> logging.Logger:
     """Get logger instance"""
-    return logging.getLogger(name)
\ No newline at end of file
+    return logging.getLogger(name)
@@ -0,0 +1,438 @@
+"""Метрики в текстовом формате Prometheus без внешних зависимостей.
+
+Коллекторы рассчитаны на горячий путь: observe() - это bisect по границам
+бакетов и несколько сложений в словаре, без блокировок (event loop однопоточный).
+Реестр у каждого воркера свой; все серии помечены label worker (pid), а /metrics любого воркера
+отдает и снимки остальных воркеров экземпляра (WorkerMetricsExporter).
+"""
+import asyncio
+import functools
+import inspect
+import json
+import logging
+import os
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Отсчет для метрик старта: момент импорта модуля, то есть начало загрузки приложения
+PROCESS_STARTED_AT = time.perf_counter()
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(labelnames: Tuple[str, ...], labelvalues: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def collect(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+            *self.collect(),
+        ]
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labelvalues: str, amount: float = 1):
+        self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def collect(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in list(self._values.items())
+        ]
+
+
+class Gauge(_Metric):
+    """Gauge; если задан callback, значения читаются из него в момент сбора"""
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 callback: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._callback = callback
+
+    def set(self, value: float, *labelvalues: str):
+        self._values[labelvalues] = value
+
+    def inc(self, *labelvalues: str, amount: float = 1):
+        self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def dec(self, *labelvalues: str, amount: float = 1):
+        self.inc(*labelvalues, amount=-amount)
+
+    def set_callback(self, callback: Callable[[], Dict[Tuple[str, ...], float]]):
+        self._callback = callback
+
+    def collect(self) -> List[str]:
+        values = dict(self._values)
+        if self._callback:
+            try:
+                values.update(self._callback())
+            except Exception:
+                pass
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in values.items()
+        ]
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [счетчики по бакетам (последний - +Inf), сумма]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labelvalues: str):
+        series = self._series.get(labelvalues)
+        if series is None:
+            series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def time(self, *labelvalues: str) -> "_Timer":
+        return _Timer(self, labelvalues)
+
+    def collect(self) -> List[str]:
+        lines = []
+        for labels, (counts, total) in list(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("histogram", "labelvalues", "start")
+
+    def __init__(self, histogram: Histogram, labelvalues: Tuple[str, ...]):
+        self.histogram = histogram
+        self.labelvalues = labelvalues
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labelvalues)
+        return False
+
+
+def _with_label(sample: str, label: str) -> str:
+    """Добавляет label к строке значения: имя метрики не содержит ни "{", ни пробела"""
+    end = min(i for i in (sample.find("{"), sample.find(" ")) if i != -1)
+    if sample[end] == "{":
+        return f"{sample[:end + 1]}{label},{sample[end + 1:]}"
+    return f"{sample[:end]}{{{label}}}{sample[end:]}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self.worker_label = f'worker="{os.getpid()}"'
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def samples(self) -> Dict[str, List[str]]:
+        """Строки значений этого воркера по именам метрик"""
+        return {
+            name: [_with_label(sample, self.worker_label) for sample in metric.collect()]
+            for name, metric in self._metrics.items()
+        }
+
+    def render(self, other_workers: Iterable[Dict[str, List[str]]] = ()) -> str:
+        """Текст для /metrics: значения этого воркера и снимки других (other_workers - результаты samples())"""
+        other_workers = list(other_workers)
+        lines = []
+        for name, samples in self.samples().items():
+            metric = self._metrics[name]
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.type_name}")
+            lines.extend(samples)
+            for snapshot in other_workers:
+                lines.extend(snapshot.get(name, ()))
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+class WorkerMetricsExporter:
+    """Периодический снимок метрик воркера в общий каталог экземпляра ({pid}.json).
+
+    Скрейп попадает в случайный воркер общего сокета; этот воркер добавляет к своим значениям
+    снимки остальных, поэтому каждый скрейп видит все воркеры. Снимки отстают не больше чем на interval.
+    """
+
+    def __init__(self, directory: str, interval: float, metrics_registry: MetricsRegistry = registry):
+        self.directory = directory
+        self.interval = interval
+        self.registry = metrics_registry
+        self.path = os.path.join(directory, f"{os.getpid()}.json")
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self._write, self.registry.samples())
+            except Exception as e:
+                logger.warning(f"Failed to write metrics snapshot: {e}")
+            await asyncio.sleep(self.interval)
+
+    def _write(self, samples: Dict[str, List[str]]):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(samples, f)
+        os.replace(tmp_path, self.path)
+
+    async def other_workers(self) -> List[Dict[str, List[str]]]:
+        if self._task is None:
+            return []
+        return await asyncio.to_thread(self._read_other_workers)
+
+    def _read_other_workers(self) -> List[Dict[str, List[str]]]:
+        snapshots = []
+        stale_before = time.time() - 3 * self.interval
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if not name.endswith(".json") or path == self.path:
+                continue
+            try:
+                if os.path.getmtime(path) < stale_before:
+                    # Воркер завершился без stop (kill -9): его значения больше не обновляются
+                    os.remove(path)
+                    continue
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+
+def instrument_methods(histogram: Histogram):
+    """Декоратор класса: оборачивает все публичные корутины и асинхронные генераторы класса
+    замером в histogram (label - имя метода)"""
+    def decorator(cls):
+        for name, method in list(vars(cls).items()):
+            if name.startswith("_"):
+                continue
+            if inspect.iscoroutinefunction(method):
+                setattr(cls, name, _timed_method(histogram, name, method))
+            elif inspect.isasyncgenfunction(method):
+                setattr(cls, name, _timed_generator(histogram, name, method))
+        return cls
+    return decorator
+
+
+def _timed_method(histogram: Histogram, name: str, method):
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - start, name)
+    return wrapper
+
+
+def _timed_generator(histogram: Histogram, name: str, method):
+    """Время внутри генератора (ожидание очередной пачки), без обработки пачек потребителем"""
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        generator = method(*args, **kwargs)
+        elapsed = 0.0
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = await generator.__anext__()
+                except StopAsyncIteration:
+                    break
+                finally:
+                    elapsed += time.perf_counter() - start
+                yield item
+        finally:
+            await generator.aclose()
+            histogram.observe(elapsed, name)
+    return wrapper
+
+
+# Метрики сервиса
+HTTP_REQUEST_DURATION = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route",
+    ("method", "route", "status"),
+))
+DB_REPOSITORY_DURATION = registry.register(Histogram(
+    "db_repository_duration_seconds", "SQLAlchemyPostRepository method latency", ("method",),
+))
+DB_STATEMENT_DURATION = registry.register(Histogram(
+    "db_statement_duration_seconds", "Duration of individual SQL statements",
+))
+DB_POOL_CONNECTIONS = registry.register(Gauge(
+    "db_pool_connections", "Database pool connections by state", ("state",),
+))
+AMQP_PUBLISH_DURATION = registry.register(Histogram(
+    "amqp_publish_duration_seconds", "EventPublisher publish latency", ("event_type",),
+))
+CONSUMER_HANDLER_DURATION = registry.register(Histogram(
+    "consumer_handler_duration_seconds", "Event consumer handler latency", ("event_type", "outcome"),
+))
+CONSUMER_IN_FLIGHT = registry.register(Gauge(
+    "consumer_in_flight_messages", "Messages currently being processed by the consumer",
+))
+CONSUMER_QUEUE_DEPTH = registry.register(Gauge(
+    "consumer_queue_depth", "Messages waiting in the consumer queue", ("queue",),
+))
+EVENT_LOOP_LAG = registry.register(Histogram(
+    "event_loop_lag_seconds", "Delay of event loop wakeups relative to schedule",
+))
+SLOW_REQUESTS = registry.register(Counter(
+    "slow_requests_total", "Requests that exceeded SLOW_REQUEST_CAPTURE_MS",
+))
+STARTUP_DURATION = registry.register(Gauge(
+    "startup_duration_seconds", "Time from application import to the end of lifespan startup",
+))
+TIME_TO_FIRST_REQUEST = registry.register(Gauge(
+    "time_to_first_request_seconds", "Time from application import to the first served request",
+))
+LOG_RECORDS_DROPPED = registry.register(Counter(
+    "log_records_dropped_total", "Log records dropped because the logging queue was full",
+))
+VIEWS_AGGREGATED = registry.register(Counter(
+    "post_views_aggregated_total", "Post views written to the database by the view aggregator",
+))
+VIEWS_PENDING_POSTS = registry.register(Gauge(
+    "post_views_pending_posts", "Posts with views waiting for the next aggregation flush",
+))
+STATS_BATCH_SIZE = registry.register(Histogram(
+    "stats_batch_size", "Counter updates written per stats batch",
+    buckets=(1, 5, 10, 25, 50, 100, 200, 500, 1000),
+))
+CONSUMER_DUPLICATES = registry.register(Counter(
+    "consumer_duplicate_messages_total", "Messages skipped because their message_id was already processed",
+))
+CONSUMER_RETRIES = registry.register(Counter(
+    "consumer_retried_messages_total", "Messages sent to a retry queue after a handler error", ("event_type",),
+))
+CONSUMER_DEAD_LETTERED = registry.register(Counter(
+    "consumer_dead_lettered_messages_total", "Messages rejected to the dead letter queue", ("event_type",),
+))
+TITLE_SUGGEST_ENTRIES = registry.register(Gauge(
+    "title_suggest_entries", "Post titles held in memory for /posts/suggest",
+))
+TITLE_SUGGEST_DB_FALLBACKS = registry.register(Counter(
+    "title_suggest_db_fallbacks_total", "Title suggestions answered from the database instead of memory",
+))
+QUERY_CACHE_REQUESTS = registry.register(Counter(
+    "query_cache_requests_total", "Query result cache lookups by result (hit, stale, miss, coalesced)",
+    ("query", "result"),
+))
+POST_CACHE_REQUESTS = registry.register(Counter(
+    "post_cache_requests_total", "Single-post cache lookups during list hydration by result (hit, miss)",
+    ("result",),
+))
+ADMISSION_LIMIT = registry.register(Gauge(
+    "admission_limit", "Concurrent requests allowed per admission class", ("class",),
+))
+ADMISSION_IN_FLIGHT = registry.register(Gauge(
+    "admission_in_flight", "Requests holding an admission slot", ("class",),
+))
+ADMISSION_QUEUED = registry.register(Gauge(
+    "admission_queued", "Requests waiting for an admission slot", ("class",),
+))
+ADMISSION_WAIT = registry.register(Histogram(
+    "admission_wait_seconds", "Time spent waiting for an admission slot", ("class",),
+))
+ADMISSION_REJECTED = registry.register(Counter(
+    "admission_rejected_total", "Requests shed with 503 by reason (queue_full, timeout)", ("class", "reason"),
+))
+SCHEDULED_PUBLISH_LAG = registry.register(Histogram(
+    "scheduled_publish_lag_seconds", "Delay between scheduled_at and the actual publication",
+))
+SCHEDULED_POSTS_PUBLISHED = registry.register(Counter(
+    "scheduled_posts_published_total", "Posts published by the scheduler",
+))
+POSTS_ARCHIVED = registry.register(Counter(
+    "posts_archived_total", "Deleted posts moved from posts to posts_archive",
+))
+COUNTER_DRIFT = registry.register(Counter(
+    "counter_drift_total", "Absolute drift corrected by reconciliation of maintained counters", ("kind",),
+))
+LIVE_SUBSCRIBERS = registry.register(Gauge(
+    "live_subscribers", "Open /posts/{id}/live streams in this worker",
+))
+LIVE_TOPICS = registry.register(Gauge(
+    "live_topics", "Posts with at least one live subscriber in this worker",
+))
+LIVE_UPDATES_SENT = registry.register(Counter(
+    "live_updates_sent_total", "Counter updates pushed to live subscribers",
+))
+LIVE_REJECTED = registry.register(Counter(
+    "live_rejected_total", "Live streams refused because LIVE_MAX_SUBSCRIBERS was reached",
+))
+WARMUP_DURATION = registry.register(Gauge(
+    "warmup_duration_seconds", "Time spent warming caches at startup",
+))
+WARMUP_QUERIES = registry.register(Gauge(
+    "warmup_queries_loaded", "Queries loaded into caches during startup warm-up",
+))
@@ -0,0 +1,46 @@
+import fcntl
+import logging
+import os
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ProcessLock:
+    """Неблокирующий межпроцессный лок на файле (flock).
+
+    Используется для выбора одного воркера экземпляра под фоновую работу (consumer).
+    Лок снимается ядром при завершении процесса, поэтому после падения или
+    перезапуска воркера его подхватывает следующий.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: Optional[int] = None
+
+    @property
+    def acquired(self) -> bool:
+        return self._fd is not None
+
+    def try_acquire(self) -> bool:
+        if self._fd is not None:
+            return True
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is None:
+            return
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+        self._fd = None
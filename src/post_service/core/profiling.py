@@ -0,0 +1,174 @@
+"""Диагностика event loop: семплирующий профайлер, монитор блокировок loop и захват стека медленных запросов.
+
+Формат профайлера - collapsed stacks ("module:func;module:func count"),
+его понимают flamegraph.pl, speedscope и inferno.
+"""
+import asyncio
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+from types import FrameType
+from typing import List, Optional
+
+from .config import settings
+from .metrics import EVENT_LOOP_LAG, SLOW_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", code.co_filename)
+    return f"{module}:{code.co_name}"
+
+
+def collapse_frame(frame: Optional[FrameType]) -> str:
+    """Стек потока в одну строку от корня к листу"""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+def format_frames(frames: List[FrameType]) -> str:
+    return "\n".join(
+        f'  File "{frame.f_code.co_filename}", line {frame.f_lineno}, in {frame.f_code.co_name}'
+        for frame in frames
+    )
+
+
+def thread_frames(thread_id: int) -> List[FrameType]:
+    frame = sys._current_frames().get(thread_id)
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    return list(reversed(frames))
+
+
+def coroutine_frames(task: asyncio.Task) -> List[FrameType]:
+    """Цепочка await задачи. task.get_stack() для приостановленной корутины отдает только верхний кадр"""
+    frames = []
+    awaitable = task.get_coro()
+    while awaitable is not None:
+        frame = (getattr(awaitable, "cr_frame", None) or getattr(awaitable, "ag_frame", None)
+                 or getattr(awaitable, "gi_frame", None))
+        if frame is not None:
+            frames.append(frame)
+        awaitable = (getattr(awaitable, "cr_await", None) or getattr(awaitable, "ag_await", None)
+                     or getattr(awaitable, "gi_yieldfrom", None))
+    return frames
+
+
+class StackSampler:
+    """Семплирует стек потока event loop из фонового потока с заданным интервалом"""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+
+    def sample(self, seconds: float) -> Counter:
+        stacks = Counter()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                stacks[collapse_frame(frame)] += 1
+            time.sleep(self.interval)
+        return stacks
+
+    @staticmethod
+    def render(stacks: Counter) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+_profile_lock = asyncio.Lock()
+
+
+class ProfilerBusyError(Exception):
+    pass
+
+
+async def profile_event_loop(seconds: float, interval: float) -> str:
+    """Профилирует поток текущего event loop seconds секунд, возвращает collapsed stacks"""
+    if _profile_lock.locked():
+        raise ProfilerBusyError("Profiler is already running")
+
+    async with _profile_lock:
+        sampler = StackSampler(threading.get_ident(), interval)
+        stacks = await asyncio.to_thread(sampler.sample, seconds)
+
+    return StackSampler.render(stacks)
+
+
+class LoopLagMonitor:
+    """Измеряет задержку event loop и ловит блокировки.
+
+    Корутина в loop спит interval и измеряет, насколько позже проснулась.
+    Сторожевой поток смотрит на время последнего пробуждения: если loop не
+    просыпался дольше порога, он снимает стек потока loop - это и есть код,
+    который держит loop.
+    """
+
+    def __init__(self, interval: float = None, blocked_threshold: float = None):
+        self.interval = interval or settings.LOOP_LAG_INTERVAL_MS / 1000
+        self.blocked_threshold = blocked_threshold or settings.LOOP_BLOCKED_THRESHOLD_MS / 1000
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._task = asyncio.create_task(self._measure())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self):
+        self._stopped.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _measure(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - started - self.interval)
+            self._heartbeat = time.monotonic()
+
+            EVENT_LOOP_LAG.observe(lag)
+            if lag >= self.blocked_threshold:
+                logger.warning(f"Event loop was blocked for {lag * 1000:.0f} ms")
+
+    def _watch(self):
+        reported_heartbeat = None
+        while not self._stopped.wait(self.interval):
+            heartbeat = self._heartbeat
+            blocked_for = time.monotonic() - heartbeat - self.interval
+            # Один стек на одну блокировку
+            if blocked_for < self.blocked_threshold or heartbeat == reported_heartbeat:
+                continue
+            reported_heartbeat = heartbeat
+            logger.warning(
+                f"Event loop blocked for more than {blocked_for * 1000:.0f} ms, loop thread stack:\n"
+                f"{format_frames(thread_frames(self._loop_thread_id))}"
+            )
+
+
+def capture_slow_request(task: asyncio.Task, description: str, threshold: float):
+    """Вызывается через loop.call_later, если запрос не завершился за threshold секунд"""
+    SLOW_REQUESTS.inc()
+    logger.warning(
+        f"Slow request {description}: still running after {threshold * 1000:.0f} ms, awaiting:\n"
+        f"{format_frames(coroutine_frames(task))}"
+    )
@@ -0,0 +1,154 @@
+"""Учет SQL-запросов в рамках HTTP-запроса: количество, суммарное время, самый медленный.
+
+Статистика хранится в contextvar и заполняется обработчиками событий
+SQLAlchemy (before/after_cursor_execute). SQLAlchemy переносит контекст
+в greenlet, где выполняется драйвер, поэтому запрос видит свои SQL.
+"""
+import logging
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from .config import settings
+from .metrics import DB_STATEMENT_DURATION
+
+logger = logging.getLogger(__name__)
+
+_STATEMENT_PREVIEW_LENGTH = 300
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    total_time: float = 0.0
+    slowest_time: float = 0.0
+    slowest_statement: Optional[str] = None
+    statements: List[str] = field(default_factory=list)  # Заполняется только при keep_statements
+    keep_statements: bool = False
+
+    def record(self, statement: str, elapsed: float):
+        self.count += 1
+        self.total_time += elapsed
+        if elapsed > self.slowest_time:
+            self.slowest_time = elapsed
+            self.slowest_statement = statement
+        if self.keep_statements:
+            self.statements.append(statement)
+
+    def server_timing(self) -> str:
+        return (
+            f'db;dur={self.total_time * 1000:.1f};desc="{self.count} queries", '
+            f'db-slowest;dur={self.slowest_time * 1000:.1f}'
+        )
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _current_stats.get()
+
+
+@contextmanager
+def track_queries(keep_statements: bool = False) -> Iterator[QueryStats]:
+    stats = QueryStats(keep_statements=keep_statements)
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def statement_preview(statement: str) -> str:
+    statement = " ".join(statement.split())
+    return statement[:_STATEMENT_PREVIEW_LENGTH]
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+    DB_STATEMENT_DURATION.observe(elapsed)
+
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+
+    if elapsed * 1000 >= settings.SLOW_QUERY_MS:
+        logger.warning(f"Slow query ({elapsed * 1000:.1f} ms): {statement_preview(statement)}")
+
+
+def _handle_error(exception_context):
+    # after_cursor_execute не вызывается при ошибке - снимаем замер, чтобы стек не рос
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_start_time"):
+        connection.info["query_start_time"].pop()
+
+
+def install_sql_instrumentation(engine: AsyncEngine):
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+def log_query_budget(stats: QueryStats, route: str):
+    """Логирует запрос, превысивший лимит количества SQL или суммарного времени в БД"""
+    over_count = stats.count > settings.REQUEST_QUERY_BUDGET
+    over_time = stats.total_time * 1000 > settings.REQUEST_DB_TIME_BUDGET_MS
+    if not (over_count or over_time):
+        return
+
+    logger.warning(
+        f"Query budget exceeded for {route}: {stats.count} queries, "
+        f"{stats.total_time * 1000:.1f} ms in DB, slowest {stats.slowest_time * 1000:.1f} ms: "
+        f"{statement_preview(stats.slowest_statement or '')}"
+    )
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def assert_max_queries(max_queries: int) -> Iterator[QueryStats]:
+    """Хелпер для тестов: падает, если внутри блока выполнено больше max_queries SQL.
+
+        with assert_max_queries(2):
+            await post_service.view_post(post_id)
+    """
+    with track_queries(keep_statements=True) as stats:
+        yield stats
+
+    if stats.count > max_queries:
+        statements = "\n".join(f"  {i}. {statement_preview(s)}" for i, s in enumerate(stats.statements, 1))
+        raise QueryBudgetExceeded(f"Expected at most {max_queries} queries, got {stats.count}:\n{statements}")
+
+
+_SERVER_TIMING_DB_COUNT = re.compile(r'\bdb;[^,]*desc="(\d+) queries"')
+
+
+def assert_response_max_queries(response, max_queries: int):
+    """Хелпер для тестов эндпоинтов: количество SQL берется из заголовка Server-Timing ответа.
+
+        response = client.get(f"/api/v1/posts/{post_id}/stats")
+        assert_response_max_queries(response, 1)
+    """
+    match = _SERVER_TIMING_DB_COUNT.search(response.headers.get("server-timing", ""))
+    if match is None:
+        raise QueryBudgetExceeded("Response has no db Server-Timing entry")
+
+    count = int(match.group(1))
+    if count > max_queries:
+        raise QueryBudgetExceeded(
+            f"Expected at most {max_queries} queries for {response.request.method} "
+            f"{response.request.url.path}, got {count}"
+        )
@@ -0,0 +1,42 @@
+import json
+import logging
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Optional
+
+from ..core.config import settings
+from ..core.db import AsyncSessionLocal
+from ..repo.sql.repositories import SQLAlchemyPostRepository
+
+logger = logging.getLogger(__name__)
+
+
+def _json_default(value: Any):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def encode_ndjson_line(row: Dict[str, Any]) -> str:
+    return json.dumps(row, default=_json_default, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+async def export_posts_ndjson(status: Optional[str] = None, author_id: Optional[str] = None,
+                              game: Optional[str] = None, updated_since: Optional[datetime] = None,
+                              include_deleted: bool = False, batch_size: int = None,
+                              session_factory=AsyncSessionLocal) -> AsyncIterator[bytes]:
+    """Выгрузка постов в NDJSON: по одному куску байт на пачку серверного курсора.
+
+    Сессия открывается внутри генератора, т.к. StreamingResponse читает его
+    уже после выхода из зависимостей запроса.
+    """
+    batch_size = batch_size or settings.EXPORT_BATCH_SIZE
+    exported = 0
+
+    async with session_factory() as session:
+        post_repo = SQLAlchemyPostRepository(session)
+        async for rows in post_repo.stream_posts(status, author_id, game, updated_since,
+                                                 include_deleted, batch_size):
+            exported += len(rows)
+            yield "".join(encode_ndjson_line(row) for row in rows).encode()
+
+    logger.info(f"Exported {exported} posts")
@@ -0,0 +1,199 @@
+import logging
+from dataclasses import dataclass, field
+from typing import AsyncIterable, AsyncIterator, List, Optional, Union
+
+from pydantic import ValidationError
+from sqlalchemy import func
+
+from .counters import author_key, counter_deltas, merge_profile_deltas, profile_delta, published_keys
+from .events import PostCreatedEvent
+from .models import generate_uuid
+from .post_query_cache import post_query_cache
+from ..core.config import settings
+from ..core.db import AsyncSessionLocal
+from ..dtos.http import PostImportRecord
+from ..mq.publisher import EventPublisher
+from ..repo.sql.repositories import SQLAlchemyPostRepository
+
+logger = logging.getLogger(__name__)
+
+# asyncpg принимает не больше 32767 параметров в запросе, у строки импорта 14 колонок
+_MAX_BIND_PARAMS = 32767
+_ROW_COLUMNS = 14
+MAX_CHUNK_SIZE = _MAX_BIND_PARAMS // _ROW_COLUMNS
+
+
+class ImportLineTooLongError(Exception):
+    pass
+
+
+@dataclass
+class ImportResult:
+    imported: int = 0
+    skipped: int = 0
+    failed: int = 0
+    errors: List[tuple] = field(default_factory=list)  # (номер строки, текст ошибки)
+
+
+async def iter_ndjson_lines(chunks: AsyncIterable[bytes],
+                            max_line_bytes: int = None) -> AsyncIterator[bytes]:
+    """Режет поток байт на строки NDJSON, не держа в памяти больше одной строки"""
+    max_line_bytes = max_line_bytes or settings.IMPORT_MAX_LINE_BYTES
+    buffer = b""
+
+    async for chunk in chunks:
+        *lines, buffer = (buffer + chunk).split(b"\n")
+        for line in lines:
+            yield line
+
+        if len(buffer) > max_line_bytes:
+            raise ImportLineTooLongError(f"NDJSON line exceeds {max_line_bytes} bytes")
+
+    if buffer:
+        yield buffer
+
+
+class PostImporter:
+    """Потоковый импорт постов из NDJSON.
+
+    Строки валидируются по одной, валидные накапливаются до chunk_size и
+    вставляются одним multi-row INSERT в отдельной транзакции. После коммита
+    пачки события PostCreatedEvent публикуются одним батчем. В памяти
+    находится не больше одной пачки, независимо от размера импорта.
+    """
+
+    def __init__(self, event_publisher: Optional[EventPublisher] = None,
+                 chunk_size: int = None, session_factory=AsyncSessionLocal):
+        self.event_publisher = event_publisher
+        self.chunk_size = chunk_size or settings.IMPORT_CHUNK_SIZE
+        if self.chunk_size > MAX_CHUNK_SIZE:
+            logger.warning(f"Import chunk size {self.chunk_size} exceeds bind parameter limit, using {MAX_CHUNK_SIZE}")
+            self.chunk_size = MAX_CHUNK_SIZE
+        self.session_factory = session_factory
+
+    async def run(self, lines: AsyncIterable[Union[bytes, str]]) -> ImportResult:
+        result = ImportResult()
+        chunk: List[PostImportRecord] = []
+        line_number = 0
+
+        async for line in lines:
+            line_number += 1
+            if not line.strip():
+                continue
+
+            try:
+                chunk.append(PostImportRecord.model_validate_json(line))
+            except ValidationError as e:
+                self._add_error(result, line_number, str(e.errors()[0].get("msg", e)))
+                continue
+
+            if len(chunk) >= self.chunk_size:
+                await self._flush(chunk, result)
+                chunk = []
+
+        if chunk:
+            await self._flush(chunk, result)
+
+        logger.info(
+            f"Bulk import finished: imported={result.imported}, "
+            f"skipped={result.skipped}, failed={result.failed}"
+        )
+        return result
+
+    def _add_error(self, result: ImportResult, line_number: int, error: str):
+        result.failed += 1
+        if len(result.errors) < settings.IMPORT_MAX_REPORTED_ERRORS:
+            result.errors.append((line_number, error))
+
+    @staticmethod
+    def _to_row(record: PostImportRecord) -> dict:
+        published_at = record.published_at
+        if record.status == "published" and published_at is None:
+            published_at = record.created_at or func.now()
+
+        # У multi-row INSERT набор колонок должен совпадать для всех строк,
+        # поэтому отсутствующие даты заполняем выражением, а не пропускаем
+        return {
+            "id": record.id or generate_uuid(),
+            "title": record.title,
+            "description": record.description,
+            "page": record.page,
+            "author_id": record.author_id,
+            "game": record.game,
+            "status": record.status,
+            "tags": record.tags,
+            "view_count": record.view_count,
+            "like_count": record.like_count,
+            "comment_count": record.comment_count,
+            "created_at": record.created_at or func.now(),
+            "published_at": published_at,
+            "is_deleted": False,
+        }
+
+    @staticmethod
+    def _counter_deltas(chunk: List[PostImportRecord], rows: List[dict], inserted_ids: set) -> dict:
+        deltas = {}
+        for row, record in zip(rows, chunk):
+            if row["id"] not in inserted_ids:
+                continue
+            keys = [author_key(record.author_id)]
+            if record.status == "published":
+                keys.extend(published_keys(record.game, record.tags))
+            deltas = counter_deltas(keys, 1, deltas)
+        return deltas
+
+    @staticmethod
+    def _profile_deltas(chunk: List[PostImportRecord], rows: List[dict], inserted_ids: set) -> dict:
+        deltas = {}
+        for row, record in zip(rows, chunk):
+            if row["id"] in inserted_ids:
+                merge_profile_deltas(deltas, record.author_id, profile_delta(
+                    record.status, 1,
+                    view_count=record.view_count, like_count=record.like_count, comment_count=record.comment_count
+                ))
+        return deltas
+
+    async def _flush(self, chunk: List[PostImportRecord], result: ImportResult):
+        received = len(chunk)
+        # Повтор id внутри пачки - пропуск: иначе событие и счетчики для поста учлись бы дважды
+        rows_by_id = {}
+        for record in chunk:
+            row = self._to_row(record)
+            rows_by_id.setdefault(row["id"], (row, record))
+        rows = [row for row, _ in rows_by_id.values()]
+        chunk = [record for _, record in rows_by_id.values()]
+
+        async with self.session_factory() as session:
+            try:
+                post_repo = SQLAlchemyPostRepository(session)
+                inserted_ids = set(await post_repo.insert_many(rows))
+                await post_repo.adjust_counters(self._counter_deltas(chunk, rows, inserted_ids))
+                await post_repo.adjust_author_profiles(self._profile_deltas(chunk, rows, inserted_ids))
+                # Импортированные посты могут быть старше уже опубликованных - список пересчитывается
+                published_authors = {record.author_id for row, record in zip(rows, chunk)
+                                     if row["id"] in inserted_ids and record.status == "published"}
+                await post_repo.refresh_latest_posts(list(published_authors), settings.AUTHOR_PROFILE_LATEST_POSTS)
+                if published_authors:
+                    # Опубликованные посты попадают в списки и поиск - кэш запросов сбрасывается после коммита
+                    post_repo.after_commit(post_query_cache.invalidate)
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+
+        result.imported += len(inserted_ids)
+        result.skipped += received - len(inserted_ids)
+
+        if self.event_publisher and inserted_ids:
+            await self.event_publisher.publish_many([
+                PostCreatedEvent(
+                    post_id=row["id"],
+                    author_id=record.author_id,
+                    author_username=record.author_username or "unknown",
+                    title=record.title
+                )
+                for row, record in zip(rows, chunk)
+                if row["id"] in inserted_ids
+            ])
+
+        logger.debug("Imported chunk: %d inserted, %d skipped", len(inserted_ids), received - len(inserted_ids))
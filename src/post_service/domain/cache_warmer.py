@@ -0,0 +1,187 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence
+
+from .counters import PUBLISHED
+from .post_query_cache import PostQueryCache, post_query_cache
+from .services import PostService
+from ..core.config import settings
+from ..core.db import AsyncSessionLocal
+from ..core.metrics import WARMUP_DURATION, WARMUP_QUERIES
+from ..repo.sql.repositories import SQLAlchemyPostRepository
+
+logger = logging.getLogger(__name__)
+
+HOT_SET_STATE_KEY = "query_cache_hot_set"
+
+TAG_COUNTER_PREFIX = f"{PUBLISHED}:tag:"
+GAME_COUNTER_PREFIX = f"{PUBLISHED}:game:"
+
+# Значения по умолчанию у GET /posts/ и /posts/popular
+FEED_PAGE_SIZE = 100
+POPULAR_LIMIT = 10
+
+
+class CacheWarmer:
+    """Прогрев кэша списков при старте и запись горячего набора для следующего старта.
+
+    После деплоя кэши всех воркеров пусты, и первые минуты каждый запрос ленты идет в Postgres.
+    warm_up() до открытия readiness загружает в post_query_cache горячий набор, записанный
+    прошлым запуском (самые частые ключи ленты, поиска и популярного), популярные посты,
+    первые страницы ленты и ленты самых больших тегов и игр - вместе с их total. Загрузки идут
+    по concurrency штук, прогрев ограничен budget секундами и max_posts записями в кэше постов.
+    TTL списков короче бюджета, поэтому перед открытием readiness записи, загруженные в начале
+    прогрева и успевшие устареть, загружаются заново.
+
+    Раз в record_interval (и при остановке) самые частые ключи воркера сохраняются в service_state.
+    Воркеры пишут одну запись - остается набор последнего, для прогрева этого достаточно.
+    Поисковые запросы - текст пользователей, они сохраняются только при WARMUP_RECORD_SEARCHES.
+    """
+
+    def __init__(self, cache: PostQueryCache = post_query_cache, budget: float = None, max_posts: int = None,
+                 concurrency: int = None, record_interval: float = None, session_factory=AsyncSessionLocal):
+        self.cache = cache
+        self.budget = budget or settings.WARMUP_BUDGET_SECONDS
+        self.max_posts = max_posts or settings.WARMUP_MAX_POSTS
+        self.concurrency = concurrency or settings.WARMUP_CONCURRENCY
+        self.record_interval = record_interval or settings.WARMUP_RECORD_INTERVAL_SECONDS
+        self.session_factory = session_factory
+        self.done = False
+        self.loaded = 0
+        self._task: Optional[asyncio.Task] = None
+
+        WARMUP_QUERIES.set_callback(lambda: {(): self.loaded})
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        try:
+            await self.record()
+        except Exception as e:
+            logger.warning(f"Failed to record hot query set: {e}")
+
+    async def _run(self):
+        await self.warm_up()
+        while True:
+            await asyncio.sleep(self.record_interval)
+            try:
+                await self.record()
+            except Exception as e:
+                logger.error(f"Failed to record hot query set: {e}")
+
+    async def warm_up(self):
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._warm(), self.budget)
+        except asyncio.TimeoutError:
+            logger.warning(f"Cache warm-up stopped after {self.budget}s budget")
+        except Exception as e:
+            # Прогрев - оптимизация: без него сервис работает, просто первые запросы медленнее
+            logger.error(f"Cache warm-up failed: {e}")
+        finally:
+            duration = time.perf_counter() - started
+            WARMUP_DURATION.set(duration)
+            self.done = True
+        logger.info("Cache warm-up loaded %d queries (%d posts) in %.2fs", self.loaded, len(self.cache.posts), duration)
+
+    async def _warm(self):
+        while True:
+            try:
+                keys = await self.hot_set()
+                break
+            except Exception as e:
+                # БД подключается в фоне одновременно с прогревом - ждем ее в пределах бюджета
+                logger.warning(f"Cache warm-up is waiting for the database: {e}")
+                await asyncio.sleep(1)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        loaded_at: Dict[tuple, float] = {}
+
+        async def load(key: tuple):
+            async with semaphore:
+                if len(self.cache.posts) >= self.max_posts:
+                    return
+                try:
+                    await self._load(key)
+                    loaded_at[key] = time.monotonic()
+                    self.loaded += 1
+                except Exception as e:
+                    logger.warning(f"Failed to warm {key}: {e}")
+
+        async def refresh(key: tuple):
+            async with semaphore:
+                try:
+                    # Устаревшая запись обновится в фоне, истекшая - загрузится заново
+                    await self.cache.replay(key)
+                except Exception as e:
+                    logger.warning(f"Failed to refresh warmed {key}: {e}")
+
+        await asyncio.gather(*(load(key) for key in keys))
+
+        # Один проход по устаревшим, от самых старых: повторять до полной свежести нельзя -
+        # при проходе дольше TTL прогрев всегда занимал бы весь бюджет
+        refresh_after = self.cache.queries.ttl_seconds * self.cache.queries.refresh_ahead
+        now = time.monotonic()
+        stale = sorted((key for key, at in loaded_at.items() if now - at >= refresh_after), key=loaded_at.get)
+        await asyncio.gather(*(refresh(key) for key in stale))
+
+    async def _load(self, key: tuple):
+        await self.cache.replay(key)
+        if key[0] != "published":
+            return
+        # total списка: счетчики из БД засеваются, оценки для сочетаний фильтров попадают в кэш оценок
+        _, _, _, tags, game = key
+        async with self.session_factory() as session:
+            await PostService(SQLAlchemyPostRepository(session)).count_posts(None, list(tags), game)
+            await session.commit()
+
+    async def hot_set(self) -> List[tuple]:
+        """Ключи для прогрева: записанный горячий набор, затем набор по умолчанию, без повторов"""
+        async with self.session_factory() as session:
+            repo = SQLAlchemyPostRepository(session)
+            state = await repo.get_service_state(HOT_SET_STATE_KEY)
+            tag_keys = await repo.top_counter_keys(TAG_COUNTER_PREFIX, settings.WARMUP_HOT_LISTINGS)
+            game_keys = await repo.top_counter_keys(GAME_COUNTER_PREFIX, settings.WARMUP_HOT_LISTINGS)
+
+        recorded = [
+            self._key(key) for key in (state or {}).get("queries", [])
+            if isinstance(key, list) and self._recordable(key)
+        ]
+        defaults = [
+            ("popular", POPULAR_LIMIT),
+            *(("published", page * FEED_PAGE_SIZE, FEED_PAGE_SIZE, (), None)
+              for page in range(settings.WARMUP_FEED_PAGES)),
+            *(("published", 0, FEED_PAGE_SIZE, (key[len(TAG_COUNTER_PREFIX):],), None) for key in tag_keys),
+            *(("published", 0, FEED_PAGE_SIZE, (), key[len(GAME_COUNTER_PREFIX):]) for key in game_keys),
+        ]
+        return list(dict.fromkeys(recorded + defaults))
+
+    @staticmethod
+    def _key(value: list) -> tuple:
+        """Ключ из JSON: списки обратно в кортежи, чтобы ключ совпадал с ключом кэша"""
+        return tuple(tuple(item) if isinstance(item, list) else item for item in value)
+
+    @staticmethod
+    def _recordable(key: Sequence) -> bool:
+        return settings.WARMUP_RECORD_SEARCHES or key[0] != "search"
+
+    async def record(self):
+        keys = [key for key in self.cache.hot_keys(len(self.cache.hits)) if self._recordable(key)]
+        keys = keys[:settings.WARMUP_HOT_SET_SIZE]
+        if not keys:
+            return
+        async with self.session_factory() as session:
+            await SQLAlchemyPostRepository(session).set_service_state(HOT_SET_STATE_KEY, {
+                "queries": keys,
+                "recorded_at": datetime.now(timezone.utc).isoformat(),
+            })
+            await session.commit()
+        self.cache.decay_hits()
@@ -0,0 +1,91 @@
+import asyncio
+import logging
+from typing import Optional
+
+from .services import PostService
+from ..core.config import settings
+from ..core.db import AsyncSessionLocal
+from ..core.metrics import COUNTER_DRIFT
+from ..repo.sql.repositories import SQLAlchemyPostRepository
+
+logger = logging.getLogger(__name__)
+
+RECONCILE_JOB = "counter_reconcile"
+
+
+class CounterReconciler:
+    """Периодическая сверка post_counters с COUNT(*) по posts и author_profiles с подсчетом по posts.
+
+    Счетчики и профили меняются инкрементально в транзакциях записей, и расхождение (ручная правка
+    базы, восстановление из бэкапа, ошибка в коде) иначе жило бы вечно. Раз в interval один процесс
+    на всю базу (блокировка задачи) обходит все счетчики, затем все профили пачками по batch_size;
+    каждый пересчитывается в своей транзакции под эксклюзивной блокировкой ключа, поэтому записи
+    ждут не дольше одного подсчета.
+    """
+
+    def __init__(self, interval: float = None, batch_size: int = None, session_factory=AsyncSessionLocal):
+        self.interval = interval or settings.COUNTER_RECONCILE_INTERVAL_SECONDS
+        self.batch_size = batch_size or settings.COUNTER_RECONCILE_BATCH_SIZE
+        self.session_factory = session_factory
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        while True:
+            # Сначала пауза: после деплоя все воркеры стартуют одновременно
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Counter reconciliation failed: {e}")
+
+    async def run_once(self) -> int:
+        """Один обход всех счетчиков и профилей; возвращает число исправленных"""
+        async with self.session_factory() as lock_session:
+            if not await SQLAlchemyPostRepository(lock_session).try_lock_job(RECONCILE_JOB):
+                return 0
+
+            fixed = await self._reconcile_all(
+                "counter", lambda repo, after: repo.counter_keys(after, self.batch_size),
+                PostService.reconcile_counter
+            )
+            fixed += await self._reconcile_all(
+                "profile", lambda repo, after: repo.author_profile_ids(after, self.batch_size),
+                PostService.reconcile_author_profile
+            )
+
+            await lock_session.commit()
+
+        if fixed:
+            logger.info("Counter reconciliation corrected %d counters and profiles", fixed)
+        return fixed
+
+    async def _reconcile_all(self, kind: str, list_keys, reconcile) -> int:
+        """Обход ключей пачками: list_keys(repo, after) - следующая пачка, reconcile(service, key) - расхождение"""
+        fixed = 0
+        after = None
+        while True:
+            async with self.session_factory() as session:
+                keys = await list_keys(SQLAlchemyPostRepository(session), after)
+            for key in keys:
+                async with self.session_factory() as session:
+                    drift = await reconcile(PostService(SQLAlchemyPostRepository(session)), key)
+                    await session.commit()
+                if drift:
+                    fixed += 1
+                    COUNTER_DRIFT.inc(kind, amount=abs(drift))
+                    logger.warning("%s %s drifted by %d, corrected", kind.capitalize(), key, drift)
+            if len(keys) < self.batch_size:
+                break
+            after = keys[-1]
+        return fixed
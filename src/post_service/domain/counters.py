@@ -0,0 +1,73 @@
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+
+PUBLISHED = "published"
+_GAME_PREFIX = f"{PUBLISHED}:game:"
+_TAG_PREFIX = f"{PUBLISHED}:tag:"
+_AUTHOR_PREFIX = "author:"
+
+
+def published_key(game: Optional[str] = None, tag: Optional[str] = None) -> str:
+    if game:
+        return f"{_GAME_PREFIX}{game}"
+    if tag:
+        return f"{_TAG_PREFIX}{tag}"
+    return PUBLISHED
+
+
+def author_key(author_id: str) -> str:
+    return f"{_AUTHOR_PREFIX}{author_id}"
+
+
+def counter_filters(key: str) -> Optional[Dict[str, Any]]:
+    """Фильтры count_posts для ключа счетчика; None - ключ неизвестного вида"""
+    if key == PUBLISHED:
+        return {"published_only": True}
+    if key.startswith(_GAME_PREFIX):
+        return {"published_only": True, "game": key[len(_GAME_PREFIX):]}
+    if key.startswith(_TAG_PREFIX):
+        return {"published_only": True, "tag": key[len(_TAG_PREFIX):]}
+    if key.startswith(_AUTHOR_PREFIX):
+        return {"author_id": key[len(_AUTHOR_PREFIX):]}
+    return None
+
+
+def published_keys(game: Optional[str], tags: Optional[Iterable[str]]) -> List[str]:
+    """Счетчики, в которые входит опубликованный пост с данными игрой и тегами"""
+    keys = [published_key()]
+    if game:
+        keys.append(published_key(game=game))
+    keys.extend(published_key(tag=tag) for tag in set(tags or []))
+    return keys
+
+
+def counter_deltas(keys: Iterable[str], delta: int, deltas: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+    deltas = Counter(deltas or {})
+    for key in keys:
+        deltas[key] += delta
+    return dict(deltas)
+
+
+# Колонки author_profiles: количество постов по статусу и суммы счетчиков постов
+PROFILE_STATUS_COLUMNS = {"draft": "draft_posts", "published": "published_posts"}
+PROFILE_STATS_COLUMNS = {"view_count": "total_views", "like_count": "total_likes", "comment_count": "total_comments"}
+PROFILE_COLUMNS = [*PROFILE_STATUS_COLUMNS.values(), *PROFILE_STATS_COLUMNS.values()]
+
+
+def profile_delta(status: Optional[str], delta: int, **stats: int) -> Dict[str, int]:
+    """Изменение сводки автора от поста со статусом status (delta=1 - добавлен, -1 - убран)
+    и счетчиками stats (view_count, like_count, comment_count)"""
+    deltas = Counter()
+    if status in PROFILE_STATUS_COLUMNS:
+        deltas[PROFILE_STATUS_COLUMNS[status]] += delta
+    for counter, value in stats.items():
+        deltas[PROFILE_STATS_COLUMNS[counter]] += delta * (value or 0)
+    return dict(deltas)
+
+
+def merge_profile_deltas(deltas: Dict[str, Dict[str, int]], author_id: str,
+                         delta: Dict[str, int]) -> Dict[str, Dict[str, int]]:
+    author_deltas = Counter(deltas.get(author_id) or {})
+    author_deltas.update(delta)
+    deltas[author_id] = dict(author_deltas)
+    return deltas
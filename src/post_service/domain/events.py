@@ -1,10 +1,22 @@
-from pydantic import BaseModel
-from datetime import datetime
-from typing import Optional
+from pydantic import AliasChoices, BaseModel, Field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Type
+from uuid import uuid4
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
 
 class PostEvent(BaseModel):
     event_type: str
-    timestamp: datetime = datetime.utcnow()
+    # Уникальный id события, уходит в message_id сообщения - по нему consumer отбрасывает дубликаты
+    event_id: str = Field(default_factory=lambda: uuid4().hex)
+    # Версия схемы события; при несовместимом изменении полей увеличивается
+    # и для старой версии остается отдельная модель в EVENT_SCHEMAS
+    schema_version: int = 1
+    # default_factory: время создания события, а не импорта модуля
+    timestamp: datetime = Field(default_factory=_utcnow)
     service: str = "posts-service"
 
 class PostCreatedEvent(PostEvent):
@@ -32,13 +44,53 @@ class PostViewedEvent(PostEvent):
     post_id: str
     author_id: str
 
-# События от других сервисов
+class PostViewCount(BaseModel):
+    post_id: str
+    author_id: str
+    views: int
+    unique_viewers: Optional[int] = None
+    # HyperLogLog-скетч зрителей за окно (base64), чтобы потребитель мог объединять окна
+    viewers_sketch: Optional[str] = None
+
+class PostViewsAggregatedEvent(PostEvent):
+    """Просмотры постов, накопленные за окно агрегации (вместо PostViewedEvent на каждый просмотр)"""
+    event_type: str = "post_views_aggregated"
+    window_start: datetime
+    window_end: datetime
+    posts: List[PostViewCount]
+
+# События от других сервисов: имена полей у отправителей различаются
 class PostLikesUpdatedEvent(PostEvent):
     event_type: str = "post_likes_updated"
-    post_id: str
-    like_count: int
+    service: Optional[str] = None
+    post_id: str = Field(validation_alias=AliasChoices("post_id", "postId"))
+    like_count: int = Field(validation_alias=AliasChoices("like_count", "likeCount", "count"))
+    # Монотонная версия счетчика у отправителя; если ее нет, порядок определяется по timestamp
+    version: Optional[int] = Field(None, validation_alias=AliasChoices("version", "seq", "sequence"))
+    # Без значения по умолчанию: время разбора сообщения стало бы версией, и повтор из retry-очереди
+    # перезаписал бы более новый счетчик. Если отправитель его не передал, consumer подставляет
+    # timestamp AMQP или время первого получения
+    timestamp: Optional[datetime] = None
 
 class PostCommentsUpdatedEvent(PostEvent):
     event_type: str = "post_comments_updated"
-    post_id: str
-    comment_count: int
\ No newline at end of file
+    service: Optional[str] = None
+    post_id: str = Field(validation_alias=AliasChoices("post_id", "postId"))
+    comment_count: int = Field(validation_alias=AliasChoices("comment_count", "commentCount", "count"))
+    version: Optional[int] = Field(None, validation_alias=AliasChoices("version", "seq", "sequence"))
+    timestamp: Optional[datetime] = None
+
+
+# event_type -> schema_version -> модель
+EVENT_SCHEMAS: Dict[str, Dict[int, Type[PostEvent]]] = {
+    event.model_fields["event_type"].default: {1: event}
+    for event in (
+        PostCreatedEvent,
+        PostPublishedEvent,
+        PostDeletedEvent,
+        PostViewedEvent,
+        PostViewsAggregatedEvent,
+        PostLikesUpdatedEvent,
+        PostCommentsUpdatedEvent,
+    )
+}
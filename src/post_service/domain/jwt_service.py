@@ -0,0 +1,25 @@
+import logging
+from typing import Any, Dict, Optional
+
+from jose import JWTError, jwt
+
+from ..core.config import Settings
+
+logger = logging.getLogger(__name__)
+
+
+class JWTService:
+    """Проверка access-токенов, выпущенных auth-service (общий секрет JWT_SECRET_KEY)"""
+
+    def __init__(self, settings: Settings):
+        self.secret_key = settings.JWT_SECRET_KEY
+        self.algorithm = settings.JWT_ALGORITHM
+
+    def verify_access_token(self, token: str) -> Optional[Dict[str, Any]]:
+        """Payload токена; None, если подпись неверна или срок действия истек"""
+        try:
+            # Аудиторию auth-service не задает для каждого сервиса отдельно - aud не проверяется
+            return jwt.decode(token, self.secret_key, algorithms=[self.algorithm], options={"verify_aud": False})
+        except JWTError as e:
+            logger.debug("Invalid access token: %s", e)
+            return None
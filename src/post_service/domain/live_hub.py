@@ -0,0 +1,214 @@
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING, AsyncIterator, Dict, Iterable, List, Optional, Set
+
+from pydantic_core import to_json
+
+from .services import PostService
+from ..core.config import settings
+from ..core.db import AsyncSessionLocal
+from ..core.metrics import LIVE_REJECTED, LIVE_SUBSCRIBERS, LIVE_TOPICS, LIVE_UPDATES_SENT
+from ..mq.live_fanout import LiveFanout
+from ..repo.sql.repositories import SQLAlchemyPostRepository
+
+if TYPE_CHECKING:
+    from .view_aggregator import ViewAggregator
+
+logger = logging.getLogger(__name__)
+
+# Пост удален - поток закрывается
+GONE_FRAME = b"event: gone\ndata: {}\n\n"
+KEEPALIVE_FRAME = b": keepalive\n\n"
+
+_READ_BATCH = 1000
+
+
+def stats_frame(post_id: str, view_count: int, like_count: int, comment_count: int) -> bytes:
+    """SSE-событие stats, data - те же поля, что у PostStatsResponse"""
+    data = to_json({
+        "post_id": post_id,
+        "view_count": view_count or 0,
+        "like_count": like_count or 0,
+        "comment_count": comment_count or 0,
+    })
+    return b"event: stats\ndata: " + data + b"\n\n"
+
+
+class LiveCapacityError(Exception):
+    pass
+
+
+class Subscription:
+    """Подписчик хранит только последний кадр: медленный клиент пропускает промежуточные значения"""
+    __slots__ = ("post_id", "latest", "_ready")
+
+    def __init__(self, post_id: str):
+        self.post_id = post_id
+        self.latest: Optional[bytes] = None
+        self._ready = asyncio.Event()
+
+    def push(self, frame: bytes):
+        self.latest = frame
+        self._ready.set()
+
+    async def next(self, timeout: float) -> Optional[bytes]:
+        """Следующий кадр; None, если за timeout ничего не пришло"""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        self._ready.clear()
+        return self.latest
+
+
+class LiveHub:
+    """Рассылка счетчиков постов подписчикам /posts/{id}/live.
+
+    Темы - посты, на которые подписан хотя бы один поток этого воркера. Источники изменений
+    (обработчики likes/comments, просмотры, сброс агрегатора) вызывают только notify(): пост
+    помечается измененным, без БД. Раз в interval счетчики всех помеченных постов читаются одним
+    запросом, кадр сериализуется один раз на пост и раздается всем его подписчикам - не больше
+    одного обновления поста за интервал, сколько бы событий ни пришло. Неизменившиеся значения не отправляются.
+
+    При fanout=broker помеченные id раз в интервал уходят в RabbitMQ и помечают посты в других
+    воркерах и репликах (по умолчанию, если воркеров больше одного: consumer работает в одном из них).
+    Раз в resync_seconds перечитываются все темы - на случай пропущенных уведомлений.
+    """
+
+    def __init__(self, view_aggregator: Optional["ViewAggregator"] = None, fanout: str = None,
+                 interval: float = None, resync_seconds: float = None, max_subscribers: int = None,
+                 session_factory=AsyncSessionLocal):
+        self.view_aggregator = view_aggregator
+        self.interval = interval or settings.LIVE_PUSH_INTERVAL_SECONDS
+        self.resync_seconds = resync_seconds or settings.LIVE_RESYNC_SECONDS
+        self.max_subscribers = max_subscribers or settings.LIVE_MAX_SUBSCRIBERS
+        self.session_factory = session_factory
+        self.fanout = LiveFanout(self.remote_changed) if (fanout or settings.live_fanout()) == "broker" else None
+        self.subscribers = 0
+        self._topics: Dict[str, Set[Subscription]] = {}
+        self._last: Dict[str, bytes] = {}  # Последний отправленный кадр темы
+        self._dirty: Set[str] = set()
+        self._outgoing: Set[str] = set()  # Изменения для других реплик
+        self._resync_at = 0.0
+        self._tasks: List[asyncio.Task] = []
+
+        LIVE_SUBSCRIBERS.set_callback(lambda: {(): self.subscribers})
+        LIVE_TOPICS.set_callback(lambda: {(): len(self._topics)})
+
+    def start(self):
+        self._resync_at = time.monotonic() + self.resync_seconds
+        self._tasks.append(asyncio.create_task(self._run()))
+        if self.fanout:
+            self._tasks.append(asyncio.create_task(self.fanout.connect_with_retry()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        if self.fanout:
+            await self.fanout.close()
+
+    async def subscribe(self, post_id: str) -> Subscription:
+        """Подписка с текущим значением в latest; LookupError - поста нет или он удален"""
+        if self.subscribers >= self.max_subscribers:
+            LIVE_REJECTED.inc()
+            raise LiveCapacityError(f"{self.subscribers} live subscribers already connected")
+
+        frame = self._last.get(post_id)
+        if frame is None:
+            frame = (await self._read([post_id])).get(post_id)
+            if frame is None:
+                raise LookupError(post_id)
+
+        subscription = Subscription(post_id)
+        subscription.latest = frame
+        self._topics.setdefault(post_id, set()).add(subscription)
+        self._last.setdefault(post_id, frame)
+        self.subscribers += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        topic = self._topics.get(subscription.post_id)
+        if topic is None or subscription not in topic:
+            return
+        topic.discard(subscription)
+        self.subscribers -= 1
+        if not topic:
+            del self._topics[subscription.post_id]
+            self._last.pop(subscription.post_id, None)
+
+    async def stream(self, subscription: Subscription, keepalive: float, retry_ms: int) -> AsyncIterator[bytes]:
+        """Тело ответа text/event-stream: текущее значение, затем изменения; отписка при закрытии потока"""
+        try:
+            frame = subscription.latest
+            yield f"retry: {retry_ms}\n\n".encode() + frame
+            while frame != GONE_FRAME:
+                frame = await subscription.next(keepalive)
+                yield frame or KEEPALIVE_FRAME
+        finally:
+            self.unsubscribe(subscription)
+
+    def notify(self, post_id: str, broadcast: bool = True):
+        """Счетчики поста изменились. broadcast=False - изменение видно только этому воркеру
+        (просмотр в памяти агрегатора), другим репликам сообщать рано"""
+        if post_id in self._topics:
+            self._dirty.add(post_id)
+        if broadcast and self.fanout:
+            self._outgoing.add(post_id)
+
+    def notify_many(self, post_ids: Iterable[str], broadcast: bool = True):
+        for post_id in post_ids:
+            self.notify(post_id, broadcast)
+
+    def remote_changed(self, post_ids: List[str]):
+        self.notify_many(post_ids, broadcast=False)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.tick()
+            except Exception as e:
+                logger.error(f"Failed to push live updates: {e}")
+
+    async def tick(self):
+        if self._outgoing:
+            outgoing, self._outgoing = list(self._outgoing), set()
+            try:
+                await self.fanout.publish(outgoing)
+            except Exception as e:
+                logger.warning(f"Failed to broadcast live updates: {e}")
+
+        if time.monotonic() >= self._resync_at:
+            self._resync_at = time.monotonic() + self.resync_seconds
+            self._dirty.update(self._topics)
+
+        post_ids = [post_id for post_id in self._dirty if post_id in self._topics]
+        self._dirty.clear()
+        if not post_ids:
+            return
+
+        frames = await self._read(post_ids)
+        for post_id in post_ids:
+            topic = self._topics.get(post_id)
+            frame = frames.get(post_id, GONE_FRAME)
+            if not topic or frame == self._last.get(post_id):
+                continue
+            self._last[post_id] = frame
+            for subscription in topic:
+                subscription.push(frame)
+            LIVE_UPDATES_SENT.inc(amount=len(topic))
+
+    async def _read(self, post_ids: List[str]) -> Dict[str, bytes]:
+        """Кадры stats по id; удаленных постов в результате нет"""
+        frames = {}
+        async with self.session_factory() as session:
+            post_service = PostService(SQLAlchemyPostRepository(session), view_aggregator=self.view_aggregator)
+            for i in range(0, len(post_ids), _READ_BATCH):
+                for stats in await post_service.get_post_stats(post_ids[i:i + _READ_BATCH]):
+                    frames[stats[0]] = stats_frame(*stats)
+        return frames
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, String, Text, DateTime, Integer, Boolean, JSON
+from sqlalchemy import Column, String, Text, DateTime, Integer, BigInteger, Boolean, JSON, Index, cast
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -13,6 +14,14 @@ def generate_uuid():
 
 class Post(Base):
     __tablename__ = "posts"
+    __table_args__ = (
+        # Покрывающий индекс для счетчиков: /posts/{id}/stats читается index-only scan'ом
+        Index(
+            "ix_posts_stats",
+            "id",
+            postgresql_include=["view_count", "like_count", "comment_count", "is_deleted"],
+        ),
+    )
 
     id = Column(String, primary_key=True, default=generate_uuid)
     title = Column(String(255), nullable=False)
@@ -25,9 +34,15 @@ class Post(Base):
     view_count = Column(Integer, default=0)
     like_count = Column(Integer, default=0)
     comment_count = Column(Integer, default=0)  # Синхронизируется с comments-service
+    # Версия источника последнего примененного значения (seq отправителя или время события в мкс):
+    # устаревшее событие, пришедшее позже, счетчик не откатывает
+    like_count_version = Column(BigInteger, nullable=True)
+    comment_count_version = Column(BigInteger, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     published_at = Column(DateTime(timezone=True), nullable=True)
+    # Отложенная публикация; сбрасывается при публикации и удалении, поэтому в индексе только ожидающие
+    scheduled_at = Column(DateTime(timezone=True), nullable=True)
     is_deleted = Column(Boolean, default=False)
     
     # Для обратной совместимости (если где-то используется user_id)
@@ -38,6 +53,7 @@ class Post(Base):
     def publish(self):
         self.status = "published"
         self.published_at = datetime.utcnow()
+        self.scheduled_at = None
 
     def increment_view_count(self):
         self.view_count += 1
@@ -46,4 +62,113 @@ class Post(Base):
         self.like_count = count
 
     def update_comment_count(self, count: int):
-        self.comment_count = count
\ No newline at end of file
+        self.comment_count = count
+
+
+# Лента изменений (/posts/changes) читает посты в порядке (момент изменения, id)
+Index(
+    "ix_posts_changed_at_id",
+    func.coalesce(Post.updated_at, Post.created_at),
+    Post.id,
+)
+
+# Посты автора (find_by_author): фильтр и сортировка по одному индексу, без сортировки в памяти
+Index(
+    "ix_posts_author_id_created_at",
+    Post.author_id,
+    Post.created_at.desc(),
+)
+
+# Планировщик публикаций: ближайшее время и пачки наступивших читаются из маленького частичного индекса
+Index(
+    "ix_posts_scheduled_at",
+    Post.scheduled_at,
+    postgresql_where=Post.scheduled_at.isnot(None),
+)
+
+# Подсказки заголовков (/posts/suggest): LIKE 'prefix%' и сортировка по одному индексу.
+# Побайтовое сравнение (COLLATE "C") работает с LIKE по префиксу при любой локали базы, как text_pattern_ops,
+# но, в отличие от него, отдает и порядок для ORDER BY
+Index(
+    "ix_posts_title_prefix",
+    func.lower(Post.title).collate("C"),
+    postgresql_where=(Post.status == "published") & (Post.is_deleted == False),
+)
+
+# Архиватор: удаленные посты по моменту удаления; в индексе только еще не перенесенные в posts_archive
+Index(
+    "ix_posts_deleted_changed_at",
+    func.coalesce(Post.updated_at, Post.created_at),
+    postgresql_where=Post.is_deleted == True,
+)
+
+# Фильтр по тегам: CAST(tags AS JSONB) @> '["tag"]'
+Index(
+    "ix_posts_tags",
+    cast(Post.tags, JSONB),
+    postgresql_using="gin",
+)
+
+
+class ArchivedPost(Base):
+    """Удаленный пост, перенесенный архиватором из posts. Колонки те же, что у Post, плюс archived_at.
+
+    Живые запросы сюда не ходят: таблица нужна для восстановления и разборов, а posts
+    и ее индексы не растут от накопленных удаленных строк.
+    """
+    __tablename__ = "posts_archive"
+
+    id = Column(String, primary_key=True)
+    title = Column(String(255), nullable=False)
+    description = Column(Text, nullable=True)
+    page = Column(JSON, nullable=False)
+    author_id = Column(String, nullable=False, index=True)
+    game = Column(String(255), nullable=True)
+    status = Column(String(20))
+    tags = Column(JSON)
+    view_count = Column(Integer)
+    like_count = Column(Integer)
+    comment_count = Column(Integer)
+    like_count_version = Column(BigInteger, nullable=True)
+    comment_count_version = Column(BigInteger, nullable=True)
+    created_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
+    published_at = Column(DateTime(timezone=True), nullable=True)
+    scheduled_at = Column(DateTime(timezone=True), nullable=True)
+    is_deleted = Column(Boolean)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class PostCounter(Base):
+    """Поддерживаемые инкрементально счетчики постов по фильтру (published, published:tag:<tag>, author:<id>...)"""
+    __tablename__ = "post_counters"
+
+    key = Column(String, primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
+
+
+class ServiceState(Base):
+    """Небольшое состояние сервиса, переживающее перезапуск (например, горячий набор запросов для прогрева)"""
+    __tablename__ = "service_state"
+
+    key = Column(String, primary_key=True)
+    value = Column(JSONB, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class AuthorProfile(Base):
+    """Сводка автора для страницы профиля, поддерживается инкрементально при изменении постов.
+
+    Строка создается при первом чтении профиля (подсчетом по posts), до этого обновления
+    профиля автора пропускаются. Суммы считаются по неудаленным постам.
+    """
+    __tablename__ = "author_profiles"
+
+    author_id = Column(String, primary_key=True)
+    draft_posts = Column(Integer, nullable=False, default=0)
+    published_posts = Column(Integer, nullable=False, default=0)
+    total_views = Column(BigInteger, nullable=False, default=0)
+    total_likes = Column(BigInteger, nullable=False, default=0)
+    total_comments = Column(BigInteger, nullable=False, default=0)
+    latest_post_ids = Column(ARRAY(String), nullable=False, default=list)  # Последние опубликованные, новые первыми
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,70 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from ..core.config import settings
+from ..core.db import AsyncSessionLocal
+from ..core.metrics import POSTS_ARCHIVED
+from ..repo.sql.repositories import SQLAlchemyPostRepository
+
+logger = logging.getLogger(__name__)
+
+
+class PostArchiver:
+    """Перенос давно удаленных постов из posts в posts_archive.
+
+    Мягкое удаление оставляет строку в posts навсегда: она занимает место в heap и во всех
+    индексах, и списки пропускают ее при каждом чтении. Раз в interval архиватор переносит
+    посты, удаленные больше after_days дней назад, пачками по batch_size с паузой между ними,
+    чтобы не создавать всплеск WAL и долгих блокировок. Освободившееся место переиспользует автовакуум.
+
+    Посты со статусом archived не переносятся: автор по-прежнему видит их в своих списках и счетчиках.
+    """
+
+    def __init__(self, after_days: int = None, batch_size: int = None, interval: float = None,
+                 batch_pause: float = None, session_factory=AsyncSessionLocal):
+        self.after_days = settings.ARCHIVE_AFTER_DAYS if after_days is None else after_days
+        self.batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+        self.interval = interval or settings.ARCHIVE_INTERVAL_SECONDS
+        self.batch_pause = settings.ARCHIVE_BATCH_PAUSE_SECONDS if batch_pause is None else batch_pause
+        self.session_factory = session_factory
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Post archival failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def run_once(self) -> int:
+        """Переносит все посты, удаленные раньше порога; возвращает их число"""
+        deleted_before = datetime.now(timezone.utc) - timedelta(days=self.after_days)
+        total = 0
+        while True:
+            async with self.session_factory() as session:
+                moved = await SQLAlchemyPostRepository(session).archive_deleted(deleted_before, self.batch_size)
+                await session.commit()
+
+            total += moved
+            POSTS_ARCHIVED.inc(amount=moved)
+            if moved < self.batch_size:
+                break
+            await asyncio.sleep(self.batch_pause)
+
+        if total:
+            logger.info("Archived %d deleted posts", total)
+        return total
@@ -0,0 +1,125 @@
+import logging
+from collections import Counter
+from functools import partial
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+
+from ..core.cache import RefreshingCache, TTLCache
+from ..core.config import settings
+from ..core.db import AsyncSessionLocal
+from ..core.metrics import POST_CACHE_REQUESTS, QUERY_CACHE_REQUESTS
+from ..repo.sql.read_repository import PostRecord, SQLAlchemyPostReadRepository
+
+logger = logging.getLogger(__name__)
+
+
+class PostQueryCache:
+    """Кэш ленты, поиска и популярного перед read_repository.
+
+    Для запроса хранятся только id постов, ключ - нормализованные параметры (порядок и
+    повторы тегов, регистр поискового запроса не важны). Сами посты берутся из кэша
+    отдельных постов, недостающие дочитываются одним запросом по id.
+
+    Публикация и удаление в этом процессе сбрасывают все списки (новое поколение) и
+    запись поста; изменения из других воркеров становятся видны не позже QUERY_CACHE_TTL_SECONDS.
+    Загрузки идут в собственных сессиях: их результат ждут несколько запросов сразу.
+
+    Обращения считаются по ключам: самые частые (hot_keys) сохраняются и при следующем
+    старте загружаются заново через replay() - см. CacheWarmer.
+    """
+
+    def __init__(self, ttl_seconds: float = None, post_ttl_seconds: float = None,
+                 session_factory=AsyncSessionLocal):
+        self.session_factory = session_factory
+        self.queries = RefreshingCache(
+            ttl_seconds or settings.QUERY_CACHE_TTL_SECONDS,
+            settings.QUERY_CACHE_REFRESH_AHEAD,
+            settings.QUERY_CACHE_MAX_ENTRIES,
+            on_lookup=lambda key, result: QUERY_CACHE_REQUESTS.inc(key[0], result),
+        )
+        self.posts = TTLCache(post_ttl_seconds or settings.POST_CACHE_TTL_SECONDS, settings.POST_CACHE_MAX_ENTRIES)
+        self.hits: Counter = Counter()
+
+    def invalidate(self, post_id: Optional[str] = None):
+        self.queries.invalidate()
+        if post_id:
+            self.posts.pop(post_id)
+
+    async def list_published(self, skip: int = 0, limit: int = 100, tags: List[str] = None,
+                             game: Optional[str] = None, track: bool = True) -> List[PostRecord]:
+        tags = sorted(set(tags or []))
+        key = ("published", skip, limit, tuple(tags), game or None)
+        return await self._cached(key, lambda repo: repo.list_published(skip, limit, tags, game or None), track)
+
+    async def search(self, query: str, skip: int = 0, limit: int = 100, track: bool = True) -> List[PostRecord]:
+        # Поиск - ILIKE, регистр запроса на результат не влияет
+        key = ("search", query.lower(), skip, limit)
+        return await self._cached(key, lambda repo: repo.search(query, skip, limit), track)
+
+    async def popular(self, limit: int = 10, track: bool = True) -> List[PostRecord]:
+        return await self._cached(("popular", limit), lambda repo: repo.list_popular(limit), track)
+
+    def hot_keys(self, limit: int) -> List[tuple]:
+        return [key for key, _ in self.hits.most_common(limit)]
+
+    def decay_hits(self):
+        """Старые обращения весят вдвое меньше новых: горячий набор следует за сменой трафика"""
+        self.hits = Counter({key: count // 2 for key, count in self.hits.items() if count > 1})
+
+    async def replay(self, key: Sequence) -> List[PostRecord]:
+        """Загрузка по ключу из hot_keys (в том числе прочитанному из JSON, где кортежи стали списками).
+        Не считается обращением: иначе прогрев и обновление горячего набора поддерживали бы сами себя"""
+        kind, *params = key
+        if kind == "published":
+            skip, limit, tags, game = params
+            return await self.list_published(skip, limit, list(tags), game, track=False)
+        if kind == "search":
+            query, skip, limit = params
+            return await self.search(query, skip, limit, track=False)
+        if kind == "popular":
+            limit, = params
+            return await self.popular(limit, track=False)
+        raise ValueError(f"Unknown query cache key: {key}")
+
+    def _track(self, key: tuple):
+        self.hits[key] += 1
+        if len(self.hits) > settings.QUERY_CACHE_MAX_ENTRIES:
+            # Редкие ключи отбрасываются, чтобы счетчик не рос с числом уникальных запросов
+            self.hits = Counter(dict(self.hits.most_common(settings.QUERY_CACHE_MAX_ENTRIES // 2)))
+
+    async def _cached(self, key: tuple, query: Callable[[SQLAlchemyPostReadRepository], Awaitable[List[PostRecord]]],
+                      track: bool = True) -> List[PostRecord]:
+        if track:
+            self._track(key)
+        post_ids = await self.queries.get(key, partial(self._load_ids, query))
+        return await self._hydrate(post_ids)
+
+    async def _load_ids(self, query: Callable[[SQLAlchemyPostReadRepository], Awaitable[List[PostRecord]]]) -> List[str]:
+        async with self.session_factory() as session:
+            records = await query(SQLAlchemyPostReadRepository(session))
+        for record in records:
+            self.posts.set(record.id, record)
+        return [record.id for record in records]
+
+    async def _hydrate(self, post_ids: List[str]) -> List[PostRecord]:
+        found: Dict[str, PostRecord] = {}
+        missing = []
+        for post_id in post_ids:
+            record = self.posts.get(post_id)
+            if record is None:
+                missing.append(post_id)
+            else:
+                found[post_id] = record
+
+        POST_CACHE_REQUESTS.inc("hit", amount=len(found))
+        if missing:
+            POST_CACHE_REQUESTS.inc("miss", amount=len(missing))
+            async with self.session_factory() as session:
+                for record in await SQLAlchemyPostReadRepository(session).get_many(missing):
+                    self.posts.set(record.id, record)
+                    found[record.id] = record
+
+        # Порядок списка сохраняется; посты, удаленные после кэширования списка, пропускаются
+        return [found[post_id] for post_id in post_ids if post_id in found]
+
+
+post_query_cache = PostQueryCache()
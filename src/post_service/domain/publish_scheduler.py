@@ -0,0 +1,97 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Optional
+
+from .services import PostService
+from ..core.config import settings
+from ..core.db import AsyncSessionLocal
+from ..core.metrics import SCHEDULED_POSTS_PUBLISHED
+from ..mq.publisher import EventPublisher
+from ..repo.sql.repositories import SQLAlchemyPostRepository
+
+if TYPE_CHECKING:
+    from .title_suggester import TitleSuggester
+
+logger = logging.getLogger(__name__)
+
+
+class PublishScheduler:
+    """Публикация постов по scheduled_at.
+
+    Цикл не опрашивает таблицу с фиксированным интервалом: после обработки он берет ближайшее
+    scheduled_at из частичного индекса ix_posts_scheduled_at и спит до него (но не дольше
+    max_sleep - расписания, назначенные на других репликах, сюда не сигналят). Расписание,
+    назначенное в этом процессе, будит цикл через wake().
+
+    Наступившие посты забираются пачками по batch_size (FOR UPDATE SKIP LOCKED), так что цикл
+    можно запускать в каждом воркере и реплике. События post_published уходят после коммита пачки.
+    """
+
+    def __init__(self, event_publisher: Optional[EventPublisher] = None,
+                 title_suggester: Optional["TitleSuggester"] = None, batch_size: int = None,
+                 max_sleep: float = None, session_factory=AsyncSessionLocal):
+        self.event_publisher = event_publisher
+        self.title_suggester = title_suggester
+        self.batch_size = batch_size or settings.SCHEDULER_BATCH_SIZE
+        self.max_sleep = max_sleep or settings.SCHEDULER_MAX_SLEEP_SECONDS
+        self.session_factory = session_factory
+        self.next_due: Optional[datetime] = None
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def wake(self, scheduled_at: datetime):
+        """Новое расписание раньше ожидаемого - пересчитать время сна"""
+        if self.next_due is None or scheduled_at < self.next_due:
+            self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                delay = await self.run_once()
+            except Exception as e:
+                logger.error(f"Scheduled publishing failed: {e}")
+                delay = self.max_sleep
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run_once(self) -> float:
+        """Публикует все наступившие посты; возвращает, сколько спать до следующего"""
+        while True:
+            async with self.session_factory() as session:
+                post_service = PostService(SQLAlchemyPostRepository(session), title_suggester=self.title_suggester)
+                events = await post_service.publish_due_posts(self.batch_size)
+                await session.commit()
+
+            if events:
+                SCHEDULED_POSTS_PUBLISHED.inc(amount=len(events))
+                logger.info("Published %d scheduled posts", len(events))
+                if self.event_publisher:
+                    try:
+                        await self.event_publisher.publish_many(events)
+                    except Exception as e:
+                        # Посты уже опубликованы в БД - не останавливаем обработку остальных пачек
+                        logger.error(f"Failed to publish events for scheduled posts: {e}")
+            if len(events) < self.batch_size:
+                break
+
+        async with self.session_factory() as session:
+            self.next_due = await SQLAlchemyPostRepository(session).next_scheduled_at()
+        if self.next_due is None:
+            return self.max_sleep
+        # Наступивший, но не забранный пост держит транзакция другого воркера - короткая пауза вместо цикла вхолостую
+        return min(max(0.1, (self.next_due - datetime.now(timezone.utc)).total_seconds()), self.max_sleep)
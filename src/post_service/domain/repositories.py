@@ -1,9 +1,14 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional, Tuple
-from .models import Post
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+from .models import AuthorProfile, Post
 
 
 class PostRepository(ABC):
+    @abstractmethod
+    def after_commit(self, callback: Callable[[], None]) -> None:
+        pass
+
     @abstractmethod
     async def save(self, post: Post) -> Post:
         pass
@@ -13,12 +18,13 @@ class PostRepository(ABC):
         pass
 
     @abstractmethod
-    async def find_by_author(self, author_id: str, skip: int = 0, limit: int = 100) -> List[Post]:
+    async def find_by_author(self, author_id: str, skip: int = 0, limit: int = 100,
+                             game: Optional[str] = None) -> List[Post]:
         pass
 
     @abstractmethod
     async def find_published(self, skip: int = 0, limit: int = 100,
-                             tags: List[str] = None) -> List[Post]:
+                             tags: List[str] = None, game: Optional[str] = None) -> List[Post]:
         pass
 
     @abstractmethod
@@ -35,4 +41,131 @@ class PostRepository(ABC):
 
     @abstractmethod
     async def increment_view_count(self, post_id: str) -> bool:
-        pass
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    async def add_view_counts(self, counts: Dict[str, int]) -> None:
+        pass
+
+    @abstractmethod
+    async def apply_stats_updates(self, counter: str, updates: List[Tuple[str, int, int]]) -> List[str]:
+        pass
+
+    @abstractmethod
+    async def claim_due_scheduled(self, limit: int) -> List[Tuple]:
+        pass
+
+    @abstractmethod
+    async def next_scheduled_at(self) -> Optional[datetime]:
+        pass
+
+    @abstractmethod
+    async def archive_deleted(self, deleted_before: datetime, limit: int) -> int:
+        pass
+
+    @abstractmethod
+    async def get_stats(self, post_ids: List[str]) -> List[Tuple[str, int, int, int]]:
+        pass
+
+    @abstractmethod
+    async def insert_many(self, rows: List[Dict[str, Any]]) -> List[str]:
+        pass
+
+    @abstractmethod
+    def stream_posts(self, status: Optional[str] = None, author_id: Optional[str] = None,
+                     game: Optional[str] = None, updated_since: Optional[datetime] = None,
+                     include_deleted: bool = False,
+                     batch_size: int = 1000) -> AsyncIterator[List[Dict[str, Any]]]:
+        pass
+
+    @abstractmethod
+    async def find_changes(self, since: Optional[Tuple[datetime, str]] = None,
+                           until: Optional[datetime] = None, limit: int = 100) -> List[Post]:
+        pass
+
+    @abstractmethod
+    async def get_counter(self, key: str) -> Optional[int]:
+        pass
+
+    @abstractmethod
+    async def seed_counter(self, key: str, value: int) -> None:
+        pass
+
+    @abstractmethod
+    async def adjust_counters(self, deltas: Dict[str, int]) -> None:
+        pass
+
+    @abstractmethod
+    async def lock_counter(self, key: str) -> None:
+        pass
+
+    @abstractmethod
+    async def set_counter(self, key: str, value: int) -> None:
+        pass
+
+    @abstractmethod
+    async def counter_keys(self, after: Optional[str], limit: int) -> List[str]:
+        pass
+
+    @abstractmethod
+    async def try_lock_job(self, name: str) -> bool:
+        pass
+
+    @abstractmethod
+    async def top_counter_keys(self, prefix: str, limit: int) -> List[str]:
+        pass
+
+    @abstractmethod
+    async def count_posts(self, author_id: Optional[str] = None, published_only: bool = False,
+                          game: Optional[str] = None, tag: Optional[str] = None) -> int:
+        pass
+
+    @abstractmethod
+    async def estimate_posts(self, author_id: Optional[str] = None, published_only: bool = False,
+                             game: Optional[str] = None, tags: Optional[List[str]] = None,
+                             search_query: Optional[str] = None) -> int:
+        pass
+
+    @abstractmethod
+    async def get_author_profile(self, author_id: str) -> Optional[AuthorProfile]:
+        pass
+
+    @abstractmethod
+    async def build_author_profile(self, author_id: str, latest_limit: int) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    async def lock_author_profile(self, author_id: str) -> None:
+        pass
+
+    @abstractmethod
+    async def author_profile_ids(self, after: Optional[str], limit: int) -> List[str]:
+        pass
+
+    @abstractmethod
+    async def seed_author_profile(self, values: Dict[str, Any]) -> None:
+        pass
+
+    @abstractmethod
+    async def set_author_profile(self, values: Dict[str, Any]) -> None:
+        pass
+
+    @abstractmethod
+    async def adjust_author_profiles(self, deltas: Dict[str, Dict[str, int]]) -> None:
+        pass
+
+    @abstractmethod
+    async def push_latest_post(self, author_id: str, post_id: str, limit: int) -> None:
+        pass
+
+    @abstractmethod
+    async def refresh_latest_posts(self, author_ids: List[str], limit: int) -> None:
+        pass
+
+    @abstractmethod
+    async def get_service_state(self, key: str) -> Optional[Any]:
+        pass
+
+    @abstractmethod
+    async def set_service_state(self, key: str, value: Any) -> None:
+        pass
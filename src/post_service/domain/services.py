@@ -1,14 +1,54 @@
-from typing import List, Optional
-from .models import Post
+import base64
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from typing import TYPE_CHECKING, List, Optional, Tuple
+from .counters import (
+    PROFILE_COLUMNS, author_key, counter_deltas, counter_filters, merge_profile_deltas, profile_delta,
+    published_key, published_keys,
+)
+from .models import AuthorProfile, Post
+from .post_query_cache import post_query_cache
 from .repositories import PostRepository
 from .events import PostPublishedEvent, PostCreatedEvent, PostDeletedEvent, PostViewedEvent
 from ..mq.publisher import EventPublisher
+from ..core.cache import TTLCache
+from ..core.config import settings
+from ..core.exeptions import InvalidPostDataError
+from ..core.metrics import SCHEDULED_PUBLISH_LAG
+
+if TYPE_CHECKING:
+    from .live_hub import LiveHub
+    from .title_suggester import TitleSuggester
+    from .view_aggregator import ViewAggregator
+
+# Оценки количества для произвольных фильтров: EXPLAIN дешевле COUNT(*), но не бесплатен
+_estimate_cache = TTLCache(settings.TOTAL_ESTIMATE_TTL_SECONDS)
+
+
+def encode_change_cursor(changed_at: datetime, post_id: str) -> str:
+    raw = f"{changed_at.isoformat()}|{post_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_change_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        changed_at, post_id = raw.split("|", 1)
+        return datetime.fromisoformat(changed_at), post_id
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidPostDataError("Invalid changes cursor")
 
 
 class PostService:
-    def __init__(self, post_repo: PostRepository, event_publisher: Optional[EventPublisher] = None):
+    def __init__(self, post_repo: PostRepository, event_publisher: Optional[EventPublisher] = None,
+                 view_aggregator: Optional["ViewAggregator"] = None,
+                 title_suggester: Optional["TitleSuggester"] = None,
+                 live_hub: Optional["LiveHub"] = None):
         self.post_repo = post_repo
         self.event_publisher = event_publisher
+        self.view_aggregator = view_aggregator
+        self.title_suggester = title_suggester
+        self.live_hub = live_hub
 
     async def create_post(self, title: str, description: Optional[str], page: dict,
                           author_id: str, author_username: Optional[str] = None,
@@ -23,6 +63,8 @@ class PostService:
         )
 
         saved_post = await self.post_repo.save(post)
+        await self.post_repo.adjust_counters({author_key(author_id): 1})
+        await self.post_repo.adjust_author_profiles({author_id: profile_delta(saved_post.status, 1)})
 
         # Публикуем событие создания поста
         if self.event_publisher:
@@ -40,11 +82,23 @@ class PostService:
     async def publish_post(self, post_id: str, author_id: str, author_username: Optional[str] = None) -> Optional[Post]:
         post = await self.post_repo.find_by_id(post_id)
 
-        if not post or post.author_id != author_id:
+        if not post or post.author_id != author_id or post.is_deleted:
             return None
 
+        previous_status = post.status
         post.publish()
         updated_post = await self.post_repo.save(post)
+        if previous_status != "published":
+            await self.post_repo.adjust_counters(counter_deltas(published_keys(post.game, post.tags), 1))
+            profile_deltas = merge_profile_deltas({}, author_id, profile_delta(previous_status, -1))
+            await self.post_repo.adjust_author_profiles(
+                merge_profile_deltas(profile_deltas, author_id, profile_delta("published", 1))
+            )
+            await self.post_repo.push_latest_post(author_id, post_id, settings.AUTHOR_PROFILE_LATEST_POSTS)
+            # Кэши и подсказки - после коммита, иначе конкурентный запрос закэширует старое состояние
+            if self.title_suggester:
+                self.post_repo.after_commit(partial(self.title_suggester.published, post_id, post.title))
+            self.post_repo.after_commit(partial(post_query_cache.invalidate, post_id))
 
         # Публикуем событие публикации поста
         if self.event_publisher:
@@ -60,36 +114,245 @@ class PostService:
 
         return updated_post
 
-    async def view_post(self, post_id: str) -> Optional[Post]:
+    async def schedule_post(self, post_id: str, author_id: str, scheduled_at: Optional[datetime]) -> Optional[Post]:
+        """Назначает (или отменяет при scheduled_at=None) отложенную публикацию неопубликованного поста"""
         post = await self.post_repo.find_by_id(post_id)
 
-        if not post or post.status != "published":
+        if not post or post.author_id != author_id or post.is_deleted:
             return None
+        if post.status == "published":
+            raise InvalidPostDataError("Post is already published")
+
+        if scheduled_at is not None:
+            if scheduled_at.tzinfo is None:
+                scheduled_at = scheduled_at.replace(tzinfo=timezone.utc)
+            if scheduled_at <= datetime.now(timezone.utc):
+                raise InvalidPostDataError("scheduled_at must be in the future")
+
+        post.scheduled_at = scheduled_at
+        return await self.post_repo.save(post)
+
+    async def publish_due_posts(self, limit: int) -> List[PostPublishedEvent]:
+        """Публикует пачку постов с наступившим scheduled_at; возвращает события для отправки после коммита"""
+        rows = await self.post_repo.claim_due_scheduled(limit)
+        if not rows:
+            return []
+
+        deltas = {}
+        profile_deltas = {}
+        for _, author_id, _, game, tags, _, _, previous_status in rows:
+            deltas = counter_deltas(published_keys(game, tags), 1, deltas)
+            merge_profile_deltas(profile_deltas, author_id, profile_delta(previous_status, -1))
+            merge_profile_deltas(profile_deltas, author_id, profile_delta("published", 1))
+        await self.post_repo.adjust_counters(deltas)
+        await self.post_repo.adjust_author_profiles(profile_deltas)
+        await self.post_repo.refresh_latest_posts(list(profile_deltas), settings.AUTHOR_PROFILE_LATEST_POSTS)
+
+        if self.title_suggester:
+            for post_id, _, title, *_ in rows:
+                self.post_repo.after_commit(partial(self.title_suggester.published, post_id, title))
+        self.post_repo.after_commit(post_query_cache.invalidate)
 
-        await self.post_repo.increment_view_count(post_id)
+        for *_, published_at, scheduled_at, _ in rows:
+            SCHEDULED_PUBLISH_LAG.observe(max(0.0, (published_at - scheduled_at).total_seconds()))
+
+        return [
+            PostPublishedEvent(
+                post_id=post_id,
+                author_id=author_id,
+                author_username="unknown",
+                title=title,
+                published_at=published_at.isoformat()
+            )
+            for post_id, author_id, title, _, _, published_at, _, _ in rows
+        ]
+
+    async def delete_post(self, post_id: str, author_id: str) -> bool:
+        post = await self.post_repo.find_by_id(post_id)
+
+        if not post or post.author_id != author_id or post.is_deleted:
+            return False
+
+        if not await self.post_repo.delete(post_id):
+            return False
+
+        deltas = {author_key(author_id): -1}
+        if post.status == "published":
+            deltas = counter_deltas(published_keys(post.game, post.tags), -1, deltas)
+        await self.post_repo.adjust_counters(deltas)
+
+        await self.post_repo.adjust_author_profiles({author_id: profile_delta(
+            post.status, -1,
+            view_count=post.view_count, like_count=post.like_count, comment_count=post.comment_count
+        )})
+        if post.status == "published":
+            await self.post_repo.refresh_latest_posts([author_id], settings.AUTHOR_PROFILE_LATEST_POSTS)
+        if self.title_suggester:
+            self.post_repo.after_commit(partial(self.title_suggester.removed, post_id))
+        if self.live_hub:
+            # Подписчики получат gone и поток закроется
+            self.post_repo.after_commit(partial(self.live_hub.notify, post_id))
+        self.post_repo.after_commit(partial(post_query_cache.invalidate, post_id))
 
-        # Публикуем событие просмотра поста
         if self.event_publisher:
             await self.event_publisher.publish(
-                PostViewedEvent(
+                PostDeletedEvent(
                     post_id=post_id,
-                    author_id=post.author_id
+                    author_id=author_id
                 )
             )
 
-        return post
+        return True
 
-    async def update_post_stats(self, post_id: str, like_count: int = None,
-                                comment_count: int = None) -> Optional[Post]:
+    async def view_post(self, post_id: str, viewer_key: Optional[str] = None) -> Optional[Post]:
         post = await self.post_repo.find_by_id(post_id)
 
-        if not post:
+        if not post or post.status != "published":
             return None
 
-        if like_count is not None:
-            post.update_like_count(like_count)
+        if self.view_aggregator:
+            # Просмотр копится в памяти, в БД и брокер уходит агрегатом раз в окно
+            self.view_aggregator.record(post_id, post.author_id, viewer_key)
+        else:
+            await self.post_repo.increment_view_count(post_id)
+            await self.post_repo.adjust_author_profiles({post.author_id: profile_delta(None, 1, view_count=1)})
 
+        if self.live_hub:
+            # Просмотр из окна агрегатора другие реплики увидят только после его сброса
+            self.post_repo.after_commit(partial(self.live_hub.notify, post_id, broadcast=self.view_aggregator is None))
+
+        # Событие на каждый просмотр - только если явно включено
+        if self.event_publisher and settings.PUBLISH_PER_VIEW_EVENTS:
+            await self.event_publisher.publish(
+                PostViewedEvent(
+                    post_id=post_id,
+                    author_id=post.author_id
+                )
+            )
+
+        return post
+
+    async def update_post_stats(self, post_id: str, version: int, like_count: int = None,
+                                comment_count: int = None) -> bool:
+        """Счетчики из других сервисов: значение применяется, только если version новее сохраненной"""
+        applied = False
+        if like_count is not None:
+            applied |= bool(await self.post_repo.apply_stats_updates("like_count", [(post_id, like_count, version)]))
         if comment_count is not None:
-            post.update_comment_count(comment_count)
+            applied |= bool(await self.post_repo.apply_stats_updates(
+                "comment_count", [(post_id, comment_count, version)]
+            ))
+        return applied
+
+    async def get_post_stats(self, post_ids: List[str]) -> List[Tuple[str, int, int, int]]:
+        """Счетчики постов (id, view_count, like_count, comment_count) в порядке запроса"""
+        unique_ids = list(dict.fromkeys(post_ids))
+        rows = await self.post_repo.get_stats(unique_ids)
+
+        stats_by_id = {row[0]: row for row in rows}
+        if self.view_aggregator:
+            # Добавляем просмотры, накопленные агрегатором и еще не записанные в БД
+            stats_by_id = {
+                post_id: (post_id, (view_count or 0) + self.view_aggregator.pending_views(post_id),
+                          like_count, comment_count)
+                for post_id, (_, view_count, like_count, comment_count) in stats_by_id.items()
+            }
+        return [stats_by_id[post_id] for post_id in unique_ids if post_id in stats_by_id]
+
+    async def get_author_profile(self, author_id: str) -> AuthorProfile:
+        """Сводка автора - одно чтение по первичному ключу; при первом обращении считается по posts"""
+        profile = await self.post_repo.get_author_profile(author_id)
+        if profile is None:
+            # Как у счетчиков: под эксклюзивной блокировкой изменение, закоммиченное после подсчета, не потеряется
+            await self.post_repo.lock_author_profile(author_id)
+            profile = await self.post_repo.get_author_profile(author_id)
+            if profile is None:
+                values = await self.post_repo.build_author_profile(author_id, settings.AUTHOR_PROFILE_LATEST_POSTS)
+                await self.post_repo.seed_author_profile(values)
+                profile = await self.post_repo.get_author_profile(author_id)
+        return profile
+
+    async def reconcile_author_profile(self, author_id: str) -> int:
+        """Сверяет сводку автора с подсчетом по posts и исправляет ее; возвращает суммарное расхождение"""
+        await self.post_repo.lock_author_profile(author_id)
+        profile = await self.post_repo.get_author_profile(author_id)
+        if profile is None:
+            return 0
+        values = await self.post_repo.build_author_profile(author_id, settings.AUTHOR_PROFILE_LATEST_POSTS)
+        drift = sum(abs(values[column] - getattr(profile, column)) for column in PROFILE_COLUMNS)
+        if drift or values["latest_post_ids"] != list(profile.latest_post_ids):
+            await self.post_repo.set_author_profile(values)
+        return drift
+
+    async def get_changes(self, cursor: Optional[str] = None,
+                          limit: int = 100) -> Tuple[List[Post], Optional[str], bool]:
+        """Страница ленты изменений: (посты, курсор для продолжения, есть ли еще)"""
+        since = decode_change_cursor(cursor) if cursor else None
+        until = datetime.now(timezone.utc) - timedelta(seconds=settings.CHANGES_SAFETY_LAG_SECONDS)
+
+        posts = await self.post_repo.find_changes(since, until, limit + 1)
+        has_more = len(posts) > limit
+        posts = posts[:limit]
+
+        if posts:
+            last = posts[-1]
+            cursor = encode_change_cursor(last.updated_at or last.created_at, last.id)
+
+        return posts, cursor, has_more
+
+    async def _get_counter(self, key: str, **filters) -> int:
+        value = await self.post_repo.get_counter(key)
+        if value is None:
+            # Счетчик еще не заполнен - один раз считаем точно, дальше он поддерживается инкрементально.
+            # Под эксклюзивной блокировкой ключа: изменение, закоммиченное после COUNT, не потеряется
+            await self.post_repo.lock_counter(key)
+            value = await self.post_repo.get_counter(key)
+            if value is None:
+                value = await self.post_repo.count_posts(**filters)
+                await self.post_repo.seed_counter(key, value)
+        return value
+
+    async def reconcile_counter(self, key: str) -> int:
+        """Сверяет счетчик с COUNT(*) и исправляет его; возвращает найденное расхождение"""
+        filters = counter_filters(key)
+        if filters is None:
+            return 0
+        await self.post_repo.lock_counter(key)
+        stored = await self.post_repo.get_counter(key)
+        if stored is None:
+            return 0
+        actual = await self.post_repo.count_posts(**filters)
+        if actual != stored:
+            await self.post_repo.set_counter(key, actual)
+        return actual - stored
+
+    async def _estimate(self, **filters) -> int:
+        cache_key = tuple(sorted((name, tuple(value) if isinstance(value, list) else value)
+                                 for name, value in filters.items()))
+        value = _estimate_cache.get(cache_key)
+        if value is None:
+            value = await self.post_repo.estimate_posts(**filters)
+            _estimate_cache.set(cache_key, value)
+        return value
+
+    async def count_posts(self, author_id: Optional[str] = None, tags: Optional[List[str]] = None,
+                          game: Optional[str] = None) -> Tuple[int, bool]:
+        """Общее количество постов для списка: (total, total_is_estimate)"""
+        tags = sorted(set(tags or []))
+
+        if author_id:
+            if not game:
+                return await self._get_counter(author_key(author_id), author_id=author_id), False
+            return await self._estimate(author_id=author_id, game=game), True
+
+        if not tags and not game:
+            return await self._get_counter(published_key(), published_only=True), False
+        if game and not tags:
+            return await self._get_counter(published_key(game=game), published_only=True, game=game), False
+        if len(tags) == 1 and not game:
+            return await self._get_counter(published_key(tag=tags[0]), published_only=True, tag=tags[0]), False
+
+        return await self._estimate(published_only=True, game=game, tags=tags), True
 
-        return await self.post_repo.save(post)
\ No newline at end of file
+    async def count_search(self, query: str) -> Tuple[int, bool]:
+        return await self._estimate(published_only=True, search_query=query), True
@@ -0,0 +1,116 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+from .events import PostEvent
+from ..core.config import settings
+from ..core.db import AsyncSessionLocal
+from ..core.metrics import STATS_BATCH_SIZE
+from ..repo.sql.repositories import SQLAlchemyPostRepository
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class StatsUpdate:
+    post_id: str
+    counter: str  # like_count | comment_count
+    value: int
+    version: int
+
+
+# Старшие биты версии - ее вид. seq отправителя и время события в мкс несравнимы: seq всегда
+# меньше времени, и после одного значения по времени счетчик перестал бы обновляться по seq.
+# Версии с seq хранятся со сдвигом и новее любых версий по времени (время в мкс намного меньше 2^62)
+SEQ_VERSION_OFFSET = 1 << 62
+
+
+def source_version(event: PostEvent) -> int:
+    """Версия значения счетчика: seq отправителя, если он его передает, иначе время события в мкс.
+    timestamp к этому моменту заполнен consumer'ом - из тела, AMQP или времени первого получения"""
+    version = getattr(event, "version", None)
+    if version is not None:
+        return SEQ_VERSION_OFFSET + version
+    if event.timestamp is None:
+        raise ValueError(f"{event.event_type} has neither version nor timestamp")
+    return int(event.timestamp.timestamp() * 1_000_000)
+
+
+class StatsBatcher:
+    """Собирает обновления счетчиков из параллельно обрабатываемых сообщений в пачки.
+
+    submit() ждет коммита пачки, поэтому сообщение подтверждается только после записи.
+    Пачка уходит при накоплении max_batch обновлений или через max_delay после первого.
+    Из нескольких обновлений одного счетчика в пачке применяется самое новое, в БД
+    оно записывается условно (только если новее сохраненного) - порядок доставки не важен.
+    """
+
+    def __init__(self, max_batch: int = None, max_delay: float = None, session_factory=AsyncSessionLocal):
+        self.max_batch = max_batch or settings.STATS_BATCH_MAX_SIZE
+        self.max_delay = max_delay if max_delay is not None else settings.STATS_BATCH_MAX_DELAY_MS / 1000
+        self.session_factory = session_factory
+        self._pending: List[Tuple[StatsUpdate, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flush_tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, update: StatsUpdate) -> bool:
+        """True, если значение записано; False - пост не найден или пришло устаревшее значение"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((update, future))
+
+        if len(self._pending) >= self.max_batch:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._start_flush)
+
+        return await future
+
+    def _start_flush(self):
+        task = asyncio.create_task(self.flush())
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def close(self):
+        await self.flush()
+        if self._flush_tasks:
+            await asyncio.gather(*self._flush_tasks, return_exceptions=True)
+
+    async def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        # counter -> post_id -> самое новое обновление
+        latest: Dict[str, Dict[str, StatsUpdate]] = {}
+        for update, _ in batch:
+            current = latest.setdefault(update.counter, {}).get(update.post_id)
+            if current is None or update.version > current.version:
+                latest[update.counter][update.post_id] = update
+
+        try:
+            applied: Set[Tuple[str, str]] = set()
+            async with self.session_factory() as session:
+                repo = SQLAlchemyPostRepository(session)
+                for counter, updates in latest.items():
+                    applied_ids = await repo.apply_stats_updates(
+                        counter, [(u.post_id, u.value, u.version) for u in updates.values()]
+                    )
+                    applied.update((counter, post_id) for post_id in applied_ids)
+                await session.commit()
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        STATS_BATCH_SIZE.observe(len(batch))
+        for update, future in batch:
+            if future.done():
+                continue
+            winner = latest[update.counter][update.post_id]
+            future.set_result(winner is update and (update.counter, update.post_id) in applied)
@@ -0,0 +1,155 @@
+import asyncio
+import bisect
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from ..core.config import settings
+from ..core.db import AsyncSessionLocal
+from ..core.metrics import TITLE_SUGGEST_DB_FALLBACKS, TITLE_SUGGEST_ENTRIES
+from ..repo.sql.read_repository import SQLAlchemyPostReadRepository
+
+logger = logging.getLogger(__name__)
+
+
+def title_key(title: str) -> str:
+    """Ключ сортировки и поиска - как lower(title) COLLATE "C" в индексе ix_posts_title_prefix"""
+    return title.lower()
+
+
+class TitleIndex:
+    """Отсортированный массив (ключ, id, title) с поиском по префиксу через bisect"""
+
+    def __init__(self):
+        self._entries: List[Tuple[str, str, str]] = []
+        self._keys: Dict[str, str] = {}  # id -> ключ, для удаления и переименования
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, post_id: str) -> bool:
+        return post_id in self._keys
+
+    @classmethod
+    def build(cls, rows: List[Tuple[str, str]]) -> "TitleIndex":
+        """Индекс из (id, title) одной сортировкой, без вставок по одному"""
+        index = cls()
+        index._entries = sorted((title_key(title), post_id, title) for post_id, title in rows)
+        index._keys = {post_id: key for key, post_id, _ in index._entries}
+        return index
+
+    def add(self, post_id: str, title: str):
+        self.remove(post_id)
+        key = title_key(title)
+        bisect.insort(self._entries, (key, post_id, title))
+        self._keys[post_id] = key
+
+    def remove(self, post_id: str):
+        key = self._keys.pop(post_id, None)
+        if key is None:
+            return
+        i = bisect.bisect_left(self._entries, (key, post_id))
+        if i < len(self._entries) and self._entries[i][1] == post_id:
+            del self._entries[i]
+
+    def search(self, prefix: str, limit: int) -> List[Tuple[str, str]]:
+        prefix = title_key(prefix)
+        results = []
+        for i in range(bisect.bisect_left(self._entries, (prefix,)), len(self._entries)):
+            key, post_id, title = self._entries[i]
+            if not key.startswith(prefix) or len(results) >= limit:
+                break
+            results.append((post_id, title))
+        return results
+
+
+class TitleSuggester:
+    """Подсказки заголовков для поиска по мере ввода.
+
+    В памяти держится до max_entries заголовков опубликованных постов (последние опубликованные).
+    Индекс дополняется сразу при публикации и удалении в этом процессе, а изменения из других
+    воркеров и сервисов подтягиваются из ленты изменений (как /posts/changes) раз в refresh_seconds.
+    Если в память поместились не все посты и совпадений меньше limit, запрос уходит в
+    Postgres по индексу ix_posts_title_prefix.
+    """
+
+    def __init__(self, max_entries: int = None, refresh_seconds: float = None,
+                 session_factory=AsyncSessionLocal):
+        self.max_entries = max_entries or settings.TITLE_SUGGEST_MAX_ENTRIES
+        self.refresh_seconds = refresh_seconds or settings.TITLE_SUGGEST_REFRESH_SECONDS
+        self.session_factory = session_factory
+        self.index = TitleIndex()
+        self.loaded = False
+        self.complete = False  # В памяти все опубликованные посты - в БД ходить не нужно
+        self._since: Optional[Tuple[datetime, str]] = None
+        self._task: Optional[asyncio.Task] = None
+
+        TITLE_SUGGEST_ENTRIES.set_callback(lambda: {(): len(self.index)})
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        while True:
+            try:
+                if not self.loaded:
+                    await self.load()
+                else:
+                    await self.refresh()
+            except Exception as e:
+                logger.error(f"Failed to refresh title suggestions: {e}")
+            await asyncio.sleep(self.refresh_seconds)
+
+    async def load(self):
+        # Курсор ленты ставится до чтения: изменения, идущие параллельно с загрузкой, будут применены повторно
+        since = (datetime.now(timezone.utc) - timedelta(seconds=settings.CHANGES_SAFETY_LAG_SECONDS), "")
+        async with self.session_factory() as session:
+            rows = await SQLAlchemyPostReadRepository(session).list_published_titles(self.max_entries + 1)
+
+        index = self.index = TitleIndex.build(rows[:self.max_entries])
+        self.complete = len(rows) <= self.max_entries
+        self._since = since
+        self.loaded = True
+        logger.info("Loaded %d titles for suggestions (complete=%s)", len(index), self.complete)
+
+    async def refresh(self):
+        until = datetime.now(timezone.utc) - timedelta(seconds=settings.CHANGES_SAFETY_LAG_SECONDS)
+        async with self.session_factory() as session:
+            repo = SQLAlchemyPostReadRepository(session)
+            while True:
+                changes = await repo.find_title_changes(self._since, until, settings.TITLE_SUGGEST_REFRESH_BATCH)
+                for post_id, title, status, is_deleted, changed_at in changes:
+                    if status == "published" and not is_deleted:
+                        self.published(post_id, title)
+                    else:
+                        self.removed(post_id)
+                if changes:
+                    self._since = (changes[-1][4], changes[-1][0])
+                if len(changes) < settings.TITLE_SUGGEST_REFRESH_BATCH:
+                    break
+
+    def published(self, post_id: str, title: str):
+        if post_id not in self.index and len(self.index) >= self.max_entries:
+            self.complete = False
+            return
+        self.index.add(post_id, title)
+
+    def removed(self, post_id: str):
+        self.index.remove(post_id)
+
+    async def suggest(self, prefix: str, limit: int) -> List[Tuple[str, str]]:
+        results = self.index.search(prefix, limit) if self.loaded else []
+        if len(results) >= limit or (self.loaded and self.complete):
+            return results
+
+        TITLE_SUGGEST_DB_FALLBACKS.inc()
+        async with self.session_factory() as session:
+            return await SQLAlchemyPostReadRepository(session).suggest_titles(prefix, limit)
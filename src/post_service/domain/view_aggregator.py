@@ -0,0 +1,174 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from .counters import merge_profile_deltas, profile_delta
+from .events import PostViewCount, PostViewsAggregatedEvent
+from ..core.config import settings
+from ..core.db import AsyncSessionLocal
+from ..core.hyperloglog import HyperLogLog
+from ..core.metrics import VIEWS_AGGREGATED, VIEWS_PENDING_POSTS
+from ..mq.publisher import EventPublisher
+from ..repo.sql.repositories import SQLAlchemyPostRepository
+
+if TYPE_CHECKING:
+    from .live_hub import LiveHub
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _PendingViews:
+    author_id: str
+    views: int = 0
+    viewers: Optional[HyperLogLog] = None
+
+
+@dataclass
+class _Window:
+    started_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    posts: Dict[str, _PendingViews] = field(default_factory=dict)
+
+
+class ViewAggregator:
+    """Накопление просмотров постов в памяти с периодическим сбросом.
+
+    record() - только обновление словаря, без БД и брокера. Раз в window_seconds
+    накопленные просмотры прибавляются к view_count одним UPDATE в одной транзакции,
+    после коммита публикуется событие post_views_aggregated (пачками по max_posts_per_event).
+    Если запись в БД не удалась, просмотры возвращаются в текущее окно и уйдут со следующим сбросом.
+    """
+
+    def __init__(self, event_publisher: Optional[EventPublisher] = None, window_seconds: float = None,
+                 sketch_precision: int = None, max_posts_per_event: int = None,
+                 session_factory=AsyncSessionLocal):
+        self.event_publisher = event_publisher
+        self.window_seconds = window_seconds or settings.VIEW_AGGREGATION_WINDOW_SECONDS
+        self.sketch_precision = (settings.VIEW_UNIQUE_SKETCH_PRECISION
+                                 if sketch_precision is None else sketch_precision)
+        self.max_posts_per_event = max_posts_per_event or settings.VIEW_AGGREGATION_MAX_POSTS_PER_EVENT
+        self.session_factory = session_factory
+        # Задается в lifespan после создания хаба: хаб сам читает pending_views агрегатора
+        self.live_hub: Optional["LiveHub"] = None
+        self._window = _Window()
+        # Окно, которое сейчас записывается в БД: его просмотры еще не видны в view_count
+        self._flushing: Optional[_Window] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+
+        VIEWS_PENDING_POSTS.set_callback(lambda: {(): len(self._window.posts)})
+
+    def record(self, post_id: str, author_id: str, viewer_key: Optional[str] = None):
+        pending = self._window.posts.get(post_id)
+        if pending is None:
+            pending = self._window.posts[post_id] = _PendingViews(author_id)
+        pending.views += 1
+
+        if viewer_key and self.sketch_precision:
+            if pending.viewers is None:
+                pending.viewers = HyperLogLog(self.sketch_precision)
+            pending.viewers.add(viewer_key)
+
+    def pending_views(self, post_id: str) -> int:
+        """Просмотры, еще не записанные в БД - добавляются к view_count в ответах /stats"""
+        views = 0
+        for window in (self._window, self._flushing):
+            pending = window.posts.get(post_id) if window else None
+            if pending:
+                views += pending.views
+        return views
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        # Без cancel: отмена посреди flush могла потерять окно или записать его дважды.
+        # Цикл дописывает текущий сброс и выходит, оставшееся уходит последним flush
+        self._stopping.set()
+        if self._task:
+            await self._task
+        await self.flush()
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.window_seconds)
+                break
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Failed to flush aggregated views: {e}")
+
+    async def flush(self):
+        async with self._flush_lock:
+            window, self._window = self._window, _Window()
+            if not window.posts:
+                return
+
+            counts = {post_id: pending.views for post_id, pending in window.posts.items()}
+            self._flushing = window
+            try:
+                async with self.session_factory() as session:
+                    repo = SQLAlchemyPostRepository(session)
+                    await repo.add_view_counts(counts)
+                    await repo.adjust_author_profiles(self._author_views(window))
+                    await session.commit()
+            except Exception:
+                self._restore(window)
+                raise
+            finally:
+                self._flushing = None
+
+            VIEWS_AGGREGATED.inc(amount=sum(counts.values()))
+            if self.live_hub:
+                # Просмотры записаны в БД - теперь их увидят подписчики в других репликах
+                self.live_hub.notify_many(counts)
+            if self.event_publisher:
+                await self.event_publisher.publish_many(self._build_events(window, datetime.now(timezone.utc)))
+
+    @staticmethod
+    def _author_views(window: _Window) -> Dict[str, Dict[str, int]]:
+        author_views: Dict[str, Dict[str, int]] = {}
+        for pending in window.posts.values():
+            merge_profile_deltas(author_views, pending.author_id, profile_delta(None, 1, view_count=pending.views))
+        return author_views
+
+    def _restore(self, window: _Window):
+        current = self._window
+        current.started_at = min(current.started_at, window.started_at)
+        for post_id, pending in window.posts.items():
+            existing = current.posts.get(post_id)
+            if existing is None:
+                current.posts[post_id] = pending
+                continue
+            existing.views += pending.views
+            if pending.viewers is not None:
+                if existing.viewers is None:
+                    existing.viewers = pending.viewers
+                else:
+                    existing.viewers.merge(pending.viewers)
+
+    def _build_events(self, window: _Window, ended_at: datetime) -> List[PostViewsAggregatedEvent]:
+        counts = [
+            PostViewCount(
+                post_id=post_id,
+                author_id=pending.author_id,
+                views=pending.views,
+                unique_viewers=pending.viewers.count() if pending.viewers else None,
+                viewers_sketch=pending.viewers.to_base64() if pending.viewers else None,
+            )
+            for post_id, pending in window.posts.items()
+        ]
+        return [
+            PostViewsAggregatedEvent(
+                window_start=window.started_at,
+                window_end=ended_at,
+                posts=counts[i:i + self.max_posts_per_event],
+            )
+            for i in range(0, len(counts), self.max_posts_per_event)
+        ]
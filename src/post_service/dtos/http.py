@@ -1,5 +1,5 @@
-from pydantic import BaseModel, ConfigDict
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Optional, Dict, Any, Literal
 from datetime import datetime
 
 
@@ -43,6 +43,16 @@ class PostResponse(BaseModel):
     created_at: datetime
     updated_at: Optional[datetime] = None
     published_at: Optional[datetime] = None
+    scheduled_at: Optional[datetime] = None  # Отложенная публикация, если назначена
+
+
+class PostScheduleRequest(BaseModel):
+    scheduled_at: datetime  # Без часового пояса считается UTC
+
+
+class PostSuggestion(BaseModel):
+    id: str
+    title: str
 
 
 class PostStatsResponse(BaseModel):
@@ -52,8 +62,69 @@ class PostStatsResponse(BaseModel):
     comment_count: int
 
 
+class PostStatsBulkRequest(BaseModel):
+    post_ids: List[str] = Field(..., min_length=1, max_length=1000)
+
+
 class PostListResponse(BaseModel):
     posts: List[PostResponse]
     total: int
+    total_is_estimate: bool = False  # total - оценка планировщика, а не точный счетчик
     page: int
-    size: int
\ No newline at end of file
+    size: int
+
+
+class PostChange(BaseModel):
+    id: str
+    changed_at: datetime
+    deleted: bool
+    post: Optional[PostResponse] = None  # Для удаленных постов не заполняется
+
+
+class PostChangesResponse(BaseModel):
+    changes: List[PostChange]
+    next_cursor: Optional[str] = None  # Передается в since следующего запроса
+    has_more: bool
+
+class PostImportRecord(BaseModel):
+    """Одна строка NDJSON при массовом импорте (миграция из legacy CMS)"""
+    id: Optional[str] = Field(None, max_length=255)  # Сохраняем исходный ID, чтобы повторный импорт был идемпотентным
+    title: str = Field(..., min_length=1, max_length=255)
+    description: Optional[str] = None
+    page: Dict[str, Any]
+    author_id: str = Field(..., min_length=1)
+    author_username: Optional[str] = None
+    game: Optional[str] = Field(None, max_length=255)
+    status: Literal["draft", "published", "archived"] = "draft"
+    tags: List[str] = []
+    view_count: int = Field(0, ge=0)
+    like_count: int = Field(0, ge=0)
+    comment_count: int = Field(0, ge=0)
+    created_at: Optional[datetime] = None
+    published_at: Optional[datetime] = None
+
+
+class PostImportError(BaseModel):
+    line: int
+    error: str
+
+
+class PostImportResponse(BaseModel):
+    imported: int
+    skipped: int  # Уже существующие ID (повторный импорт)
+    failed: int
+    errors: List[PostImportError]
+
+
+class AuthorProfileResponse(BaseModel):
+    """Сводка автора для страницы профиля (по неудаленным постам)"""
+    model_config = ConfigDict(from_attributes=True)
+
+    author_id: str
+    draft_posts: int
+    published_posts: int
+    total_views: int
+    total_likes: int
+    total_comments: int
+    latest_post_ids: List[str]  # Последние опубликованные, новые первыми
+    updated_at: Optional[datetime] = None
@@ -0,0 +1,77 @@
+"""Кодирование событий для RabbitMQ.
+
+Формат выбирается по content_type сообщения: application/json (по умолчанию, понимают все
+сервисы) или application/msgpack (компактнее и быстрее, если установлен msgpack).
+Декодирование - один проход с валидацией: для JSON байты сразу идут в
+model_validate_json нужной модели, без промежуточного dict.
+"""
+import json
+from typing import Optional, Tuple
+
+from pydantic import BaseModel
+
+from ..core.config import settings
+from ..domain.events import EVENT_SCHEMAS, PostEvent
+
+try:
+    import msgpack
+except ImportError:  # msgpack - опциональная зависимость
+    msgpack = None
+
+JSON_CONTENT_TYPE = "application/json"
+MSGPACK_CONTENT_TYPE = "application/msgpack"
+# Варианты, которые встречаются у других клиентов
+_MSGPACK_ALIASES = {MSGPACK_CONTENT_TYPE, "application/x-msgpack", "application/vnd.msgpack"}
+
+SCHEMA_VERSION_HEADER = "schema_version"
+
+
+class EventDecodeError(Exception):
+    pass
+
+
+def _is_msgpack(content_type: Optional[str]) -> bool:
+    return content_type in _MSGPACK_ALIASES
+
+
+def _unpack(body: bytes) -> dict:
+    if msgpack is None:
+        raise EventDecodeError("msgpack message received, but msgpack is not installed")
+    return msgpack.unpackb(body, raw=False)
+
+
+def encode_event(event: BaseModel, content_type: Optional[str] = None) -> Tuple[bytes, str]:
+    """Тело сообщения и его content_type"""
+    content_type = content_type or settings.EVENT_CONTENT_TYPE
+    if _is_msgpack(content_type) and msgpack is not None:
+        return msgpack.packb(event.model_dump(mode="json")), MSGPACK_CONTENT_TYPE
+    return event.model_dump_json().encode(), JSON_CONTENT_TYPE
+
+
+def peek_event_type(body: bytes, content_type: Optional[str]) -> Optional[str]:
+    """event_type из тела - запасной путь, если тип не удалось определить по routing key и заголовкам"""
+    try:
+        data = _unpack(body) if _is_msgpack(content_type) else json.loads(body)
+    except (ValueError, EventDecodeError):
+        return None
+    return data.get("event_type") if isinstance(data, dict) else None
+
+
+def decode_event(event_type: str, body: bytes, content_type: Optional[str] = None,
+                 schema_version: Optional[int] = None) -> PostEvent:
+    """Разбирает и валидирует тело сообщения моделью события нужного типа и версии схемы"""
+    versions = EVENT_SCHEMAS.get(event_type)
+    if not versions:
+        raise EventDecodeError(f"Unknown event type: {event_type}")
+
+    # Внешние сервисы версию не передают - для них берется первая
+    model = versions.get(schema_version or 1)
+    if model is None:
+        raise EventDecodeError(f"Unsupported schema_version {schema_version} for {event_type}")
+
+    try:
+        if _is_msgpack(content_type):
+            return model.model_validate(_unpack(body))
+        return model.model_validate_json(body)
+    except ValueError as e:
+        raise EventDecodeError(f"Invalid {event_type} event: {e}") from e
@@ -1,25 +1,49 @@
-import json
+import asyncio
 import logging
+import time
+from datetime import datetime, timezone
 import aio_pika
-from aio_pika.abc import AbstractRobustConnection
-from typing import Dict, Callable, Any
+from aio_pika.abc import AbstractIncomingMessage, AbstractRobustConnection
+from typing import Awaitable, Callable, Dict, Optional
+from ..core.cache import LRUSet
 from ..core.config import settings
+from ..core.logging import SAMPLED
+from ..core.metrics import (
+    CONSUMER_DEAD_LETTERED, CONSUMER_DUPLICATES, CONSUMER_HANDLER_DURATION, CONSUMER_IN_FLIGHT,
+    CONSUMER_QUEUE_DEPTH, CONSUMER_RETRIES,
+)
+from ..domain.events import PostEvent
+from .codec import SCHEMA_VERSION_HEADER, EventDecodeError, decode_event, peek_event_type
+from .topology import (
+    FIRST_RECEIVED_HEADER, ORIGINAL_ROUTING_KEY_HEADER, RETRY_COUNT_HEADER, declare_topology, original_routing_key,
+    retry_queue_name,
+)
 
 logger = logging.getLogger(__name__)
 
+# Routing key внешних сервисов -> тип события
+ROUTING_KEY_EVENT_TYPES = {
+    "likes.updated": "post_likes_updated",
+    "likes.post_likes_updated": "post_likes_updated",
+    "comments.updated": "post_comments_updated",
+    "comments.post_comments_updated": "post_comments_updated",
+}
+
 
 class EventConsumer:
     def __init__(self):
         self.connection: AbstractRobustConnection = None
         self.channel: aio_pika.abc.AbstractChannel = None
-        self.handlers: Dict[str, Callable] = {}
+        self.handlers: Dict[str, Callable[[PostEvent], Awaitable[None]]] = {}
+        self.queue: aio_pika.abc.AbstractQueue = None
+        self._processed_ids = LRUSet(settings.CONSUMER_DEDUP_SIZE)
 
     async def connect(self):
         try:
             self.connection = await aio_pika.connect_robust(settings.RABBITMQ_URL)
             self.channel = await self.connection.channel()
 
-            await self.channel.set_qos(prefetch_count=10)
+            await self.channel.set_qos(prefetch_count=settings.CONSUMER_PREFETCH)
 
             logger.info("Event consumer connected to RabbitMQ successfully")
 
@@ -27,65 +51,148 @@ class EventConsumer:
             logger.error(f"Failed to connect to RabbitMQ: {e}")
             raise
 
-    def register_handler(self, event_type: str, handler: Callable[[Dict[str, Any]], None]):
+    @property
+    def is_connected(self) -> bool:
+        return self.channel is not None and self.connection is not None and not self.connection.is_closed
+
+    def register_handler(self, event_type: str, handler: Callable[[PostEvent], Awaitable[None]]):
         self.handlers[event_type] = handler
         logger.debug(f"Handler registered for event type: {event_type}")
 
-    async def start_consuming(self, queue_name: str = "posts_events"):
+    async def start_consuming(self):
         if not self.channel:
             await self.connect()
 
-        exchange = await self.channel.declare_exchange(
-            "blog_events",
-            aio_pika.ExchangeType.TOPIC,
-            durable=True
-        )
+        self.queue = queue = await declare_topology(self.channel, settings.CONSUMER_RETRY_DELAYS_SECONDS)
+        logger.info(f"Started consuming from queue: {queue.name}")
 
-        queue = await self.channel.declare_queue(
-            queue_name,
-            durable=True,
-            arguments={
-                "x-dead-letter-exchange": "dead_letters",
-                "x-dead-letter-routing-key": "posts_events_dl"
-            }
+        # Сообщения обрабатываются параллельно (до CONSUMER_PREFETCH): обработчики счетчиков
+        # идемпотентны и не зависят от порядка доставки
+        slots = asyncio.Semaphore(settings.CONSUMER_PREFETCH)
+        tasks = set()
+        try:
+            async with queue.iterator() as queue_iter:
+                async for message in queue_iter:
+                    await slots.acquire()
+                    task = asyncio.create_task(self._process(message))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                    task.add_done_callback(lambda _: slots.release())
+        finally:
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _process(self, message: AbstractIncomingMessage):
+        CONSUMER_IN_FLIGHT.inc()
+        received_at = self._received_at(message)
+        try:
+            # ack при успехе; при ошибке сообщение уходит в очередь повтора или в DLQ - явно ниже
+            async with message.process(requeue=False, ignore_processed=True):
+                try:
+                    await self._dispatch(message, received_at)
+                except EventDecodeError as e:
+                    # Повтор не поможет - сразу в DLQ
+                    logger.warning("Invalid message (routing_key: %s): %s", message.routing_key, e)
+                    CONSUMER_DEAD_LETTERED.inc("invalid")
+                    await message.reject(requeue=False)
+                except Exception as e:
+                    logger.error(f"Error processing message: {e}")
+                    await self._retry_or_dead_letter(message, received_at)
+        finally:
+            CONSUMER_IN_FLIGHT.dec()
+
+    @staticmethod
+    def _received_at(message: AbstractIncomingMessage) -> datetime:
+        """Время для событий без своего timestamp: timestamp AMQP, иначе время первого получения"""
+        if message.timestamp is not None:
+            timestamp = message.timestamp
+            return timestamp if timestamp.tzinfo else timestamp.replace(tzinfo=timezone.utc)
+        first_received = (message.headers or {}).get(FIRST_RECEIVED_HEADER)
+        if first_received:
+            try:
+                return datetime.fromisoformat(str(first_received))
+            except ValueError:
+                logger.warning("Malformed %s header: %s", FIRST_RECEIVED_HEADER, first_received)
+        return datetime.now(timezone.utc)
+
+    async def _retry_or_dead_letter(self, message: AbstractIncomingMessage, received_at: datetime):
+        """Повтор с экспоненциально растущей задержкой (CONSUMER_RETRY_DELAYS_SECONDS), затем DLQ"""
+        delays = settings.CONSUMER_RETRY_DELAYS_SECONDS
+        headers = dict(message.headers or {})
+        attempt = int(headers.get(RETRY_COUNT_HEADER, 0))
+        event_type = self._event_type(message) or "unknown"
+
+        if attempt >= len(delays):
+            logger.error("Message %s dead-lettered after %d retries (%s)", message.message_id, attempt, event_type)
+            CONSUMER_DEAD_LETTERED.inc(event_type)
+            await message.reject(requeue=False)
+            return
+
+        headers[RETRY_COUNT_HEADER] = attempt + 1
+        headers[ORIGINAL_ROUTING_KEY_HEADER] = original_routing_key(message)
+        headers.setdefault(FIRST_RECEIVED_HEADER, received_at.isoformat())
+        headers.pop("x-death", None)
+        await self.channel.default_exchange.publish(
+            aio_pika.Message(
+                body=message.body,
+                content_type=message.content_type,
+                type=message.type,
+                message_id=message.message_id,
+                timestamp=message.timestamp,
+                headers=headers,
+                delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+            ),
+            routing_key=retry_queue_name(delays[attempt]),
         )
-
-        await queue.bind(exchange, "posts.*")
-        await queue.bind(exchange, "likes.updated")
-        await queue.bind(exchange, "comments.updated")
-        
-        # Также биндим на возможные варианты от других сервисов
-        await queue.bind(exchange, "likes.post_likes_updated")
-        await queue.bind(exchange, "comments.post_comments_updated")
-
-        logger.info(f"Started consuming from queue: {queue_name}")
-
-        async with queue.iterator() as queue_iter:
-            async for message in queue_iter:
-                async with message.process():
-                    try:
-                        event_data = json.loads(message.body.decode())
-                        routing_key = message.routing_key or ""
-                        
-                        # Определяем тип события по routing_key или по event_type в теле сообщения
-                        if routing_key.startswith("posts."):
-                            event_type = event_data.get("event_type")
-                        elif routing_key == "likes.updated":
-                            event_type = "post_likes_updated"
-                        elif routing_key == "comments.updated":
-                            event_type = "post_comments_updated"
-                        else:
-                            event_type = event_data.get("event_type")
-
-                        if event_type and event_type in self.handlers:
-                            await self.handlers[event_type](event_data)
-                            logger.debug(f"Event processed: {event_type} (routing_key: {routing_key})")
-                        else:
-                            logger.warning(f"No handler for event type: {event_type} (routing_key: {routing_key})")
-
-                    except Exception as e:
-                        logger.error(f"Error processing message: {e}")
-                        # Message will be rejected and go to DLQ
+        # ack только после подтверждения публикации в очередь повтора
+        await message.ack()
+        CONSUMER_RETRIES.inc(event_type)
+
+    @staticmethod
+    def _event_type(message: AbstractIncomingMessage) -> Optional[str]:
+        """Тип события по routing key, затем по свойству type; разбор тела - только в крайнем случае"""
+        routing_key = original_routing_key(message) or ""
+        if routing_key in ROUTING_KEY_EVENT_TYPES:
+            return ROUTING_KEY_EVENT_TYPES[routing_key]
+        if routing_key.startswith("posts."):
+            return routing_key[len("posts."):]
+        return message.type or peek_event_type(message.body, message.content_type)
+
+    async def _dispatch(self, message: AbstractIncomingMessage, received_at: datetime):
+        # Повторная доставка (redelivery, дубль у отправителя) - уже обработано
+        if message.message_id and message.message_id in self._processed_ids:
+            CONSUMER_DUPLICATES.inc()
+            logger.debug("Duplicate message skipped: %s", message.message_id, extra=SAMPLED)
+            return
+
+        event_type = self._event_type(message)
+        handler = self.handlers.get(event_type)
+        if handler is None:
+            logger.warning("No handler for event type: %s (routing_key: %s)", event_type, message.routing_key)
+            return
+
+        schema_version = (message.headers or {}).get(SCHEMA_VERSION_HEADER)
+        event = decode_event(event_type, message.body, message.content_type, schema_version)
+        if event.timestamp is None:
+            event.timestamp = received_at
+
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            await handler(event)
+            outcome = "ok"
+        finally:
+            CONSUMER_HANDLER_DURATION.observe(time.perf_counter() - start, event_type, outcome)
+        if message.message_id:
+            self._processed_ids.add(message.message_id)
+        logger.debug("Event processed: %s (routing_key: %s)", event_type, message.routing_key, extra=SAMPLED)
+
+    async def refresh_queue_depth(self):
+        """Обновляет gauge глубины очереди (пассивный declare возвращает message_count)"""
+        if not self.queue:
+            return
+        declare_result = await self.queue.declare()
+        CONSUMER_QUEUE_DEPTH.set(declare_result.message_count, self.queue.name)
 
     async def close(self):
         if self.connection:
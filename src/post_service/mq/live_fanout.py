@@ -0,0 +1,84 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+from typing import Callable, List
+
+import aio_pika
+from aio_pika.abc import AbstractIncomingMessage, AbstractRobustConnection
+from pydantic_core import to_json
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+LIVE_EXCHANGE = "posts_live"
+
+
+class LiveFanout:
+    """Уведомления об изменившихся счетчиках между репликами для живых подписок.
+
+    В fanout exchange posts_live уходят только id постов (одно сообщение на интервал LiveHub),
+    значения каждая реплика перечитывает сама. У процесса своя эксклюзивная очередь без
+    персистентности и с коротким TTL: пропущенное уведомление закроет периодическая пересинхронизация.
+    """
+
+    def __init__(self, on_changed: Callable[[List[str]], None]):
+        self.on_changed = on_changed
+        self.instance_id = f"{socket.gethostname()}-{os.getpid()}"
+        self.connection: AbstractRobustConnection = None
+        self.exchange: aio_pika.abc.AbstractExchange = None
+
+    @property
+    def is_connected(self) -> bool:
+        return self.exchange is not None and self.connection is not None and not self.connection.is_closed
+
+    async def connect(self):
+        self.connection = await aio_pika.connect_robust(settings.RABBITMQ_URL)
+        channel = await self.connection.channel()
+        exchange = await channel.declare_exchange(LIVE_EXCHANGE, aio_pika.ExchangeType.FANOUT)
+        queue = await channel.declare_queue(
+            exclusive=True,
+            auto_delete=True,
+            arguments={"x-message-ttl": int(settings.LIVE_RESYNC_SECONDS * 1000)},
+        )
+        await queue.bind(exchange)
+        await queue.consume(self._on_message, no_ack=True)
+        self.exchange = exchange
+        logger.info("Live fanout connected to RabbitMQ")
+
+    async def connect_with_retry(self):
+        delay = 1
+        while not self.is_connected:
+            try:
+                await self.connect()
+            except Exception as e:
+                logger.warning(f"Live fanout is unavailable ({e}), retrying in {delay}s")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, settings.RABBITMQ_CONNECT_MAX_DELAY_SECONDS)
+
+    async def publish(self, post_ids: List[str]):
+        if not self.exchange:
+            return
+        await self.exchange.publish(
+            aio_pika.Message(
+                body=to_json(post_ids),
+                content_type="application/json",
+                app_id=self.instance_id,
+                delivery_mode=aio_pika.DeliveryMode.NOT_PERSISTENT,
+            ),
+            routing_key="",
+        )
+
+    async def _on_message(self, message: AbstractIncomingMessage):
+        if message.app_id == self.instance_id:
+            return
+        try:
+            self.on_changed(json.loads(message.body))
+        except Exception as e:
+            logger.warning(f"Skipped malformed live notification: {e}")
+
+    async def close(self):
+        if self.connection:
+            await self.connection.close()
@@ -1,8 +1,11 @@
-import json
+import asyncio
 import logging
 import aio_pika
 from aio_pika.abc import AbstractRobustConnection
 from ..core.config import settings
+from ..core.logging import SAMPLED
+from ..core.metrics import AMQP_PUBLISH_DURATION
+from .codec import SCHEMA_VERSION_HEADER, encode_event
 
 logger = logging.getLogger(__name__)
 
@@ -30,28 +33,73 @@ class EventPublisher:
             logger.error(f"Failed to connect to RabbitMQ: {e}")
             raise
 
+    @property
+    def is_connected(self) -> bool:
+        return self.exchange is not None and self.connection is not None and not self.connection.is_closed
+
+    async def connect_with_retry(self):
+        """Подключение в фоне: пока RabbitMQ недоступен, сервис стартует и обслуживает запросы,
+        события в это время не публикуются (publish пишет ошибку в лог)."""
+        delay = 1
+        while not self.is_connected:
+            try:
+                await self.connect()
+            except Exception:
+                logger.warning(f"RabbitMQ is unavailable, retrying publisher connection in {delay}s")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, settings.RABBITMQ_CONNECT_MAX_DELAY_SECONDS)
+
+    @staticmethod
+    def _build_message(event) -> aio_pika.Message:
+        body, content_type = encode_event(event)
+        return aio_pika.Message(
+            body=body,
+            content_type=content_type,
+            # Тип и версия схемы в свойствах сообщения: consumer выбирает декодер, не разбирая тело
+            type=event.event_type,
+            message_id=event.event_id,
+            headers={SCHEMA_VERSION_HEADER: event.schema_version},
+            timestamp=event.timestamp,
+            delivery_mode=aio_pika.DeliveryMode.PERSISTENT
+        )
+
     async def publish(self, event):
         if not self.exchange:
             logger.error("Event publisher not connected")
             return
 
         try:
-            message_body = json.dumps(event.dict()).encode()
-            message = aio_pika.Message(
-                body=message_body,
-                content_type="application/json",
-                delivery_mode=aio_pika.DeliveryMode.PERSISTENT
-            )
-
             routing_key = f"posts.{event.event_type}"
-            await self.exchange.publish(message, routing_key=routing_key)
+            with AMQP_PUBLISH_DURATION.time(event.event_type):
+                await self.exchange.publish(self._build_message(event), routing_key=routing_key)
 
-            logger.debug(f"Event published: {event.event_type} -> {routing_key}")
+            logger.debug("Event published: %s -> %s", event.event_type, routing_key, extra=SAMPLED)
 
         except Exception as e:
             logger.error(f"Failed to publish event: {e}")
             raise
 
+    async def publish_many(self, events):
+        """Публикация пачки событий: сообщения отправляются конвейером, без ожидания каждого подтверждения"""
+        if not events:
+            return
+        if not self.exchange:
+            logger.error("Event publisher not connected")
+            return
+
+        try:
+            with AMQP_PUBLISH_DURATION.time("batch"):
+                await asyncio.gather(*(
+                    self.exchange.publish(self._build_message(event), routing_key=f"posts.{event.event_type}")
+                    for event in events
+                ))
+
+            logger.debug("Published batch of %d events", len(events), extra=SAMPLED)
+
+        except Exception as e:
+            logger.error(f"Failed to publish events batch: {e}")
+            raise
+
     async def close(self):
         if self.connection:
             await self.connection.close()
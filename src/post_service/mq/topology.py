@@ -0,0 +1,90 @@
+"""Очереди и exchange consumer'а.
+
+    blog_events (topic) -> posts_events -> обработчики
+    ошибка обработчика  -> posts_events.retry.<N>s (TTL N секунд) -> default exchange -> posts_events
+    retry исчерпаны / сообщение не разбирается -> dead_letters (direct) -> posts_events_dlq
+
+Повтор возвращается напрямую в posts_events через default exchange, а не через
+blog_events, чтобы другие подписчики не получили событие повторно. Исходный
+routing key сохраняется в заголовке ORIGINAL_ROUTING_KEY_HEADER.
+"""
+from typing import List, Optional
+
+import aio_pika
+from aio_pika.abc import AbstractChannel, AbstractExchange, AbstractIncomingMessage, AbstractQueue
+
+EVENTS_EXCHANGE = "blog_events"
+EVENTS_QUEUE = "posts_events"
+DEAD_LETTER_EXCHANGE = "dead_letters"
+DEAD_LETTER_ROUTING_KEY = "posts_events_dl"
+DEAD_LETTER_QUEUE = "posts_events_dlq"
+
+RETRY_COUNT_HEADER = "x-retry-count"
+ORIGINAL_ROUTING_KEY_HEADER = "x-original-routing-key"
+# Время первого получения сообщения без timestamp (ISO 8601) - версия счетчика не меняется при повторах
+FIRST_RECEIVED_HEADER = "x-first-received-at"
+
+EVENTS_BINDINGS = [
+    "posts.*",
+    "likes.updated",
+    "comments.updated",
+    # Также биндим на возможные варианты от других сервисов
+    "likes.post_likes_updated",
+    "comments.post_comments_updated",
+]
+
+
+def retry_queue_name(delay_seconds: int) -> str:
+    return f"{EVENTS_QUEUE}.retry.{delay_seconds}s"
+
+
+def original_routing_key(message: AbstractIncomingMessage) -> Optional[str]:
+    """Routing key, с которым событие было опубликовано, для сообщений из retry и DLQ"""
+    headers = message.headers or {}
+    if headers.get(ORIGINAL_ROUTING_KEY_HEADER):
+        return str(headers[ORIGINAL_ROUTING_KEY_HEADER])
+    for death in headers.get("x-death") or []:
+        routing_keys = death.get("routing-keys") or []
+        if death.get("queue") == EVENTS_QUEUE and routing_keys:
+            return str(routing_keys[0])
+    return message.routing_key
+
+
+async def declare_dead_letters(channel: AbstractChannel) -> AbstractQueue:
+    exchange = await channel.declare_exchange(DEAD_LETTER_EXCHANGE, aio_pika.ExchangeType.DIRECT, durable=True)
+    queue = await channel.declare_queue(DEAD_LETTER_QUEUE, durable=True)
+    await queue.bind(exchange, DEAD_LETTER_ROUTING_KEY)
+    return queue
+
+
+async def declare_topology(channel: AbstractChannel, retry_delays: List[int]) -> AbstractQueue:
+    """Объявляет основную очередь, очереди повторов и DLQ; возвращает основную очередь"""
+    await declare_dead_letters(channel)
+
+    for delay in retry_delays:
+        await channel.declare_queue(
+            retry_queue_name(delay),
+            durable=True,
+            arguments={
+                "x-message-ttl": delay * 1000,
+                "x-dead-letter-exchange": "",
+                "x-dead-letter-routing-key": EVENTS_QUEUE,
+            }
+        )
+
+    exchange: AbstractExchange = await channel.declare_exchange(
+        EVENTS_EXCHANGE,
+        aio_pika.ExchangeType.TOPIC,
+        durable=True
+    )
+    queue = await channel.declare_queue(
+        EVENTS_QUEUE,
+        durable=True,
+        arguments={
+            "x-dead-letter-exchange": DEAD_LETTER_EXCHANGE,
+            "x-dead-letter-routing-key": DEAD_LETTER_ROUTING_KEY
+        }
+    )
+    for routing_key in EVENTS_BINDINGS:
+        await queue.bind(exchange, routing_key)
+    return queue
@@ -0,0 +1,21 @@
+"""Операции для миграций Alembic, которые можно безопасно повторить после сбоя"""
+import sqlalchemy as sa
+from alembic import op
+
+
+def has_table(name: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def create_index_concurrently(name: str, definition: str) -> None:
+    """CREATE INDEX CONCURRENTLY name definition внутри autocommit_block().
+
+    Прерванный CONCURRENTLY оставляет индекс INVALID: запросы его не используют, запись его
+    обновляет, а IF NOT EXISTS при повторе миграции его пропускает. Такой индекс удаляется и строится заново.
+    """
+    valid = op.get_bind().execute(
+        sa.text("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"), {"name": name}
+    ).scalar()
+    if valid is False:
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+    op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} {definition}")
@@ -0,0 +1,212 @@
+"""Read-only путь для списков постов без ORM.
+
+Core select() по колонкам возвращает строки без identity map, событий загрузки и
+состояния объекта; строка копируется в PostRecord со __slots__ и сразу превращается
+в dict для сериализатора, без промежуточных Post ORM и PostResponse.
+"""
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .repositories import (
+    author_posts_query, changed_at, changes_query, published_posts_query, search_posts_query,
+)
+from ...core.exeptions import DatabaseError
+from ...core.metrics import DB_REPOSITORY_DURATION, instrument_methods
+from ...domain.models import Post
+
+logger = logging.getLogger(__name__)
+
+# Ключ подсказок: совпадает с выражением индекса ix_posts_title_prefix. Побайтовое сравнение (C)
+# дает и поиск по префиксу через LIKE 'q%', и порядок из индекса - тот же, что у str в Python
+title_key = func.lower(Post.title).collate("C")
+
+
+def escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+POST_COLUMNS = (
+    Post.id,
+    Post.title,
+    Post.description,
+    Post.page,
+    Post.author_id,
+    Post.game,
+    Post.status,
+    Post.tags,
+    Post.view_count,
+    Post.like_count,
+    Post.comment_count,
+    Post.created_at,
+    Post.updated_at,
+    Post.published_at,
+    Post.scheduled_at,
+)
+
+
+class PostRecord:
+    """Пост для чтения: только значения колонок, порядок как в POST_COLUMNS"""
+    __slots__ = (
+        "id", "title", "description", "page", "author_id", "game", "status", "tags",
+        "view_count", "like_count", "comment_count", "created_at", "updated_at", "published_at",
+        "scheduled_at",
+    )
+
+    def __init__(self, id: str, title: str, description: Optional[str], page: Any, author_id: str,
+                 game: Optional[str], status: str, tags: Optional[List[str]], view_count: int,
+                 like_count: int, comment_count: int, created_at: datetime,
+                 updated_at: Optional[datetime], published_at: Optional[datetime],
+                 scheduled_at: Optional[datetime]):
+        self.id = id
+        self.title = title
+        self.description = description
+        self.page = page
+        self.author_id = author_id
+        self.game = game
+        self.status = status
+        self.tags = tags
+        self.view_count = view_count
+        self.like_count = like_count
+        self.comment_count = comment_count
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.published_at = published_at
+        self.scheduled_at = scheduled_at
+
+    def to_response(self, author_username: Optional[str] = None) -> Dict[str, Any]:
+        """Те же поля и значения, что у PostResponse (post_to_response)"""
+        return {
+            "id": self.id,
+            "title": self.title,
+            "description": self.description,
+            "page": self.page if isinstance(self.page, dict) else {},
+            "author": {"id": self.author_id, "username": author_username, "name": None},
+            "game": self.game,
+            "status": self.status,
+            "tags": self.tags if self.tags else [],
+            "view_count": self.view_count,
+            "like_count": self.like_count,
+            "comment_count": self.comment_count,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "published_at": self.published_at,
+            "scheduled_at": self.scheduled_at,
+        }
+
+
+@instrument_methods(DB_REPOSITORY_DURATION)
+class SQLAlchemyPostReadRepository:
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def _fetch(self, query) -> List[PostRecord]:
+        result = await self.session.execute(query)
+        return [PostRecord(*row) for row in result.tuples()]
+
+    async def list_by_author(self, author_id: str, skip: int = 0, limit: int = 100,
+                             game: Optional[str] = None) -> List[PostRecord]:
+        try:
+            return await self._fetch(
+                author_posts_query(select(*POST_COLUMNS), author_id, game).offset(skip).limit(limit)
+            )
+        except Exception as e:
+            logger.error(f"Failed to find posts by user: {e}")
+            raise DatabaseError(f"Failed to find posts: {str(e)}")
+
+    async def list_published(self, skip: int = 0, limit: int = 100,
+                             tags: List[str] = None, game: Optional[str] = None) -> List[PostRecord]:
+        try:
+            return await self._fetch(
+                published_posts_query(select(*POST_COLUMNS), tags, game).offset(skip).limit(limit)
+            )
+        except Exception as e:
+            logger.error(f"Failed to find published posts: {e}")
+            raise DatabaseError(f"Failed to find posts: {str(e)}")
+
+    async def search(self, query: str, skip: int = 0, limit: int = 100) -> List[PostRecord]:
+        try:
+            return await self._fetch(
+                search_posts_query(select(*POST_COLUMNS), query).offset(skip).limit(limit)
+            )
+        except Exception as e:
+            logger.error(f"Failed to search posts: {e}")
+            raise DatabaseError(f"Failed to search posts: {str(e)}")
+
+    async def list_popular(self, limit: int = 10) -> List[PostRecord]:
+        try:
+            return await self._fetch(
+                select(*POST_COLUMNS)
+                .where(Post.status == "published", Post.is_deleted == False)
+                .order_by(Post.view_count.desc())
+                .limit(limit)
+            )
+        except Exception as e:
+            logger.error(f"Failed to find popular posts: {e}")
+            raise DatabaseError(f"Failed to find posts: {str(e)}")
+
+    async def get_many(self, post_ids: List[str]) -> List[PostRecord]:
+        """Опубликованные неудаленные посты по id, в произвольном порядке"""
+        if not post_ids:
+            return []
+        try:
+            return await self._fetch(
+                select(*POST_COLUMNS)
+                .where(Post.id.in_(post_ids), Post.status == "published", Post.is_deleted == False)
+            )
+        except Exception as e:
+            logger.error(f"Failed to get posts by ids: {e}")
+            raise DatabaseError(f"Failed to find posts: {str(e)}")
+
+    async def suggest_titles(self, prefix: str, limit: int = 10) -> List[Tuple[str, str]]:
+        """(id, title) опубликованных постов, у которых title начинается с prefix (без учета регистра)"""
+        try:
+            result = await self.session.execute(
+                select(Post.id, Post.title)
+                .where(
+                    title_key.like(escape_like(prefix.lower()) + "%", escape="\\"),
+                    # Константа, а не параметр: иначе общий план prepared statement не сможет
+                    # использовать частичный индекс ix_posts_title_prefix
+                    Post.status == literal_column("'published'"),
+                    Post.is_deleted == False
+                )
+                .order_by(title_key)
+                .limit(limit)
+            )
+            return list(result.tuples())
+        except Exception as e:
+            logger.error(f"Failed to suggest titles: {e}")
+            raise DatabaseError(f"Failed to suggest titles: {str(e)}")
+
+    async def list_published_titles(self, limit: int) -> List[Tuple[str, str]]:
+        """(id, title) последних опубликованных постов"""
+        try:
+            result = await self.session.execute(
+                select(Post.id, Post.title)
+                .where(Post.status == "published", Post.is_deleted == False)
+                .order_by(Post.published_at.desc())
+                .limit(limit)
+            )
+            return list(result.tuples())
+        except Exception as e:
+            logger.error(f"Failed to list published titles: {e}")
+            raise DatabaseError(f"Failed to list titles: {str(e)}")
+
+    async def find_title_changes(self, since: Optional[Tuple[datetime, str]] = None,
+                                 until: Optional[datetime] = None,
+                                 limit: int = 1000) -> List[Tuple[str, str, str, bool, datetime]]:
+        """Лента изменений (как find_changes), только (id, title, status, is_deleted, changed_at)"""
+        try:
+            result = await self.session.execute(
+                changes_query(
+                    select(Post.id, Post.title, Post.status, Post.is_deleted, changed_at), since, until
+                ).limit(limit)
+            )
+            return list(result.tuples())
+        except Exception as e:
+            logger.error(f"Failed to find title changes: {e}")
+            raise DatabaseError(f"Failed to find changed posts: {str(e)}")
@@ -1,20 +1,152 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete, and_, or_, func
+from sqlalchemy import (
+    select, update, delete, and_, or_, func, tuple_, literal, cast, text, bindparam,
+    BigInteger, DateTime, Integer, Select, String,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, insert as pg_insert
 from sqlalchemy.orm import selectinload
-from typing import List, Optional
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+import json
 import logging
-from ...domain.models import Post
+from ...domain.counters import PROFILE_COLUMNS, PROFILE_STATS_COLUMNS, merge_profile_deltas
+from ...domain.models import ArchivedPost, AuthorProfile, Post, PostCounter, ServiceState
 from ...domain.repositories import PostRepository
+from ...core.db import after_commit
 from ...core.exeptions import DatabaseError
+from ...core.metrics import DB_REPOSITORY_DURATION, instrument_methods
 
 logger = logging.getLogger(__name__)
 
+# Момент последнего изменения поста: updated_at пуст, пока пост ни разу не обновлялся
+changed_at = func.coalesce(Post.updated_at, Post.created_at)
 
+
+# Фильтры и порядок списков. Общие для ORM-репозитория и read-only пути (read_repository),
+# base - select(Post) или select(*колонки)
+def author_posts_query(base: Select, author_id: str, game: Optional[str] = None) -> Select:
+    query = base.where(
+        Post.author_id == author_id,  # Используем author_id вместо user_id
+        Post.is_deleted == False
+    )
+    if game:
+        query = query.where(Post.game == game)
+    return query.order_by(Post.created_at.desc())
+
+
+def published_posts_query(base: Select, tags: List[str] = None, game: Optional[str] = None) -> Select:
+    query = base.where(
+        Post.status == "published",
+        Post.is_deleted == False
+    )
+    if tags:
+        # Filter by tags (PostgreSQL JSONB array contains).
+        # Колонка tags типа JSON, у которого нет оператора @>, поэтому приводим к JSONB
+        query = query.where(cast(Post.tags, JSONB).contains(tags))
+    if game:
+        query = query.where(Post.game == game)
+    return query.order_by(Post.published_at.desc())
+
+
+def search_posts_query(base: Select, query: str) -> Select:
+    # Поиск по title и description (page - JSON, поиск по нему сложнее, можно добавить позже)
+    search_filter = or_(
+        Post.title.ilike(f"%{query}%"),
+        cast(Post.description, String).ilike(f"%{query}%"),
+    )
+    return base.where(
+        search_filter,
+        Post.status == "published",
+        Post.is_deleted == False
+    ).order_by(Post.created_at.desc())
+
+
+def changes_query(base: Select, since: Optional[Tuple[datetime, str]] = None,
+                  until: Optional[datetime] = None) -> Select:
+    query = base
+    if since:
+        since_changed_at, since_id = since
+        query = query.where(
+            tuple_(changed_at, Post.id) > tuple_(literal(since_changed_at, DateTime(timezone=True)), since_id)
+        )
+    if until:
+        query = query.where(changed_at < until)
+    return query.order_by(changed_at, Post.id)
+
+
+def _stats_update_statement(counter: str):
+    # Один UPDATE ... FROM unnest(...) на всю пачку; updated_at не трогаем - как и просмотры,
+    # счетчики из других сервисов не являются изменением поста.
+    # Прежнее значение читается под блокировкой строки - из него считается изменение для профиля автора
+    return text(f"""
+        UPDATE posts AS p
+        SET {counter} = u.value, {counter}_version = u.version
+        FROM (
+            SELECT u.post_id, u.value, u.version, cur.{counter} AS old_value
+            FROM unnest(:post_ids, :values, :versions) AS u(post_id, value, version)
+            JOIN posts AS cur ON cur.id = u.post_id
+            FOR UPDATE OF cur
+        ) AS u
+        WHERE p.id = u.post_id
+          AND (p.{counter}_version IS NULL OR p.{counter}_version < u.version)
+        RETURNING p.id, p.author_id, p.is_deleted, u.value - coalesce(u.old_value, 0)
+    """).bindparams(
+        bindparam("post_ids", type_=ARRAY(String)),
+        bindparam("values", type_=ARRAY(Integer)),
+        bindparam("versions", type_=ARRAY(BigInteger)),
+    )
+
+
+# Классы advisory-блокировок (первый аргумент pg_advisory_xact_lock), второй - hashtext ключа.
+# Изменения счетчика берут разделяемую блокировку ключа до коммита, засев и сверка - эксклюзивную:
+# COUNT(*) под ней видит все закоммиченные изменения, а незакоммиченные дождутся засеянной строки.
+# Профили авторов (ключ - author_id) устроены так же
+_COUNTER_LOCK = 1
+_JOB_LOCK = 2
+_PROFILE_LOCK = 3
+
+_LOCK_SHARED = text(
+    "SELECT count(pg_advisory_xact_lock_shared(:lock_class, hashtext(k))) FROM unnest(:keys) AS k"
+).bindparams(bindparam("keys", type_=ARRAY(String)))
+
+_STATS_COUNTERS = {counter: _stats_update_statement(counter) for counter in ("like_count", "comment_count")}
+
+_ADJUST_AUTHOR_PROFILE = text(
+    "UPDATE author_profiles SET "
+    + ", ".join(f"{column} = {column} + :{column}" for column in PROFILE_COLUMNS)
+    + ", updated_at = now() WHERE author_id = :author_id"
+)
+
+_PUSH_LATEST_POST = text("""
+    UPDATE author_profiles
+    SET latest_post_ids = (
+        ARRAY[CAST(:post_id AS VARCHAR)] || array_remove(latest_post_ids, CAST(:post_id AS VARCHAR))
+    )[1:(:limit)], updated_at = now()
+    WHERE author_id = :author_id
+""")
+
+# Последние опубликованные посты автора; пересчитываются, когда из списка уходит пост
+_REFRESH_LATEST_POSTS = text("""
+    UPDATE author_profiles AS a
+    SET latest_post_ids = ARRAY(
+        SELECT p.id FROM posts AS p
+        WHERE p.author_id = a.author_id AND p.status = 'published' AND p.is_deleted = false
+        ORDER BY p.published_at DESC
+        LIMIT :limit
+    ), updated_at = now()
+    WHERE a.author_id = ANY(:author_ids)
+""").bindparams(bindparam("author_ids", type_=ARRAY(String)))
+
+
+@instrument_methods(DB_REPOSITORY_DURATION)
 class SQLAlchemyPostRepository(PostRepository):
 
     def __init__(self, session: AsyncSession):
         self.session = session
 
+    def after_commit(self, callback: Callable[[], None]) -> None:
+        after_commit(self.session, callback)
+
     async def save(self, post: Post) -> Post:
         try:
             self.session.add(post)
@@ -36,12 +168,11 @@ class SQLAlchemyPostRepository(PostRepository):
             logger.error(f"Failed to find post by id: {e}")
             raise DatabaseError(f"Failed to find post: {str(e)}")
 
-    async def find_by_user(self, user_id: str, skip: int = 0, limit: int = 100) -> List[Post]:
+    async def find_by_user(self, user_id: str, skip: int = 0, limit: int = 100,
+                           game: Optional[str] = None) -> List[Post]:
         try:
             result = await self.session.execute(
-                select(Post)
-                .where(Post.author_id == user_id)  # Используем author_id вместо user_id
-                .order_by(Post.created_at.desc())
+                author_posts_query(select(Post), user_id, game)
                 .offset(skip)
                 .limit(limit)
             )
@@ -50,24 +181,16 @@ class SQLAlchemyPostRepository(PostRepository):
             logger.error(f"Failed to find posts by user: {e}")
             raise DatabaseError(f"Failed to find posts: {str(e)}")
     
-    async def find_by_author(self, author_id: str, skip: int = 0, limit: int = 100) -> List[Post]:
+    async def find_by_author(self, author_id: str, skip: int = 0, limit: int = 100,
+                             game: Optional[str] = None) -> List[Post]:
         """Найти посты по автору (алиас для find_by_user)"""
-        return await self.find_by_user(author_id, skip, limit)
+        return await self.find_by_user(author_id, skip, limit, game)
 
     async def find_published(self, skip: int = 0, limit: int = 100,
-                             tags: List[str] = None) -> List[Post]:
+                             tags: List[str] = None, game: Optional[str] = None) -> List[Post]:
         try:
-            query = select(Post).where(
-                Post.status == "published",
-                Post.is_deleted == False
-            )
-
-            if tags:
-                # Filter by tags (PostgreSQL JSONB array contains)
-                query = query.where(Post.tags.contains(tags))
-
             result = await self.session.execute(
-                query.order_by(Post.published_at.desc())
+                published_posts_query(select(Post), tags, game)
                 .offset(skip)
                 .limit(limit)
             )
@@ -96,24 +219,8 @@ class SQLAlchemyPostRepository(PostRepository):
 
     async def search(self, query: str, skip: int = 0, limit: int = 100) -> List[Post]:
         try:
-            # Поиск по title и description (page - JSON, поиск по нему сложнее, можно добавить позже)
-            filters = [Post.title.ilike(f"%{query}%")]
-            
-            # Добавляем поиск по description если он есть
-            # В PostgreSQL можно использовать cast для поиска по тексту в JSONB
-            from sqlalchemy import cast, String
-            filters.append(cast(Post.description, String).ilike(f"%{query}%"))
-            
-            search_filter = or_(*filters)
-
             result = await self.session.execute(
-                select(Post)
-                .where(
-                    search_filter,
-                    Post.status == "published",
-                    Post.is_deleted == False
-                )
-                .order_by(Post.created_at.desc())
+                search_posts_query(select(Post), query)
                 .offset(skip)
                 .limit(limit)
             )
@@ -127,7 +234,7 @@ class SQLAlchemyPostRepository(PostRepository):
             result = await self.session.execute(
                 update(Post)
                 .where(Post.id == post_id)
-                .values(is_deleted=True)
+                .values(is_deleted=True, scheduled_at=None)
             )
             await self.session.flush()
             return result.rowcount > 0
@@ -141,11 +248,522 @@ class SQLAlchemyPostRepository(PostRepository):
             result = await self.session.execute(
                 update(Post)
                 .where(Post.id == post_id)
-                .values(view_count=Post.view_count + 1)
+                # updated_at не трогаем: просмотр не меняет пост и не должен попадать в ленту изменений
+                .values(view_count=Post.view_count + 1, updated_at=Post.updated_at)
             )
             await self.session.flush()
             return result.rowcount > 0
         except Exception as e:
             logger.error(f"Failed to increment view count: {e}")
             await self.session.rollback()
-            raise DatabaseError(f"Failed to update post: {str(e)}")
\ No newline at end of file
+            raise DatabaseError(f"Failed to update post: {str(e)}")
+
+    async def add_view_counts(self, counts: Dict[str, int]) -> None:
+        """Прибавляет накопленные просмотры одним executemany UPDATE"""
+        # Сортировка id - одинаковый порядок блокировок строк в параллельных транзакциях
+        params = [{"post_id": post_id, "views": views} for post_id, views in sorted(counts.items()) if views]
+        if not params:
+            return
+        try:
+            await self.session.execute(
+                text("UPDATE posts SET view_count = view_count + :views WHERE id = :post_id"),
+                params
+            )
+        except Exception as e:
+            logger.error(f"Failed to add view counts: {e}")
+            raise DatabaseError(f"Failed to update post: {str(e)}")
+
+    async def apply_stats_updates(self, counter: str, updates: List[Tuple[str, int, int]]) -> List[str]:
+        """Условное обновление счетчика (like_count / comment_count) пачкой (post_id, value, version).
+
+        Значение записывается, только если его версия новее сохраненной, поэтому события
+        можно применять в любом порядке и повторно. В пачке должно быть не больше одного
+        обновления на пост. Возвращает id постов, где значение применено.
+        """
+        if counter not in _STATS_COUNTERS:
+            raise ValueError(f"Unknown stats counter: {counter}")
+        if not updates:
+            return []
+        post_ids, values, versions = (list(column) for column in zip(*updates))
+        try:
+            result = await self.session.execute(
+                _STATS_COUNTERS[counter],
+                {"post_ids": post_ids, "values": values, "versions": versions}
+            )
+            rows = result.all()
+        except Exception as e:
+            logger.error(f"Failed to apply {counter} updates: {e}")
+            raise DatabaseError(f"Failed to update post: {str(e)}")
+
+        profile_deltas: Dict[str, Dict[str, int]] = {}
+        for _, author_id, is_deleted, delta in rows:
+            if not is_deleted:
+                merge_profile_deltas(profile_deltas, author_id, {PROFILE_STATS_COLUMNS[counter]: delta})
+        await self.adjust_author_profiles(profile_deltas)
+        return [row[0] for row in rows]
+
+    async def claim_due_scheduled(self, limit: int) -> List[Tuple]:
+        """Публикует до limit постов, чье scheduled_at наступило, одним UPDATE.
+
+        Строки выбираются FOR UPDATE SKIP LOCKED: несколько воркеров и реплик забирают
+        разные пачки, не дожидаясь друг друга. Возвращает (id, author_id, title, game, tags,
+        published_at, scheduled_at, прежний status).
+        """
+        due = (
+            select(Post.id, Post.status, Post.scheduled_at)
+            .where(Post.scheduled_at.isnot(None), Post.scheduled_at <= func.now())
+            .order_by(Post.scheduled_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .cte("due")
+        )
+        try:
+            result = await self.session.execute(
+                update(Post)
+                .where(Post.id == due.c.id)
+                .values(status="published", published_at=func.now(), scheduled_at=None)
+                .returning(
+                    Post.id, Post.author_id, Post.title, Post.game, Post.tags,
+                    Post.published_at, due.c.scheduled_at, due.c.status,
+                )
+            )
+            return [tuple(row) for row in result.all()]
+        except Exception as e:
+            logger.error(f"Failed to publish scheduled posts: {e}")
+            raise DatabaseError(f"Failed to publish scheduled posts: {str(e)}")
+
+    async def next_scheduled_at(self) -> Optional[datetime]:
+        try:
+            result = await self.session.execute(
+                select(func.min(Post.scheduled_at)).where(Post.scheduled_at.isnot(None))
+            )
+            return result.scalar_one()
+        except Exception as e:
+            logger.error(f"Failed to get next scheduled post: {e}")
+            raise DatabaseError(f"Failed to get next scheduled post: {str(e)}")
+
+    async def archive_deleted(self, deleted_before: datetime, limit: int) -> int:
+        """Переносит до limit постов, удаленных раньше deleted_before, в posts_archive.
+
+        DELETE ... RETURNING и INSERT - один запрос: пост не может оказаться ни в обеих таблицах,
+        ни ни в одной. Пачка выбирается по частичному индексу ix_posts_deleted_changed_at
+        с FOR UPDATE SKIP LOCKED, поэтому архиватор в нескольких воркерах не конфликтует.
+        Если id уже есть в архиве (пост восстановили из бэкапа или импорта), архивная строка
+        заменяется последней версией - иначе конфликт по ключу остановил бы архивацию навсегда.
+        """
+        batch = (
+            select(Post.id)
+            .where(Post.is_deleted == True, changed_at < deleted_before)
+            .order_by(changed_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        moved = (
+            delete(Post)
+            .where(Post.id.in_(batch.scalar_subquery()))
+            .returning(*Post.__table__.columns)
+            .cte("moved")
+        )
+        columns = [column.name for column in Post.__table__.columns]
+        insert = pg_insert(ArchivedPost).from_select(columns, select(*(moved.c[name] for name in columns)))
+        insert = insert.on_conflict_do_update(
+            index_elements=[ArchivedPost.id],
+            set_={**{name: insert.excluded[name] for name in columns if name != "id"}, "archived_at": func.now()}
+        )
+        try:
+            result = await self.session.execute(insert)
+            return result.rowcount
+        except Exception as e:
+            logger.error(f"Failed to archive deleted posts: {e}")
+            raise DatabaseError(f"Failed to archive posts: {str(e)}")
+
+    async def get_stats(self, post_ids: List[str]) -> List[Tuple[str, int, int, int]]:
+        """Только счетчики, без page JSON - читается из покрывающего индекса ix_posts_stats"""
+        if not post_ids:
+            return []
+        try:
+            result = await self.session.execute(
+                select(Post.id, Post.view_count, Post.like_count, Post.comment_count)
+                .where(
+                    Post.id.in_(post_ids),
+                    Post.is_deleted == False
+                )
+            )
+            return [tuple(row) for row in result.all()]
+        except Exception as e:
+            logger.error(f"Failed to get post stats: {e}")
+            raise DatabaseError(f"Failed to get post stats: {str(e)}")
+
+    async def insert_many(self, rows: List[Dict[str, Any]]) -> List[str]:
+        """Вставка пачки постов одним multi-row INSERT.
+
+        Строки с уже существующим id пропускаются (ON CONFLICT DO NOTHING), как и id
+        заархивированных постов - иначе после удаления пост оказался бы в обеих таблицах.
+        Возвращаются id реально вставленных постов.
+        """
+        if not rows:
+            return []
+        try:
+            archived = await self.session.execute(
+                select(ArchivedPost.id).where(ArchivedPost.id.in_([row["id"] for row in rows]))
+            )
+            archived_ids = set(archived.scalars().all())
+            if archived_ids:
+                rows = [row for row in rows if row["id"] not in archived_ids]
+                if not rows:
+                    return []
+            result = await self.session.execute(
+                pg_insert(Post)
+                .values(rows)
+                .on_conflict_do_nothing(index_elements=[Post.id])
+                .returning(Post.id)
+            )
+            return list(result.scalars().all())
+        except Exception as e:
+            logger.error(f"Failed to insert posts: {e}")
+            await self.session.rollback()
+            raise DatabaseError(f"Failed to insert posts: {str(e)}")
+
+    async def stream_posts(self, status: Optional[str] = None, author_id: Optional[str] = None,
+                           game: Optional[str] = None, updated_since: Optional[datetime] = None,
+                           include_deleted: bool = False,
+                           batch_size: int = 1000) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Все посты по фильтрам пачками по batch_size через серверный курсор.
+
+        Строки читаются Core-запросом (без identity map), поэтому память
+        не растет с количеством выгруженных постов.
+        """
+        query = select(Post.__table__)
+        if not include_deleted:
+            query = query.where(Post.is_deleted == False)
+        if status:
+            query = query.where(Post.status == status)
+        if author_id:
+            query = query.where(Post.author_id == author_id)
+        if game:
+            query = query.where(Post.game == game)
+        if updated_since:
+            query = query.where(changed_at >= updated_since)
+
+        try:
+            result = await self.session.stream(query.execution_options(yield_per=batch_size))
+            async for partition in result.mappings().partitions():
+                yield [dict(row) for row in partition]
+        except Exception as e:
+            logger.error(f"Failed to stream posts: {e}")
+            raise DatabaseError(f"Failed to stream posts: {str(e)}")
+
+    async def find_changes(self, since: Optional[Tuple[datetime, str]] = None,
+                           until: Optional[datetime] = None, limit: int = 100) -> List[Post]:
+        """Посты, измененные после since=(момент изменения, id), включая удаленные.
+
+        Порядок (changed_at, id) совпадает с индексом ix_posts_changed_at_id,
+        поэтому каждая страница - короткий range scan.
+        """
+        try:
+            result = await self.session.execute(
+                changes_query(select(Post), since, until).limit(limit)
+            )
+            return list(result.scalars().all())
+        except Exception as e:
+            logger.error(f"Failed to find changed posts: {e}")
+            raise DatabaseError(f"Failed to find changed posts: {str(e)}")
+
+    async def get_counter(self, key: str) -> Optional[int]:
+        try:
+            result = await self.session.execute(
+                select(PostCounter.value).where(PostCounter.key == key)
+            )
+            return result.scalar_one_or_none()
+        except Exception as e:
+            logger.error(f"Failed to get counter {key}: {e}")
+            raise DatabaseError(f"Failed to get counter: {str(e)}")
+
+    async def seed_counter(self, key: str, value: int) -> None:
+        try:
+            await self.session.execute(
+                pg_insert(PostCounter)
+                .values(key=key, value=value)
+                .on_conflict_do_nothing(index_elements=[PostCounter.key])
+            )
+        except Exception as e:
+            logger.error(f"Failed to seed counter {key}: {e}")
+            raise DatabaseError(f"Failed to seed counter: {str(e)}")
+
+    async def adjust_counters(self, deltas: Dict[str, int]) -> None:
+        """Изменяет существующие счетчики на delta. Незасеянные счетчики не создаются:
+        их значение будет посчитано COUNT(*) при первом чтении."""
+        # Сортировка ключей - одинаковый порядок блокировок во всех транзакциях
+        params = [{"counter_key": key, "delta": delta} for key, delta in sorted(deltas.items()) if delta]
+        if not params:
+            return
+        try:
+            # Отдельным запросом: UPDATE должен взять снимок уже после ожидания засева
+            await self.session.execute(
+                _LOCK_SHARED, {"lock_class": _COUNTER_LOCK, "keys": [param["counter_key"] for param in params]}
+            )
+            await self.session.execute(
+                text("UPDATE post_counters SET value = value + :delta WHERE key = :counter_key"),
+                params
+            )
+        except Exception as e:
+            logger.error(f"Failed to adjust counters: {e}")
+            raise DatabaseError(f"Failed to adjust counters: {str(e)}")
+
+    async def lock_counter(self, key: str) -> None:
+        """Эксклюзивная блокировка счетчика до конца транзакции - для засева и сверки"""
+        try:
+            await self.session.execute(
+                select(func.pg_advisory_xact_lock(_COUNTER_LOCK, func.hashtext(key)))
+            )
+        except Exception as e:
+            logger.error(f"Failed to lock counter {key}: {e}")
+            raise DatabaseError(f"Failed to lock counter: {str(e)}")
+
+    async def set_counter(self, key: str, value: int) -> None:
+        try:
+            await self.session.execute(
+                update(PostCounter).where(PostCounter.key == key).values(value=value)
+            )
+        except Exception as e:
+            logger.error(f"Failed to set counter {key}: {e}")
+            raise DatabaseError(f"Failed to set counter: {str(e)}")
+
+    async def counter_keys(self, after: Optional[str], limit: int) -> List[str]:
+        """Ключи счетчиков по порядку, начиная после after - для постраничного обхода"""
+        query = select(PostCounter.key).order_by(PostCounter.key).limit(limit)
+        if after is not None:
+            query = query.where(PostCounter.key > after)
+        try:
+            result = await self.session.execute(query)
+            return list(result.scalars().all())
+        except Exception as e:
+            logger.error(f"Failed to list counters: {e}")
+            raise DatabaseError(f"Failed to get counters: {str(e)}")
+
+    async def try_lock_job(self, name: str) -> bool:
+        """Блокировка фоновой задачи до конца транзакции; False - задачу уже выполняет другой процесс"""
+        try:
+            result = await self.session.execute(
+                select(func.pg_try_advisory_xact_lock(_JOB_LOCK, func.hashtext(name)))
+            )
+            return bool(result.scalar_one())
+        except Exception as e:
+            logger.error(f"Failed to lock job {name}: {e}")
+            raise DatabaseError(f"Failed to lock job: {str(e)}")
+
+    async def top_counter_keys(self, prefix: str, limit: int) -> List[str]:
+        """Ключи счетчиков с префиксом (published:tag:, published:game:) по убыванию значения"""
+        try:
+            result = await self.session.execute(
+                select(PostCounter.key)
+                .where(PostCounter.key.startswith(prefix, autoescape=True))
+                .order_by(PostCounter.value.desc())
+                .limit(limit)
+            )
+            return list(result.scalars().all())
+        except Exception as e:
+            logger.error(f"Failed to get top counters: {e}")
+            raise DatabaseError(f"Failed to get counters: {str(e)}")
+
+    async def count_posts(self, author_id: Optional[str] = None, published_only: bool = False,
+                          game: Optional[str] = None, tag: Optional[str] = None) -> int:
+        """Точный COUNT(*) - используется только для первичного заполнения счетчиков"""
+        try:
+            query = select(func.count()).select_from(Post).where(Post.is_deleted == False)
+            if author_id:
+                query = query.where(Post.author_id == author_id)
+            if published_only:
+                query = query.where(Post.status == "published")
+            if game:
+                query = query.where(Post.game == game)
+            if tag:
+                query = query.where(cast(Post.tags, JSONB).contains([tag]))
+
+            result = await self.session.execute(query)
+            return result.scalar_one()
+        except Exception as e:
+            logger.error(f"Failed to count posts: {e}")
+            raise DatabaseError(f"Failed to count posts: {str(e)}")
+
+    async def estimate_posts(self, author_id: Optional[str] = None, published_only: bool = False,
+                             game: Optional[str] = None, tags: Optional[List[str]] = None,
+                             search_query: Optional[str] = None) -> int:
+        """Оценка количества постов планировщиком PostgreSQL (reltuples * селективность фильтров)"""
+        conditions = ["is_deleted = false"]
+        params: Dict[str, Any] = {}
+        if author_id:
+            conditions.append("author_id = :author_id")
+            params["author_id"] = author_id
+        if published_only:
+            conditions.append("status = 'published'")
+        if game:
+            conditions.append("game = :game")
+            params["game"] = game
+        if tags:
+            conditions.append("CAST(tags AS JSONB) @> CAST(:tags AS JSONB)")
+            params["tags"] = json.dumps(tags)
+        if search_query:
+            conditions.append("(title ILIKE :pattern OR description ILIKE :pattern)")
+            params["pattern"] = f"%{search_query}%"
+
+        try:
+            result = await self.session.execute(
+                text(f"EXPLAIN (FORMAT JSON) SELECT 1 FROM posts WHERE {' AND '.join(conditions)}"),
+                params
+            )
+            plan = result.scalar_one()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]["Plan"]["Plan Rows"])
+        except Exception as e:
+            logger.error(f"Failed to estimate posts count: {e}")
+            raise DatabaseError(f"Failed to estimate posts count: {str(e)}")
+
+    async def get_author_profile(self, author_id: str) -> Optional[AuthorProfile]:
+        try:
+            result = await self.session.execute(
+                select(AuthorProfile).where(AuthorProfile.author_id == author_id)
+            )
+            return result.scalar_one_or_none()
+        except Exception as e:
+            logger.error(f"Failed to get author profile: {e}")
+            raise DatabaseError(f"Failed to get author profile: {str(e)}")
+
+    async def build_author_profile(self, author_id: str, latest_limit: int) -> Dict[str, Any]:
+        """Сводка автора подсчетом по posts - используется только для первичного заполнения профиля"""
+        not_deleted = and_(Post.author_id == author_id, Post.is_deleted == False)
+        try:
+            result = await self.session.execute(
+                select(
+                    func.count().filter(Post.status == "draft"),
+                    func.count().filter(Post.status == "published"),
+                    func.coalesce(func.sum(Post.view_count), 0),
+                    func.coalesce(func.sum(Post.like_count), 0),
+                    func.coalesce(func.sum(Post.comment_count), 0),
+                ).where(not_deleted)
+            )
+            counts = result.one()
+            latest = await self.session.execute(
+                select(Post.id)
+                .where(not_deleted, Post.status == "published")
+                .order_by(Post.published_at.desc())
+                .limit(latest_limit)
+            )
+        except Exception as e:
+            logger.error(f"Failed to build author profile: {e}")
+            raise DatabaseError(f"Failed to build author profile: {str(e)}")
+
+        return {
+            "author_id": author_id,
+            **dict(zip(PROFILE_COLUMNS, (int(value) for value in counts))),
+            "latest_post_ids": list(latest.scalars().all()),
+        }
+
+    async def lock_author_profile(self, author_id: str) -> None:
+        """Эксклюзивная блокировка профиля автора до конца транзакции - для засева и сверки"""
+        try:
+            await self.session.execute(
+                select(func.pg_advisory_xact_lock(_PROFILE_LOCK, func.hashtext(author_id)))
+            )
+        except Exception as e:
+            logger.error(f"Failed to lock author profile {author_id}: {e}")
+            raise DatabaseError(f"Failed to lock author profile: {str(e)}")
+
+    async def author_profile_ids(self, after: Optional[str], limit: int) -> List[str]:
+        """id авторов с профилем по порядку, начиная после after - для постраничного обхода"""
+        query = select(AuthorProfile.author_id).order_by(AuthorProfile.author_id).limit(limit)
+        if after is not None:
+            query = query.where(AuthorProfile.author_id > after)
+        try:
+            result = await self.session.execute(query)
+            return list(result.scalars().all())
+        except Exception as e:
+            logger.error(f"Failed to list author profiles: {e}")
+            raise DatabaseError(f"Failed to get author profiles: {str(e)}")
+
+    async def seed_author_profile(self, values: Dict[str, Any]) -> None:
+        try:
+            await self.session.execute(
+                pg_insert(AuthorProfile)
+                .values(**values)
+                .on_conflict_do_nothing(index_elements=[AuthorProfile.author_id])
+            )
+        except Exception as e:
+            logger.error(f"Failed to seed author profile: {e}")
+            raise DatabaseError(f"Failed to seed author profile: {str(e)}")
+
+    async def set_author_profile(self, values: Dict[str, Any]) -> None:
+        """Перезаписывает сводку существующего профиля значениями build_author_profile"""
+        author_id = values["author_id"]
+        try:
+            await self.session.execute(
+                update(AuthorProfile)
+                .where(AuthorProfile.author_id == author_id)
+                .values(**{key: value for key, value in values.items() if key != "author_id"}, updated_at=func.now())
+            )
+        except Exception as e:
+            logger.error(f"Failed to set author profile {author_id}: {e}")
+            raise DatabaseError(f"Failed to set author profile: {str(e)}")
+
+    async def adjust_author_profiles(self, deltas: Dict[str, Dict[str, int]]) -> None:
+        """Изменяет сводки существующих профилей: author_id -> {колонка: delta}.
+        Незаполненные профили не создаются - они будут посчитаны при первом чтении."""
+        # Сортировка id - одинаковый порядок блокировок во всех транзакциях
+        params = [
+            {"author_id": author_id, **{column: delta.get(column, 0) for column in PROFILE_COLUMNS}}
+            for author_id, delta in sorted(deltas.items())
+            if any(delta.values())
+        ]
+        if not params:
+            return
+        try:
+            # Отдельным запросом: UPDATE должен взять снимок уже после ожидания засева
+            await self.session.execute(
+                _LOCK_SHARED, {"lock_class": _PROFILE_LOCK, "keys": [param["author_id"] for param in params]}
+            )
+            await self.session.execute(_ADJUST_AUTHOR_PROFILE, params)
+        except Exception as e:
+            logger.error(f"Failed to adjust author profiles: {e}")
+            raise DatabaseError(f"Failed to adjust author profiles: {str(e)}")
+
+    async def push_latest_post(self, author_id: str, post_id: str, limit: int) -> None:
+        """Добавляет только что опубликованный пост в начало latest_post_ids"""
+        try:
+            await self.session.execute(_PUSH_LATEST_POST, {"author_id": author_id, "post_id": post_id, "limit": limit})
+        except Exception as e:
+            logger.error(f"Failed to update latest posts: {e}")
+            raise DatabaseError(f"Failed to update latest posts: {str(e)}")
+
+    async def refresh_latest_posts(self, author_ids: List[str], limit: int) -> None:
+        if not author_ids:
+            return
+        try:
+            await self.session.execute(_REFRESH_LATEST_POSTS, {"author_ids": sorted(author_ids), "limit": limit})
+        except Exception as e:
+            logger.error(f"Failed to refresh latest posts: {e}")
+            raise DatabaseError(f"Failed to refresh latest posts: {str(e)}")
+
+    async def get_service_state(self, key: str) -> Optional[Any]:
+        try:
+            result = await self.session.execute(
+                select(ServiceState.value).where(ServiceState.key == key)
+            )
+            return result.scalar_one_or_none()
+        except Exception as e:
+            logger.error(f"Failed to get service state {key}: {e}")
+            raise DatabaseError(f"Failed to get service state: {str(e)}")
+
+    async def set_service_state(self, key: str, value: Any) -> None:
+        try:
+            await self.session.execute(
+                pg_insert(ServiceState)
+                .values(key=key, value=value)
+                .on_conflict_do_update(
+                    index_elements=[ServiceState.key],
+                    set_={"value": value, "updated_at": func.now()}
+                )
+            )
+        except Exception as e:
+            logger.error(f"Failed to save service state {key}: {e}")
+            raise DatabaseError(f"Failed to save service state: {str(e)}")
@@ -0,0 +1,25 @@
+"""Тесты идут против настоящего PostgreSQL (DATABASE_URL) со схемой `alembic upgrade head`.
+Без доступной базы тесты пропускаются."""
+import os
+
+# Фоновые задачи и consumer в тестах не нужны: они добавили бы свои SQL к запросам
+os.environ.setdefault("WARMUP_ENABLED", "false")
+os.environ.setdefault("SCHEDULER_ENABLED", "false")
+os.environ.setdefault("ARCHIVER_ENABLED", "false")
+os.environ.setdefault("COUNTER_RECONCILE_ENABLED", "false")
+os.environ.setdefault("CONSUMER_MODE", "off")
+os.environ.setdefault("ADMISSION_CONTROL_ENABLED", "false")
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.post_service.api.app import app
+from src.post_service.core.db import check_db
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as client:
+        if not client.portal.call(check_db):
+            pytest.skip("PostgreSQL from DATABASE_URL is not available")
+        yield client
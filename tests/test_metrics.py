@@ -0,0 +1,36 @@
+"""Метрики нескольких воркеров: /metrics одного воркера отдает серии всех, каждая с label worker."""
+import asyncio
+
+from src.post_service.core.metrics import Counter, Histogram, MetricsRegistry, WorkerMetricsExporter
+
+
+def worker_registry(pid: int) -> MetricsRegistry:
+    registry = MetricsRegistry()
+    registry.worker_label = f'worker="{pid}"'
+    return registry
+
+
+def test_render_merges_other_workers(tmp_path):
+    first, second = worker_registry(1), worker_registry(2)
+    for registry, requests in ((first, 3), (second, 5)):
+        registry.register(Counter("requests_total", "Requests", ("route",))).inc("/posts", amount=requests)
+        registry.register(Histogram("latency_seconds", "Latency", buckets=(0.1,))).observe(0.05)
+
+    exporter = WorkerMetricsExporter(str(tmp_path), interval=60, metrics_registry=second)
+    exporter.path = str(tmp_path / "2.json")
+    exporter._write(second.samples())
+    reader = WorkerMetricsExporter(str(tmp_path), interval=60, metrics_registry=first)
+
+    async def scenario():
+        reader.start()
+        try:
+            return first.render(await reader.other_workers())
+        finally:
+            await reader.stop()
+
+    text = asyncio.run(scenario())
+    assert text.count("# TYPE requests_total counter") == 1
+    assert 'requests_total{worker="1",route="/posts"} 3' in text
+    assert 'requests_total{worker="2",route="/posts"} 5' in text
+    assert 'latency_seconds_bucket{worker="2",le="0.1"} 1' in text
+    assert 'latency_seconds_count{worker="1"} 1' in text
@@ -0,0 +1,37 @@
+"""Горячий набор PostQueryCache: прогрев через replay() не считается обращением. Без БД."""
+import asyncio
+
+from src.post_service.domain import post_query_cache as post_query_cache_module
+from src.post_service.domain.post_query_cache import PostQueryCache
+
+
+class FakeSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+
+class EmptyReadRepository:
+    def __init__(self, session):
+        pass
+
+    async def list_popular(self, limit):
+        return []
+
+    async def search(self, query, skip, limit):
+        return []
+
+
+def test_replay_does_not_feed_hot_keys(monkeypatch):
+    monkeypatch.setattr(post_query_cache_module, "SQLAlchemyPostReadRepository", EmptyReadRepository)
+    cache = PostQueryCache(session_factory=FakeSession)
+
+    async def scenario():
+        await cache.popular(10)
+        await cache.replay(["popular", 10])
+        await cache.replay(["search", "doom", 0, 20])
+
+    asyncio.run(scenario())
+    assert cache.hits == {("popular", 10): 1}
@@ -0,0 +1,95 @@
+"""Бюджеты SQL на запрос для горячих эндпоинтов: лишний запрос (N+1, ленивая загрузка,
+повторное чтение) роняет тест. Количество берется из Server-Timing (QueryStatsMiddleware)."""
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+from src.post_service.core.db import AsyncSessionLocal
+from src.post_service.core.sql_instrumentation import assert_max_queries, assert_response_max_queries
+from src.post_service.domain.models import Post
+from src.post_service.domain.post_query_cache import post_query_cache
+from src.post_service.domain.services import PostService
+from src.post_service.repo.sql.repositories import SQLAlchemyPostRepository
+
+POSTS = 30
+
+
+@pytest.fixture(scope="module")
+def author_id(client):
+    author_id = f"budget-{uuid.uuid4()}"
+
+    async def seed():
+        async with AsyncSessionLocal() as session:
+            session.add_all(
+                Post(title=f"Budget post {i}", page={}, author_id=author_id, status="published",
+                     published_at=datetime.now(timezone.utc), tags=["budget"])
+                for i in range(POSTS)
+            )
+            await session.commit()
+
+    client.portal.call(seed)
+    return author_id
+
+
+@pytest.fixture(scope="module")
+def post_id(client, author_id):
+    response = client.get("/api/v1/posts/", params={"author_id": author_id, "limit": 1})
+    return response.json()["posts"][0]["id"]
+
+
+def test_get_post(client, post_id):
+    response = client.get(f"/api/v1/posts/{post_id}")
+    assert response.status_code == 200
+    assert_response_max_queries(response, 1)
+
+
+def test_get_post_without_view(client, post_id):
+    response = client.get(f"/api/v1/posts/{post_id}", params={"increment_views": False})
+    assert response.status_code == 200
+    assert_response_max_queries(response, 1)
+
+
+def test_author_list(client, author_id):
+    params = {"author_id": author_id, "limit": POSTS}
+    client.get("/api/v1/posts/", params=params)  # Первый запрос засевает счетчик автора
+
+    response = client.get("/api/v1/posts/", params=params)
+    assert response.status_code == 200
+    assert len(response.json()["posts"]) == POSTS
+    # Страница одним запросом по колонкам + счетчик
+    assert_response_max_queries(response, 2)
+
+
+def test_feed_cold_cache(client, author_id):
+    params = {"tags": ["budget"], "limit": POSTS}
+    client.get("/api/v1/posts/", params=params)
+
+    post_query_cache.invalidate()
+    post_query_cache.posts.clear()
+    response = client.get("/api/v1/posts/", params=params)
+    assert response.status_code == 200
+    # id и колонки постов одним запросом (гидрация из кэша постов) + счетчик тега
+    assert_response_max_queries(response, 2)
+
+
+def test_feed_warm_cache(client, author_id):
+    params = {"tags": ["budget"], "limit": POSTS}
+    client.get("/api/v1/posts/", params=params)
+
+    response = client.get("/api/v1/posts/", params=params)
+    assert response.status_code == 200
+    assert_response_max_queries(response, 1)
+
+
+def test_count_posts_uses_counter(client, author_id):
+    async def count():
+        async with AsyncSessionLocal() as session:
+            service = PostService(SQLAlchemyPostRepository(session))
+            await service.count_posts(author_id)
+            await session.commit()
+            with assert_max_queries(1):
+                total, is_estimate = await service.count_posts(author_id)
+        return total, is_estimate
+
+    assert client.portal.call(count) == (POSTS, False)
@@ -0,0 +1,101 @@
+"""Версии счетчиков из событий без version и timestamp: сообщение, вернувшееся из retry-очереди,
+не должно откатить значение, записанное после его первой доставки. Без брокера и БД."""
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from src.post_service.domain.stats_batcher import source_version
+from src.post_service.mq.consumer import EventConsumer
+from src.post_service.mq.topology import FIRST_RECEIVED_HEADER
+
+
+class FakeMessage:
+    def __init__(self, body: dict, message_id: str, headers: Optional[dict] = None,
+                 timestamp: Optional[datetime] = None):
+        self.body = json.dumps(body).encode()
+        self.message_id = message_id
+        self.headers = headers or {}
+        self.timestamp = timestamp
+        self.content_type = "application/json"
+        self.type = None
+        self.routing_key = "likes.updated"
+        self.acked = False
+
+    @asynccontextmanager
+    async def process(self, requeue: bool = False, ignore_processed: bool = False):
+        yield
+
+    async def ack(self):
+        self.acked = True
+
+    async def reject(self, requeue: bool = False):
+        pass
+
+
+class FakeExchange:
+    def __init__(self):
+        self.published = []
+
+    async def publish(self, message, routing_key: str):
+        self.published.append(message)
+
+
+class FakeChannel:
+    def __init__(self):
+        self.default_exchange = FakeExchange()
+
+
+def consumer_with_store(store: Dict[str, tuple], fail_once: List[str]) -> EventConsumer:
+    """Consumer, чей обработчик применяет значение как apply_stats_updates: только более новую версию"""
+    consumer = EventConsumer()
+    consumer.channel = FakeChannel()
+
+    async def handler(event):
+        if event.event_id in fail_once:
+            fail_once.remove(event.event_id)
+            raise RuntimeError("database is unavailable")
+        version = source_version(event)
+        current = store.get(event.post_id)
+        if current is None or current[1] < version:
+            store[event.post_id] = (event.like_count, version)
+
+    consumer.register_handler("post_likes_updated", handler)
+    return consumer
+
+
+def redelivered(published) -> FakeMessage:
+    """Сообщение в том виде, в каком оно вернется из retry-очереди"""
+    message = FakeMessage({}, published.message_id, dict(published.headers), published.timestamp)
+    message.body = published.body
+    return message
+
+
+def test_retried_stale_message_does_not_roll_back_newer_value():
+    store: Dict[str, tuple] = {}
+    consumer = consumer_with_store(store, fail_once=["stale"])
+
+    async def scenario():
+        await consumer._process(FakeMessage({"event_id": "stale", "post_id": "p1", "like_count": 5}, "m1"))
+        await asyncio.sleep(0.01)
+        await consumer._process(FakeMessage({"event_id": "fresh", "post_id": "p1", "like_count": 7}, "m2"))
+        retry = consumer.channel.default_exchange.published[0]
+        assert FIRST_RECEIVED_HEADER in retry.headers
+        await asyncio.sleep(0.01)
+        await consumer._process(redelivered(retry))
+
+    asyncio.run(scenario())
+    assert store["p1"][0] == 7
+
+
+def test_amqp_timestamp_is_the_version():
+    store: Dict[str, tuple] = {}
+    consumer = consumer_with_store(store, fail_once=[])
+    sent_at = datetime.now(timezone.utc) - timedelta(minutes=5)
+
+    async def scenario():
+        await consumer._process(FakeMessage({"post_id": "p1", "like_count": 3}, "m1", timestamp=sent_at))
+
+    asyncio.run(scenario())
+    assert store["p1"] == (3, int(sent_at.timestamp() * 1_000_000))
@@ -0,0 +1,55 @@
+"""Остановка ViewAggregator посреди медленной записи в БД: окно не теряется и не записывается дважды.
+Без БД: репозиторий подменяется на запись в память."""
+import asyncio
+from typing import Dict, List
+
+from src.post_service.domain import view_aggregator as view_aggregator_module
+from src.post_service.domain.view_aggregator import ViewAggregator
+
+
+class FakeSession:
+    def __init__(self, committed: List[Dict[str, int]]):
+        self.committed = committed
+        self.pending: Dict[str, int] = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.pending = {}
+
+    async def commit(self):
+        self.committed.append(self.pending)
+
+
+class SlowRepository:
+    started = None
+
+    def __init__(self, session: FakeSession):
+        self.session = session
+
+    async def add_view_counts(self, counts: Dict[str, int]):
+        SlowRepository.started.set()
+        await asyncio.sleep(0.2)
+        self.session.pending = dict(counts)
+
+    async def adjust_author_profiles(self, deltas):
+        pass
+
+
+def test_stop_during_slow_flush_keeps_views(monkeypatch):
+    monkeypatch.setattr(view_aggregator_module, "SQLAlchemyPostRepository", SlowRepository)
+    committed: List[Dict[str, int]] = []
+
+    async def scenario():
+        SlowRepository.started = asyncio.Event()
+        aggregator = ViewAggregator(window_seconds=0.01, session_factory=lambda: FakeSession(committed))
+        for _ in range(3):
+            aggregator.record("p1", "a1")
+        aggregator.start()
+        await SlowRepository.started.wait()
+        aggregator.record("p1", "a1")
+        await aggregator.stop()
+
+    asyncio.run(scenario())
+    assert sum(counts.get("p1", 0) for counts in committed) == 4